@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import logging
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
@@ -6,6 +7,12 @@ from aiogram.client.default import DefaultBotProperties
 
 import config
 from database import Database
+from outbound import OutboundScheduler, Priority, outbound_priority
+from broadcast import BroadcastRunner
+from cold_archive import run_cold_archive
+from lifecycle import ContestScheduler, TIMERS_JOB
+from fsm_storage import BoundedStorage
+from loader import RequestLoader
 from utils import setup_logging
 from handlers import user, admin
 
@@ -20,9 +27,29 @@ async def main():
         token=config.BOT_TOKEN,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher()
+    # Barcha chiquvchi so'rovlar navbat va rate limit orqali o'tadi
+    outbound = OutboundScheduler()
+    bot.session.middleware(outbound)
 
     db = Database()
+    fsm_storage = BoundedStorage(db if config.FSM_STORAGE == 'postgres' else None)
+
+    dp = Dispatcher(storage=fsm_storage)
+    dp['outbound'] = outbound
+    dp['fsm_storage'] = fsm_storage
+    broadcasts = BroadcastRunner(bot, db)
+    dp['broadcasts'] = broadcasts
+    lifecycle = ContestScheduler(bot, db)
+    dp['lifecycle'] = lifecycle
+    # Ovoz beruvchilar to'plami faqat ochiq konkurslar uchun
+    db.voters.lifecycle = lifecycle
+
+    # Faqat bitta replikada ishlashi kerak bo'lgan fon vazifalari
+    db.coordinator.singleton(TIMERS_JOB, lifecycle.run_timers)
+    db.coordinator.singleton('broadcasts', broadcasts.run)
+    if fsm_storage.db is not None:
+        db.coordinator.singleton('fsm_purge', fsm_storage.purge)
+    db.coordinator.singleton('cold_archive', functools.partial(run_cold_archive, db))
 
     dp.include_router(user.router)
     dp.include_router(admin.router)
@@ -30,22 +57,31 @@ async def main():
     @dp.message.middleware()
     @dp.callback_query.middleware()
     async def db_middleware(handler, event, data):
-        data['db'] = db
-        return await handler(event, data)
+        # Update davomida bir xil o'qishlar DB ga bir marta boradi
+        loader = RequestLoader(db)
+        data['db'] = loader
+        try:
+            return await handler(event, data)
+        finally:
+            loader.close(type(event).__name__)
 
     try:
         logger.info("Database ga ulanish...")
         await db.connect()
         logger.info("Database ulandi ✅")
 
-        for admin_id in config.ADMIN_IDS:
-            try:
-                await bot.send_message(
-                    admin_id,
-                    "<b>Bot ishga tushdi✅</b>\n"
-                )
-            except Exception as e:
-                logger.error(f"Adminga xabar yuborishda xato: {e}")
+        await lifecycle.start()
+        await db.coordinator.start()
+
+        with outbound_priority(Priority.LOW):
+            for admin_id in config.ADMIN_IDS:
+                try:
+                    await bot.send_message(
+                        admin_id,
+                        "<b>Bot ishga tushdi✅</b>\n"
+                    )
+                except Exception as e:
+                    logger.error(f"Adminga xabar yuborishda xato: {e}")
 
         logger.info("Polling boshlandi...")
         await dp.start_polling(bot)
@@ -55,18 +91,23 @@ async def main():
     except Exception as e:
         logger.error(f"Kritik xato: {e}", exc_info=True)
     finally:
-        for admin_id in config.ADMIN_IDS:
-            try:
-                await bot.send_message(
-                    admin_id,
-                    "⚠️ <b>Bot to'xtatildi</b>\n"
-                )
-            except Exception as e:
-                logger.error(f"Adminga xabar yuborishda xato: {e}")
-
+        with outbound_priority(Priority.LOW):
+            for admin_id in config.ADMIN_IDS:
+                try:
+                    await bot.send_message(
+                        admin_id,
+                        "⚠️ <b>Bot to'xtatildi</b>\n"
+                    )
+                except Exception as e:
+                    logger.error(f"Adminga xabar yuborishda xato: {e}")
+
+        await lifecycle.close()
+        await broadcasts.close()
+        await fsm_storage.close()
         await db.close()
         logger.info("Database yopildi")
 
+        await outbound.close()
         await bot.session.close()
         logger.info("Bot session yopildi")
 
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+import config
+from database import Database
+from outbound import Priority, outbound_priority
+from callbacks import BROADCAST_STOP
+
+logger = logging.getLogger(__name__)
+
+
+def broadcast_stop_keyboard(broadcast_id: int):
+    kb = InlineKeyboardBuilder()
+    kb.button(text="⏹ To'xtatish", callback_data=BROADCAST_STOP.pack(broadcast_id))
+    return kb.as_markup()
+
+
+class BroadcastRunner:
+    """Barcha userlarga xabar yuborish.
+
+    Qabul qiluvchilar users jadvalidan user_id bo'yicha keyset bilan o'qiladi,
+    har bir partiyadan keyin holat broadcasts jadvaliga yoziladi - qayta ishga
+    tushganda yuborish shu joydan davom etadi. Xabarlar BULK ustuvorlikda ketadi,
+    shuning uchun ovoz berish javoblari doim oldinda turadi.
+
+    Yuborishlarni faqat lider replika bajaradi (singleton vazifa `run`): u
+    'running' holatidagi yuborishlarni davom ettiradi, boshqa replikada
+    boshlangan yoki to'xtatilganlarini BROADCAST_POLL_INTERVAL ichida ko'radi.
+    """
+
+    def __init__(self, bot: Bot, db: Database):
+        self.bot = bot
+        self.db = db
+        self.tasks: Dict[int, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+
+    def _start(self, broadcast_id: int):
+        if broadcast_id in self.tasks:
+            return
+        task = asyncio.create_task(self._run(broadcast_id))
+        self.tasks[broadcast_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(broadcast_id, None))
+
+    def submit(self, broadcast_id: int):
+        """Yangi yuborishni navbatga qo'yish (lider replika darhol boshlaydi)"""
+        if self.db.coordinator.is_leader('broadcasts'):
+            self._start(broadcast_id)
+        self._wakeup.set()
+
+    async def run(self):
+        """Singleton vazifa: 'running' yuborishlarni bajarish va kuzatish"""
+        try:
+            while True:
+                running = {broadcast['id']: broadcast for broadcast in await self.db.get_running_broadcasts()}
+                for broadcast_id, broadcast in running.items():
+                    if broadcast_id not in self.tasks:
+                        logger.info(f"Broadcast {broadcast_id} davom ettirilmoqda "
+                                    f"(user_id > {broadcast['last_user_id']})")
+                        self._start(broadcast_id)
+                # Boshqa replikada to'xtatilganlar
+                for broadcast_id, task in list(self.tasks.items()):
+                    if broadcast_id not in running:
+                        task.cancel()
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), config.BROADCAST_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Liderlik yo'qoldi - yuborishni yangi lider checkpoint dan davom ettiradi
+            await self.close()
+
+    async def cancel(self, broadcast_id: int) -> bool:
+        cancelled = await self.db.finish_broadcast(broadcast_id, 'cancelled')
+        task = self.tasks.get(broadcast_id)
+        if task:
+            task.cancel()
+        return cancelled
+
+    async def close(self):
+        # To'xtatilgan yuborishlar 'running' holatida qoladi va keyin davom etadi
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, broadcast_id: int):
+        broadcast = await self.db.get_broadcast(broadcast_id)
+        if not broadcast or broadcast['status'] != 'running':
+            return
+
+        counters = {key: broadcast[key] for key in ('sent', 'failed', 'blocked')}
+        last_user_id = broadcast['last_user_id']
+        total = await self.db.count_broadcast_recipients() + counters['blocked']
+        semaphore = asyncio.Semaphore(config.BROADCAST_CONCURRENCY)
+        last_report = 0.0
+
+        try:
+            with outbound_priority(Priority.BULK):
+                while True:
+                    user_ids = await self.db.get_broadcast_recipients(
+                        last_user_id, config.BROADCAST_BATCH_SIZE
+                    )
+                    if not user_ids:
+                        break
+
+                    results = await asyncio.gather(*(
+                        self._send(semaphore, broadcast, user_id) for user_id in user_ids
+                    ))
+
+                    blocked_ids = [user_id for user_id, result in zip(user_ids, results) if result == 'blocked']
+                    for result in results:
+                        counters[result] += 1
+                    last_user_id = user_ids[-1]
+
+                    await self.db.mark_users_blocked(blocked_ids)
+                    await self.db.save_broadcast_progress(broadcast_id, last_user_id, **counters)
+
+                    if time.monotonic() - last_report >= config.BROADCAST_PROGRESS_INTERVAL:
+                        last_report = time.monotonic()
+                        await self._report(broadcast, counters, total, finished=False)
+
+            await self.db.finish_broadcast(broadcast_id, 'done')
+            await self._report(broadcast, counters, total, finished=True)
+            logger.info(f"Broadcast {broadcast_id} tugadi: {counters}")
+
+        except asyncio.CancelledError:
+            logger.info(f"Broadcast {broadcast_id} to'xtatildi (user_id {last_user_id})")
+            raise
+        except Exception as e:
+            logger.error(f"Broadcast {broadcast_id} xato: {e}", exc_info=True)
+
+    async def _send(self, semaphore: asyncio.Semaphore, broadcast: Dict, user_id: int) -> str:
+        async with semaphore:
+            try:
+                await self.bot.copy_message(
+                    chat_id=user_id,
+                    from_chat_id=broadcast['from_chat_id'],
+                    message_id=broadcast['message_id']
+                )
+                return 'sent'
+            except TelegramForbiddenError:
+                # Botni bloklagan yoki o'chirilgan akkaunt
+                return 'blocked'
+            except TelegramBadRequest as e:
+                if 'chat not found' in str(e).lower():
+                    return 'blocked'
+                return 'failed'
+            except Exception as e:
+                logger.warning(f"Broadcast: user {user_id} ga yuborilmadi: {e}")
+                return 'failed'
+
+    async def _report(self, broadcast: Dict, counters: Dict, total: int, finished: bool):
+        if not broadcast['progress_message_id']:
+            return
+
+        done = sum(counters.values())
+        percent = round(done * 100 / total) if total else 100
+        title = "✅ <b>Xabar yuborish tugadi</b>" if finished else "📣 <b>Xabar yuborilmoqda...</b>"
+        text = (f"{title}\n\n"
+                f"📊 {done} / {total} ({percent}%)\n"
+                f"✅ Yuborildi: {counters['sent']}\n"
+                f"🚫 Bloklagan: {counters['blocked']}\n"
+                f"❌ Xato: {counters['failed']}")
+
+        try:
+            with outbound_priority(Priority.LOW):
+                await self.bot.edit_message_text(
+                    text,
+                    chat_id=broadcast['progress_chat_id'],
+                    message_id=broadcast['progress_message_id'],
+                    reply_markup=None if finished else broadcast_stop_keyboard(broadcast['id'])
+                )
+        except Exception as e:
+            logger.warning(f"Broadcast progress yangilanmadi: {e}")
@@ -0,0 +1,174 @@
+import inspect
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, Tuple, Union
+
+from aiogram import Router
+from aiogram.types import CallbackQuery
+
+SEP = ':'
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+# prefiks -> Action
+_ACTIONS: Dict[str, 'Action'] = {}
+
+
+def _encode_int(value: int) -> str:
+    if value < 0:
+        return '-' + _encode_int(-value)
+    encoded = ''
+    while True:
+        value, digit = divmod(value, 36)
+        encoded = _DIGITS[digit] + encoded
+        if not value:
+            return encoded
+
+
+class Action:
+    """Callback turi: qisqa prefiks va butun sonli maydonlar.
+
+    `pack` ma'lumotni "prefiks:maydon1:maydon2" ko'rinishida (sonlar 36 lik
+    sanoq tizimida) qaytaradi - 64 baytlik Telegram chegarasiga bemalol sig'adi.
+    """
+
+    __slots__ = ('prefix', 'fields')
+
+    def __init__(self, prefix: str, *fields: str):
+        if prefix in _ACTIONS:
+            raise ValueError(f"Callback prefiksi takrorlangan: {prefix}")
+        self.prefix = prefix
+        self.fields = fields
+        _ACTIONS[prefix] = self
+
+    def pack(self, *values: int) -> str:
+        if len(values) != len(self.fields):
+            raise ValueError(f"{self.prefix}: {len(self.fields)} ta maydon kutilgan, {len(values)} ta berildi")
+        return SEP.join((self.prefix, *(_encode_int(int(value)) for value in values)))
+
+
+# ---------- Foydalanuvchi ----------
+VOTE = Action('v', 'candidate_id')
+VOTE_DEEP = Action('vd', 'contest_id', 'candidate_id')
+PICK_CONTEST = Action('pk', 'contest_id')
+CANDIDATE_PAGE = Action('cp', 'contest_id', 'page', 'deep')
+CANDIDATE_SEARCH = Action('cs', 'contest_id', 'deep')
+CONFIRM_VOTE = Action('cvc', 'contest_id', 'candidate_id')
+CONFIRM_VOTE_LEGACY = Action('cv', 'candidate_id')  # Konkurs FSM dan olinadi
+CANCEL_VOTE = Action('xv')
+CHECK_SUB = Action('s')
+CHECK_SUB_VOTE = Action('sv')
+CHECK_SUB_DEEP = Action('sd', 'contest_id', 'candidate_id')
+VIEW_CANDIDATE = Action('r', 'candidate_id')
+REFRESH_RESULTS = Action('rr')
+IGNORE = Action('i')
+BACK_TO_MENU = Action('m')
+
+# ---------- Admin ----------
+CANCEL_CONTEST_CREATION = Action('cc')
+CONFIRM_POST = Action('pc')
+CANCEL_POST = Action('px')
+STOP_CONTEST = Action('st', 'contest_id')
+STOP_CONTEST_YES = Action('sty', 'contest_id')
+STOP_CONTEST_NO = Action('stn', 'contest_id')
+RESET_VOTES_YES = Action('rvy')
+RESET_VOTES_NO = Action('rvn')
+BROADCAST_YES = Action('by')
+BROADCAST_NO = Action('bn')
+BROADCAST_STOP = Action('bs', 'broadcast_id')
+EXPORT_PAGE = Action('ep', 'forward', 'cursor')
+EXPORT_SELECT = Action('es', 'contest_id')
+EXPORT_EXCEL = Action('ee', 'contest_id')
+EXPORT_CSV = Action('ec', 'contest_id')
+EXPORT_CHART = Action('eg', 'contest_id')
+EXPORT_PARQUET = Action('eq', 'contest_id')
+ARCHIVE_PAGE = Action('ap', 'forward', 'cursor')
+ARCHIVE = Action('a', 'contest_id')
+
+# Deploy dan oldin yuborilgan xabarlardagi eski formatdagi tugmalar
+_LEGACY = (
+    ('vote_deep_', VOTE_DEEP),
+    ('check_sub_deep_', CHECK_SUB_DEEP),
+    ('confirm_vote_', CONFIRM_VOTE_LEGACY),
+    ('vote_', VOTE),
+)
+_LEGACY_EXACT = {
+    'cancel_vote': CANCEL_VOTE,
+    'check_subscription_vote': CHECK_SUB_VOTE,
+    'ignore': IGNORE,
+}
+
+
+@lru_cache(maxsize=4096)
+def unpack(data: Optional[str]) -> Optional[Tuple[Action, Tuple[int, ...]]]:
+    """Callback ma'lumotini (Action, maydonlar) ga ajratish. Noma'lum format - None"""
+    if not data:
+        return None
+
+    prefix, _, rest = data.partition(SEP)
+    action = _ACTIONS.get(prefix)
+    try:
+        if action is not None:
+            values = tuple(int(part, 36) for part in rest.split(SEP)) if rest else ()
+        else:
+            action, values = _unpack_legacy(data)
+    except (TypeError, ValueError):
+        return None
+
+    if action is None or len(values) != len(action.fields):
+        return None
+    return action, values
+
+
+def _unpack_legacy(data: str) -> Tuple[Optional[Action], Tuple[int, ...]]:
+    action = _LEGACY_EXACT.get(data)
+    if action is not None:
+        return action, ()
+    for legacy_prefix, action in _LEGACY:
+        if data.startswith(legacy_prefix):
+            return action, tuple(int(part) for part in data[len(legacy_prefix):].split('_'))
+    return None, ()
+
+
+def _accepted_kwargs(handler: Callable) -> Optional[FrozenSet[str]]:
+    """Handler qabul qiladigan nomli argumentlar (None - **kwargs, hammasi)"""
+    params = inspect.signature(handler).parameters
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()):
+        return None
+    return frozenset(params)
+
+
+class CallbackTable:
+    """Routerning barcha callback handlerlari uchun prefiks bo'yicha indeks.
+
+    Routerda bitta umumiy handler ro'yxatdan o'tadi: callback ma'lumoti bir marta
+    ajratiladi, handler lug'atdan O(1) da topiladi va maydonlar nomli argument
+    sifatida uzatiladi (masalan, `contest_id`, `candidate_id`). Prefiksi jadvalda
+    bo'lmagan callback keyingi routerga o'tadi.
+    """
+
+    def __init__(self, router: Router):
+        self.handlers: Dict[str, Tuple[Callable[..., Awaitable[Any]], Optional[FrozenSet[str]]]] = {}
+        router.callback_query(self._match)(self._dispatch)
+
+    def register(self, action: Action):
+        def decorator(handler):
+            if action.prefix in self.handlers:
+                raise ValueError(f"Callback handler takrorlangan: {action.prefix}")
+            self.handlers[action.prefix] = (handler, _accepted_kwargs(handler))
+            return handler
+        return decorator
+
+    def _match(self, callback: CallbackQuery) -> Union[bool, Dict[str, Any]]:
+        unpacked = unpack(callback.data)
+        if unpacked is None:
+            return False
+        action, values = unpacked
+        entry = self.handlers.get(action.prefix)
+        if entry is None:
+            return False
+        return {'callback_handler': entry, **dict(zip(action.fields, values))}
+
+    async def _dispatch(self, callback: CallbackQuery, callback_handler, **kwargs):
+        handler, accepted = callback_handler
+        if accepted is not None:
+            kwargs = {k: v for k, v in kwargs.items() if k in accepted}
+        return await handler(callback, **kwargs)
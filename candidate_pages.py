@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from typing import List, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+import callbacks
+import config
+from leaderboard import Leaderboard
+from utils import format_vote_count
+
+# (contest_id, sahifa, deep, reyting versiyasi) -> (klaviatura, sahifalar soni)
+_pages: "OrderedDict[tuple, Tuple[InlineKeyboardMarkup, int]]" = OrderedDict()
+
+
+def _vote_button(kb: InlineKeyboardBuilder, board: Leaderboard, contest_id: int,
+                 candidate_id: int, deep: bool):
+    text = f"{board.info[candidate_id]['name']} - {format_vote_count(board.votes[candidate_id])}"
+    if deep:
+        kb.button(text=text, callback_data=callbacks.VOTE_DEEP.pack(contest_id, candidate_id))
+    else:
+        kb.button(text=text, callback_data=callbacks.VOTE.pack(candidate_id))
+
+
+def candidate_page_keyboard(board: Leaderboard, contest_id: int, page: int,
+                            deep: bool) -> Tuple[InlineKeyboardMarkup, int]:
+    """Nomzodlar sahifasi (admin tartibida: position, nom) va sahifalar soni.
+
+    deep=True - deep link oqimi (VOTE_DEEP), aks holda bot ichidagi tanlash (VOTE).
+    Klaviatura reyting versiyasi o'zgarmaguncha keshdan qaytariladi.
+    """
+    size = config.CANDIDATES_PAGE_SIZE
+    pages = max((len(board) + size - 1) // size, 1)
+    page = min(max(page, 0), pages - 1)
+
+    key = (contest_id, page, deep, board.version)
+    cached = _pages.get(key)
+    if cached is not None:
+        _pages.move_to_end(key)
+        return cached
+
+    kb = InlineKeyboardBuilder()
+    for candidate_id in board.listing[page * size:(page + 1) * size]:
+        _vote_button(kb, board, contest_id, candidate_id, deep)
+    sizes = [1] * min(size, max(len(board) - page * size, 0))
+
+    nav = 0
+    if page > 0:
+        kb.button(text="⬅️", callback_data=callbacks.CANDIDATE_PAGE.pack(contest_id, page - 1, deep))
+        nav += 1
+    if pages > 1:
+        kb.button(text=f"{page + 1}/{pages}", callback_data=callbacks.IGNORE.pack())
+        nav += 1
+    if page < pages - 1:
+        kb.button(text="➡️", callback_data=callbacks.CANDIDATE_PAGE.pack(contest_id, page + 1, deep))
+        nav += 1
+    if nav:
+        sizes.append(nav)
+    if pages > 1:
+        kb.button(text="🔍 Ism bo'yicha qidirish", callback_data=callbacks.CANDIDATE_SEARCH.pack(contest_id, deep))
+        sizes.append(1)
+    kb.adjust(*sizes)
+
+    result = (kb.as_markup(), pages)
+    _pages[key] = result
+    while len(_pages) > config.CANDIDATE_PAGES_CACHE_SIZE:
+        _pages.popitem(last=False)
+    return result
+
+
+def search_results_keyboard(board: Leaderboard, contest_id: int, query: str,
+                            deep: bool) -> Tuple[InlineKeyboardMarkup, int]:
+    """Ismida `query` bo'lgan nomzodlar (birinchi sahifa hajmicha) va topilganlar soni"""
+    query = query.casefold()
+    found: List[int] = [
+        candidate_id for candidate_id in board.listing
+        if query in board.info[candidate_id]['name'].casefold()
+    ]
+
+    kb = InlineKeyboardBuilder()
+    for candidate_id in found[:config.CANDIDATES_PAGE_SIZE]:
+        _vote_button(kb, board, contest_id, candidate_id, deep)
+    kb.button(text="⬅️ Barcha nomzodlar", callback_data=callbacks.CANDIDATE_PAGE.pack(contest_id, 0, deep))
+    kb.adjust(1)
+    return kb.as_markup(), len(found)
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup
+
+import config
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+
+async def publish_contest(bot: Bot, db: Database, contest_id: int, text: str,
+                          reply_markup: InlineKeyboardMarkup, image_file_id: Optional[str] = None) -> int:
+    """Konkurs postini barcha kanallarga parallel yuborish.
+
+    Bitta kanaldagi xato qolganlariga ta'sir qilmaydi. Har bir chat uchun tezlik
+    OutboundScheduler da cheklanadi. Muvaffaqiyatli postlar soni qaytariladi.
+    """
+
+    async def send(chat_id: str):
+        if image_file_id:
+            message = await bot.send_photo(
+                chat_id=chat_id, photo=image_file_id, caption=text, reply_markup=reply_markup
+            )
+        else:
+            message = await bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
+        await db.add_contest_post(contest_id, chat_id, message.message_id)
+
+    results = await asyncio.gather(
+        *(send(chat_id) for chat_id in config.POST_CHANNEL_IDS),
+        return_exceptions=True
+    )
+
+    posted = 0
+    for chat_id, result in zip(config.POST_CHANNEL_IDS, results):
+        if isinstance(result, Exception):
+            logger.error(f"Konkurs {contest_id} ni {chat_id} kanaliga yuborishda xato: {result}")
+        else:
+            posted += 1
+
+    logger.info(f"✅ Konkurs {contest_id} {posted}/{len(config.POST_CHANNEL_IDS)} kanalga yuborildi")
+    return posted
+
+
+async def edit_contest_posts(bot: Bot, db: Database, contest_id: int,
+                             reply_markup: InlineKeyboardMarkup) -> int:
+    """Konkursning barcha kanal postlari tugmalarini parallel yangilash"""
+    posts = await db.get_contest_posts(contest_id)
+    if not posts:
+        logger.warning(f"Konkurs {contest_id} uchun kanal post topilmadi")
+        return 0
+
+    async def edit(post: dict):
+        try:
+            await bot.edit_message_reply_markup(
+                chat_id=post['chat_id'],
+                message_id=post['message_id'],
+                reply_markup=reply_markup
+            )
+        except TelegramBadRequest as e:
+            # Sonlar o'zgarmagan bo'lsa Telegram xato qaytaradi - bu normal holat
+            if 'message is not modified' not in str(e):
+                raise
+
+    results = await asyncio.gather(*(edit(post) for post in posts), return_exceptions=True)
+
+    updated = 0
+    for post, result in zip(posts, results):
+        if isinstance(result, Exception):
+            logger.error(f"Kanal postini yangilashda xato (Contest {contest_id}, "
+                         f"Chat {post['chat_id']}, Msg {post['message_id']}): {result}")
+        else:
+            updated += 1
+    return updated
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Sarlavha: belgi, format versiyasi, qatorlar soni
+_HEADER = struct.Struct('<4sBI')
+_MAGIC = b'VSEG'
+_VERSION = 1
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+_NULL = -(1 << 63)
+
+
+def _pack(values: List[int]) -> bytes:
+    column = array('q', values)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+
+def _unpack(data: bytes, offset: int, count: int) -> List[int]:
+    column = array('q')
+    column.frombytes(data[offset:offset + count * 8])
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tolist()
+
+
+def _deltas(values: List[int]) -> List[int]:
+    return [value - previous for previous, value in zip([0] + values, values)]
+
+
+def _undeltas(deltas: List[int]) -> List[int]:
+    values, total = [], 0
+    for delta in deltas:
+        total += delta
+        values.append(total)
+    return values
+
+
+def encode_segment(rows: Sequence, level: int = 9) -> bytes:
+    """Ovozlar bo'lagini siqilgan ustunli formatga o'girish.
+
+    Qatorlar id bo'yicha tartiblangan bo'lishi kerak: id va vaqtlar farq (delta)
+    ko'rinishida saqlanadi, shuning uchun zlib ularni juda kichik siqadi.
+    """
+    ids = [row['id'] for row in rows]
+    voted_at = [
+        (row['voted_at'] - _EPOCH) // _US if row['voted_at'] is not None else _NULL
+        for row in rows
+    ]
+    # Vaqti yo'q qatorlar deltani buzmasligi uchun alohida belgilanadi
+    has_time = [value != _NULL for value in voted_at]
+    times = [value for value in voted_at if value != _NULL]
+
+    payload = b''.join((
+        _pack(_deltas(ids)),
+        _pack([row['candidate_id'] or 0 for row in rows]),
+        _pack([row['user_id'] for row in rows]),
+        bytes(has_time),
+        _pack(_deltas(times)),
+        json.dumps([row['username'] for row in rows], ensure_ascii=False).encode(),
+    ))
+    return _HEADER.pack(_MAGIC, _VERSION, len(rows)) + zlib.compress(payload, level)
+
+
+def decode_segment(data: bytes, contest_id: int) -> List[Dict]:
+    """encode_segment teskarisi: stream_votes qatorlari bilan bir xil kalitlar"""
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"Noma'lum segment formati: {magic!r} v{version}")
+
+    payload = zlib.decompress(data[_HEADER.size:])
+    ids = _undeltas(_unpack(payload, 0, count))
+    candidate_ids = _unpack(payload, count * 8, count)
+    user_ids = _unpack(payload, count * 16, count)
+    offset = count * 24
+    has_time = payload[offset:offset + count]
+    offset += count
+    timed = sum(has_time)
+    times = iter(_undeltas(_unpack(payload, offset, timed)))
+    usernames = json.loads(payload[offset + timed * 8:])
+
+    return [
+        {
+            'id': ids[i],
+            'contest_id': contest_id,
+            'candidate_id': candidate_ids[i] or None,
+            'user_id': user_ids[i],
+            'username': usernames[i],
+            'voted_at': _EPOCH + next(times) * _US if has_time[i] else None,
+        }
+        for i in range(count)
+    ]
+
+
+async def run_cold_archive(db):
+    """Singleton vazifa: eski arxiv ovozlarini siqish va tiklangan jadvallarni tozalash.
+
+    Konkurs arxivlanganidan COLD_ARCHIVE_AFTER_DAYS kun o'tgach uning ajratilgan
+    votes_c{id} jadvali vote_segments ga siqib yoziladi va o'chiriladi.
+    Muzlatilgan natijalar (final_votes, final_total_*) joyida qoladi.
+    """
+    while True:
+        for contest_id in await db.get_cold_archive_due(config.COLD_ARCHIVE_AFTER_DAYS):
+            try:
+                total = await db.archive_cold_votes(contest_id)
+                logger.info(f"🧊 Konkurs {contest_id} ovozlari cold arxivga ko'chirildi: {total} ta")
+            except Exception as e:
+                logger.error(f"Konkurs {contest_id} ovozlarini cold arxivga ko'chirishda xato: {e}", exc_info=True)
+
+        for contest_id in await db.get_expired_restores(config.COLD_RESTORE_TTL_HOURS):
+            await db.drop_restored_votes(contest_id)
+            logger.info(f"Konkurs {contest_id} tiklangan ovozlar jadvali o'chirildi")
+
+        await asyncio.sleep(config.COLD_ARCHIVE_INTERVAL)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Bir xil kalit bilan parallel chaqiruvlarni bitta bajarilishga birlashtirish.
+
+    Birinchi chaqiruv (leader) funksiyani bajaradi, shu vaqtda kelgan qolganlari
+    (followerlar) uning natijasini kutadi va qaytaradi.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args) -> Tuple[Any, bool]:
+        """(natija, shared) qaytaradi. shared=True - natija boshqa chaqiruvdan olindi"""
+        future = self._calls.get(key)
+        if future is not None:
+            # Follower bekor qilinsa ham leader ning ishi to'xtamasligi uchun shield
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await func(*args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Follower bo'lmasa "exception was never retrieved" ogohlantirishi chiqmasin
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._calls.pop(key, None)
+
+
+class TTLSet:
+    """Elementlari ttl sekunddan keyin o'chadigan cheklangan to'plam"""
+
+    def __init__(self, ttl: float, maxsize: int = 100_000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # TTL bir xil bo'lgani uchun qo'shilish tartibi = tugash tartibi
+        self._items: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def add(self, key: Hashable):
+        self._items[key] = time.monotonic() + self.ttl
+        self._items.move_to_end(key)
+        self._purge()
+
+    def discard(self, key: Hashable):
+        self._items.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires = self._items.get(key)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._items[key]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _purge(self):
+        now = time.monotonic()
+        while self._items:
+            key, expires = next(iter(self._items.items()))
+            if expires >= now and len(self._items) <= self.maxsize:
+                break
+            self._items.popitem(last=False)
@@ -23,8 +23,6 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', ''),
 
     # ✅ PERFORMANCE OPTIMIZATION FOR 500K+ USERS
-    'min_size': 20,  # Minimum connections (increased for high load)
-    'max_size': 100,  # Maximum connections (support 500K concurrent users)
     'max_queries': 50000,  # Max queries per connection before recycling
     'max_inactive_connection_lifetime': 300,  # Close idle connections after 5 min
     'command_timeout': 60,  # Query timeout (seconds)
@@ -35,6 +33,59 @@ DB_CONFIG = {
     }
 }
 
+# Yuklama turi bo'yicha alohida poollar (DB_CONFIG ustiga yoziladi).
+# Jami max_size PostgreSQL max_connections dan kam bo'lishi kerak.
+DB_POOLS = {
+    # Ovoz yozish va tekshirish - eng muhim yo'l
+    'votes': {
+        'min_size': int(os.getenv('DB_VOTES_POOL_MIN', 10)),
+        'max_size': int(os.getenv('DB_VOTES_POOL_MAX', 50)),
+        'command_timeout': 10,
+    },
+    # Foydalanuvchi interfeysi uchun o'qishlar
+    'reads': {
+        'min_size': int(os.getenv('DB_READS_POOL_MIN', 5)),
+        'max_size': int(os.getenv('DB_READS_POOL_MAX', 35)),
+        'command_timeout': 15,
+    },
+    # Admin amallari, hisobotlar va eksportlar - sekin, lekin kam
+    'admin': {
+        'min_size': int(os.getenv('DB_ADMIN_POOL_MIN', 1)),
+        'max_size': int(os.getenv('DB_ADMIN_POOL_MAX', 10)),
+        'command_timeout': 300,
+    },
+}
+
+# Faqat o'qish uchun replikalar (vergul bilan ajratilgan DSN lar).
+# Bo'sh bo'lsa barcha so'rovlar primaryga boradi.
+DB_REPLICA_DSNS = [dsn.strip() for dsn in os.getenv('DB_REPLICA_DSNS', '').split(',') if dsn.strip()]
+
+DB_REPLICA_POOL = {
+    'min_size': 2,
+    'max_size': int(os.getenv('DB_REPLICA_POOL_MAX', 30)),
+    'command_timeout': 60,
+}
+
+# Replika kechikishini tekshirish oralig'i (sekund)
+REPLICA_LAG_CHECK_INTERVAL = 2
+
+# Metod bo'yicha ruxsat etilgan maksimal kechikish (sekund).
+# Chegara oshsa so'rov primaryga qaytadi; ro'yxatda yo'q metodlar doim primaryda.
+REPLICA_MAX_LAG = {
+    'get_candidate_counts': 5,
+    'get_voter_ids_chunk': 5,
+    'get_all_active_contests': 5,
+    'get_detailed_report': 10,
+    'get_total_stats': 30,
+    'get_all_contests': 30,
+    'get_archived_contests': 60,
+    'stream_votes': 60,
+}
+
+# Ishga tushishda bajarilmagan migratsiyalarni avtomatik bajarish.
+# False bo'lsa - deploydan oldin `python migrations.py` qo'lda bajariladi.
+AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'true').lower() == 'true'
+
 # ============================================
 # ADMIN SOZLAMALARI
 # ============================================
@@ -51,6 +102,21 @@ if not ADMIN_IDS:
 # LOG SOZLAMALARI
 # ============================================
 LOG_FILE = os.getenv('LOG_FILE', 'bot.log')
+LOG_MAX_BYTES = 50 * 1024 * 1024  # Fayl shu hajmga yetganda aylantiriladi
+LOG_BACKUP_COUNT = 5
+LOG_QUEUE_SIZE = 10000  # To'lsa yangi yozuvlar tashlanadi (handler kutmaydi)
+
+# Ko'p takrorlanadigan INFO yozuvlardan qoldiriladigan ulush (`event` extra bo'yicha).
+# Ro'yxatda yo'q yozuvlar (admin amallari, konkurs holati) doim yoziladi.
+LOG_SAMPLE_RATES = {
+    'VOTE_ADDED': 0.1,
+    'VOTE_DUPLICATE': 0.1,
+    'VIEW_RESULTS': 0.1,
+    'VIEW_CANDIDATES': 0.1,
+    'DEEP_LINK': 0.1,
+    'CHANNEL_POST_EDIT': 0.1,
+    'DB_CALLS': 0.1,
+}
 
 # ============================================
 # KANAL SOZLAMALARI
@@ -60,10 +126,78 @@ CHANNEL_ID = os.getenv("CHANNEL_ID")
 if not CHANNEL_ID:
     raise ValueError("❌ CHANNEL_ID .env faylida topilmadi!")
 
+# Konkurs posti yuboriladigan kanallar: asosiy kanal + hamkor kanallar (vergul bilan)
+POST_CHANNEL_IDS = list(dict.fromkeys(
+    [CHANNEL_ID] + [cid.strip() for cid in os.getenv('POST_CHANNEL_IDS', '').split(',') if cid.strip()]
+))
+
 # Kanal linki (ixtiyoriy)
 CHANNEL_LINK = os.getenv("CHANNEL_LINK", "https://t.me/uznmc")
 
+# ============================================
+# TELEGRAM API CHEKLOVLARI
+# ============================================
+OUTBOUND_GLOBAL_RATE = 30  # Bot bo'yicha sekundiga xabarlar
+OUTBOUND_PRIVATE_CHAT_RATE = 1  # Shaxsiy chatga sekundiga xabar
+OUTBOUND_PRIVATE_CHAT_BURST = 3
+OUTBOUND_GROUP_CHAT_RATE = 20 / 60  # Guruh/kanalga daqiqasiga 20 ta xabar
+OUTBOUND_GROUP_CHAT_BURST = 5
+OUTBOUND_MAX_RETRIES = 3  # 429 dan keyin qayta urinishlar soni
+
+# Ommaviy xabar yuborish
+BROADCAST_BATCH_SIZE = 500  # Bir partiyadagi qabul qiluvchilar (checkpoint oralig'i)
+BROADCAST_CONCURRENCY = 30  # Bir vaqtda navbatga qo'yiladigan xabarlar
+BROADCAST_PROGRESS_INTERVAL = 5  # Progress xabarini yangilash oralig'i (sekund)
+BROADCAST_POLL_INTERVAL = 10  # Lider replika boshqa replikalardagi yuborishlarni tekshirish oralig'i (sekund)
+
 # ============================================
 # OVOZ BERISH SOZLAMALARI
 # ============================================
-MAX_VOTES_PER_USER = 1  # Har bir foydalanuvchi bitta ovoz beradi
\ No newline at end of file
+MAX_VOTES_PER_USER = 1  # Har bir foydalanuvchi bitta ovoz beradi
+LIFECYCLE_RELOAD_INTERVAL = 60  # Konkurs vaqtlarini DB dan qayta o'qish oralig'i (sekund)
+VOTE_DEDUP_TTL = 10  # Ovozdan keyin shuncha sekund takroriy bosishlar DB ga bormaydi
+VOTER_SET_CHUNK_SIZE = 50000  # Ovoz beruvchilarni xotiraga yuklash bo'lagi
+VOTER_SET_MAX_AGE = 600  # Shundan keyin to'plam DB dan qayta yuklanadi (sekund)
+VOTER_SET_MAX_CONTESTS = 8  # Xotirada saqlanadigan konkurslar soni
+RESULTS_CACHE_TTL = float(os.getenv('RESULTS_CACHE_TTL', 1.0))  # Natijalar ekrani keshi (sekund)
+LEADERBOARD_TOP_N = 10  # Natijalar ekranida ko'rsatiladigan nomzodlar
+ACTIVE_CONTESTS_CACHE_TTL = 10  # "Ovoz berish" menyusidagi faol konkurslar ro'yxati keshi (sekund)
+
+# ============================================
+# FSM SOZLAMALARI
+# ============================================
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'memory').lower()  # memory | postgres
+FSM_TTL = 3600  # Shuncha sekund ishlatilmagan holat o'chiriladi
+FSM_MAX_RECORDS = 200_000  # Xotiradagi yozuvlar chegarasi
+FSM_SWEEP_INTERVAL = 60  # TTL tozalash oralig'i (sekund)
+FSM_FLUSH_INTERVAL = 0.5  # postgres rejimida partiyalab yozish oralig'i (sekund)
+FSM_SHARED_CACHE_TTL = 5  # postgres rejimida xotiradagi nusxa shuncha sekund ishonchli
+
+# ============================================
+# KOORDINATSIYA (bir nechta replika)
+# ============================================
+COORDINATION_INTERVAL = 2  # Lease yangilash va bo'sh vazifalarni olish oralig'i (sekund)
+COORDINATION_TIMEOUT = 3  # Shu vaqtda javob bo'lmasa vazifalar to'xtatiladi (sekund)
+COORDINATION_LEASE_TTL = 10  # Javobsiz replika sessiyasi (va lock lari) shundan keyin bo'shaydi (sekund)
+
+# ============================================
+# EKSPORT SOZLAMALARI
+# ============================================
+PARQUET_CHUNK_SIZE = 100_000  # Cursor dan bir martada o'qiladigan ovozlar (= Parquet row group)
+PARQUET_COMPRESSION = 'zstd'
+
+# ============================================
+# COLD ARXIV
+# ============================================
+COLD_ARCHIVE_AFTER_DAYS = int(os.getenv('COLD_ARCHIVE_AFTER_DAYS', 30))  # Arxivlangandan shuncha kun keyin ovozlar siqiladi
+COLD_ARCHIVE_SEGMENT_ROWS = 100_000  # Bitta siqilgan segmentdagi ovozlar
+COLD_ARCHIVE_INTERVAL = 3600  # Cold arxiv vazifasi oralig'i (sekund)
+COLD_RESTORE_TTL_HOURS = 24  # Audit uchun tiklangan votes_c{id} jadvali shundan keyin o'chiriladi
+
+# ============================================
+# RO'YXAT SOZLAMALARI
+# ============================================
+CONTESTS_PAGE_SIZE = 10  # Arxiv va eksport menyusida bir sahifadagi konkurslar soni
+CANDIDATES_PAGE_SIZE = 20  # Bot ichidagi ovoz berish klaviaturasida bir sahifadagi nomzodlar
+CANDIDATE_PAGES_CACHE_SIZE = 512  # Keshlangan nomzod sahifalari soni
+CHANNEL_POST_TOP_N = 10  # Kanal postida ko'rsatiladigan nomzodlar (qolganlari "Barchasini ko'rish" orqali)
\ No newline at end of file
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+import asyncpg
+
+import config
+from migrations import connect_kwargs
+
+logger = logging.getLogger(__name__)
+
+# Singleton vazifalar lock lari uchun nom maydoni (pg_try_advisory_lock(int, int))
+LOCK_NAMESPACE = 7311
+
+_ACQUIRE_QUERY = '''
+    SELECT name FROM unnest($1::text[]) AS name
+    WHERE pg_try_advisory_lock($2, hashtext(name))
+'''
+
+
+class Coordinator:
+    """Replikalar o'rtasida singleton fon vazifalari (leader election).
+
+    Har bir vazifa nomi uchun session darajasidagi advisory lock olinadi - lock
+    faqat bitta replikada bo'ladi va vazifa shu yerda ishlaydi. Lock lar alohida
+    ulanishda turadi; lider har COORDINATION_INTERVAL sekundda shu ulanishda
+    so'rov bajarib lease ni yangilaydi. So'rov COORDINATION_TIMEOUT ichida
+    javob bermasa vazifalar darhol to'xtatiladi. Replika o'lsa yoki tarmoqdan
+    uzilsa PostgreSQL idle_session_timeout (COORDINATION_LEASE_TTL) dan keyin
+    sessiyani yopadi, lock bo'shaydi va boshqa replika vazifani oladi.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Callable[[], Awaitable]] = {}
+        self.running: Dict[str, asyncio.Task] = {}
+        self._conn: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def singleton(self, name: str, job: Callable[[], Awaitable]):
+        """Vazifani ro'yxatdan o'tkazish: lock olingan replikada `job()` ishga tushadi"""
+        self.jobs[name] = job
+
+    def is_leader(self, name: str) -> bool:
+        return name in self.running
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self._stop_jobs()
+        if self._conn is not None:
+            # Ulanish yopilganda barcha lock lar bo'shaydi
+            await self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, bool]:
+        return {name: name in self.running for name in self.jobs}
+
+    async def _connect(self) -> asyncpg.Connection:
+        kwargs = connect_kwargs()
+        server_settings = dict(kwargs.pop('server_settings', None) or {})
+        # Heartbeat to'xtasa server sessiyani (va lock larni) o'zi yopadi
+        server_settings['idle_session_timeout'] = str(config.COORDINATION_LEASE_TTL * 1000)
+        server_settings['application_name'] = f"{server_settings.get('application_name', 'voting_bot')}:coordinator"
+        return await asyncpg.connect(**kwargs, server_settings=server_settings)
+
+    async def _run(self):
+        while True:
+            try:
+                if self._conn is None or self._conn.is_closed():
+                    self._conn = await self._connect()
+
+                # Lease yangilash va bo'sh lock larni olish - bitta so'rov
+                waiting = [name for name in self.jobs if name not in self.running]
+                rows = await asyncio.wait_for(
+                    self._conn.fetch(_ACQUIRE_QUERY, waiting, LOCK_NAMESPACE),
+                    config.COORDINATION_TIMEOUT
+                )
+                for row in rows:
+                    self._start_job(row['name'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Lock holati noma'lum - ikki replikada ishlamasligi uchun hammasi to'xtatiladi
+                if self.running:
+                    logger.error(f"Koordinatsiya ulanishi uzildi, singleton vazifalar to'xtatildi: {e}")
+                else:
+                    logger.warning(f"Koordinatsiya ulanishida xato: {e}")
+                await self._stop_jobs()
+                if self._conn is not None:
+                    self._conn.terminate()
+                    self._conn = None
+
+            await asyncio.sleep(config.COORDINATION_INTERVAL)
+
+    def _start_job(self, name: str):
+        logger.info(f"👑 Singleton vazifa shu replikada: {name}")
+        self.running[name] = asyncio.create_task(self._supervise(name))
+
+    async def _supervise(self, name: str):
+        """Vazifa xato bilan tugasa lider bo'lib turgan vaqtda qayta ishga tushiriladi"""
+        while True:
+            try:
+                await self.jobs[name]()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Singleton vazifa {name} xato: {e}", exc_info=True)
+                await asyncio.sleep(5)
+
+    async def _stop_jobs(self):
+        tasks = list(self.running.values())
+        self.running.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,278 +1,771 @@
+import asyncio
 import asyncpg
+import json
+import time
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Set
 import config
 import logging
 
+from migrations import (
+    ensure_schema, connect_kwargs, vote_partition,
+    create_vote_partition, freeze_results, reset_vote_counters
+)
+from statements import StatementConnection, StatementRegistry
+from cold_archive import decode_segment, encode_segment
+from concurrency import SingleFlight, TTLSet
+from coordination import Coordinator
+from results import ResultsProvider
+from voters import VoterIndex
+
 logger = logging.getLogger(__name__)
 
+# ============================================
+# SO'ROVLAR REESTRI
+# ============================================
+# Har bir so'rov shu yerda bir marta e'lon qilinadi va har bir yangi
+# pool ulanishida tayyorlanadi (prepare). Metodlar so'rovni nomi bilan chaqiradi.
+QUERIES = {
+    'create_contest': '''
+        INSERT INTO contests (name, description, image_file_id, start_date, end_date, is_active)
+        VALUES ($1, $2, $3, $4, $5, TRUE)
+        RETURNING id
+    ''',
+    'add_channel_to_contest': '''
+        INSERT INTO contest_channels (contest_id, channel_id, channel_name, channel_link)
+        VALUES ($1, $2, $3, $4)
+    ''',
+    'add_candidate': '''
+        INSERT INTO candidates (contest_id, name, description)
+        VALUES ($1, $2, $3)
+        RETURNING id
+    ''',
+    'add_contest_post': '''
+        INSERT INTO contest_posts (contest_id, chat_id, message_id)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (contest_id, chat_id) DO UPDATE SET message_id = EXCLUDED.message_id
+    ''',
+    'get_contest_posts': '''
+        SELECT chat_id, message_id FROM contest_posts
+        WHERE contest_id = $1
+        ORDER BY id
+    ''',
+    'get_active_contest': '''
+        SELECT * FROM contests
+        WHERE is_active = TRUE AND is_archived = FALSE
+        ORDER BY created_at DESC LIMIT 1
+    ''',
+    'get_active_contests': '''
+        SELECT * FROM contests
+        WHERE is_active = TRUE AND is_archived = FALSE
+        ORDER BY created_at DESC
+    ''',
+    'get_all_active_contests': '''
+        -- Har bir user konkursda bitta ovoz beradi: ovoz beruvchilar = ovozlar
+        SELECT c.*,
+               (SELECT COALESCE(SUM(s.total_votes), 0)::bigint FROM contest_stats s WHERE s.contest_id = c.id) as total_voters,
+               (SELECT COALESCE(SUM(s.total_votes), 0)::bigint FROM contest_stats s WHERE s.contest_id = c.id) as total_votes
+        FROM contests c
+        WHERE c.is_active = TRUE AND c.is_archived = FALSE
+        ORDER BY c.created_at DESC
+    ''',
+    'get_all_contests': '''
+        SELECT c.*,
+               COALESCE(c.final_total_voters, (SELECT COALESCE(SUM(s.total_votes), 0)::bigint FROM contest_stats s WHERE s.contest_id = c.id)) as total_voters,
+               COALESCE(c.final_total_votes, (SELECT COALESCE(SUM(s.total_votes), 0)::bigint FROM contest_stats s WHERE s.contest_id = c.id)) as total_votes
+        FROM contests c
+        ORDER BY c.created_at DESC
+    ''',
+    'get_contest_windows': '''
+        SELECT id, name, start_date, end_date, votes_epoch FROM contests
+        WHERE is_active = TRUE AND is_archived = FALSE
+    ''',
+    'get_contest_by_id': '''
+        SELECT * FROM contests WHERE id = $1
+    ''',
+    'get_vote_snapshot': '''
+        -- Ovoz berishga kirish uchun hamma narsa bitta so'rovda
+        SELECT c.*,
+               CASE
+                   WHEN NOT c.is_active OR c.is_archived OR $3 >= c.end_date THEN 'closed'
+                   WHEN $3 < c.start_date THEN 'upcoming'
+                   ELSE 'open'
+               END as state,
+               EXISTS (SELECT 1 FROM votes v WHERE v.contest_id = c.id AND v.user_id = $2) as has_voted,
+               (SELECT COALESCE(json_agg(ch ORDER BY ch.id), '[]')
+                FROM contest_channels ch WHERE ch.contest_id = c.id) as channels,
+               (SELECT COALESCE(json_agg(json_build_object(
+                           'id', k.id, 'name', k.name, 'description', k.description,
+                           'votes', COALESCE(
+                               k.final_votes,
+                               (SELECT SUM(s.votes) FROM candidate_stats s WHERE s.candidate_id = k.id),
+                               0
+                           )
+                       ) ORDER BY k.position, k.name), '[]')
+                FROM candidates k WHERE k.contest_id = c.id) as candidates
+        FROM contests c
+        WHERE c.id = $1
+    ''',
+    'get_contest_channels': '''
+        SELECT * FROM contest_channels
+        WHERE contest_id = $1
+        ORDER BY id
+    ''',
+    'get_candidates': '''
+        SELECT c.*,
+               COALESCE(
+                   c.final_votes,
+                   (SELECT SUM(s.votes) FROM candidate_stats s WHERE s.candidate_id = c.id),
+                   0
+               )::bigint as vote_count
+        FROM candidates c
+        WHERE c.contest_id = $1
+        ORDER BY c.position, c.name
+    ''',
+    'has_voted': '''
+        SELECT 1 FROM votes
+        WHERE contest_id = $1 AND user_id = $2
+        LIMIT 1
+    ''',
+    'get_voted_contests': '''
+        SELECT contest_id FROM votes
+        WHERE contest_id = ANY($1::int[]) AND user_id = $2
+    ''',
+    'get_voter_ids_chunk': '''
+        SELECT user_id FROM votes
+        WHERE contest_id = $1 AND user_id > $2
+        ORDER BY user_id
+        LIMIT $3
+    ''',
+    # Ovoz yozilguncha konkurs yopilmasligi uchun (arxivlash qatorni FOR UPDATE bilan kutadi)
+    'bump_votes_epoch': '''
+        UPDATE contests SET votes_epoch = votes_epoch + 1 WHERE id = $1
+    ''',
+    'lock_open_contest': '''
+        SELECT 1 FROM contests
+        WHERE id = $1 AND is_active = TRUE AND is_archived = FALSE
+        FOR SHARE
+    ''',
+    # Arxivlash: ochiq ovoz tranzaksiyalari tugashini kutib, yangilarini to'xtatadi
+    'lock_contest_row': '''
+        SELECT id FROM contests WHERE id = $1 FOR UPDATE
+    ''',
+    'lock_user_vote': '''
+        SELECT 1 FROM votes
+        WHERE contest_id = $1 AND user_id = $2
+        FOR UPDATE  -- Database LOCK
+    ''',
+    'insert_vote': '''
+        INSERT INTO votes (contest_id, candidate_id, user_id, username, voted_at)
+        VALUES ($1, $2, $3, $4, NOW())
+    ''',
+    'get_candidate_counts': '''
+        SELECT c.id, c.name, c.description,
+               COALESCE(
+                   c.final_votes,
+                   (SELECT SUM(s.votes) FROM candidate_stats s WHERE s.candidate_id = c.id),
+                   0
+               )::bigint as votes
+        FROM candidates c
+        WHERE c.contest_id = $1
+        ORDER BY c.position, c.name
+    ''',
+    'get_contest_vote_stats': '''
+        SELECT
+            COALESCE(SUM(total_votes), 0)::bigint as total_voters,
+            COALESCE(SUM(total_votes), 0)::bigint as total_votes
+        FROM contest_stats WHERE contest_id = $1
+    ''',
+    'archive_contest': '''
+        UPDATE contests
+        SET is_active = FALSE,
+            is_archived = TRUE,
+            archived_at = NOW(),
+            end_date = CASE WHEN $2 THEN NOW() ELSE end_date END
+        WHERE id = $1
+        RETURNING id
+    ''',
+    # Muddati o'tgan konkursni yopish. Shart bajarilgan replika yagona g'olib bo'ladi
+    'close_due_contest': '''
+        UPDATE contests
+        SET is_active = FALSE, is_archived = TRUE, archived_at = NOW()
+        WHERE id = $1 AND is_active = TRUE AND is_archived = FALSE AND end_date <= $2
+        RETURNING id
+    ''',
+    # NULL - votes ga biriktirilmagan, TRUE - DETACH CONCURRENTLY yarim qolgan
+    'partition_detach_pending': '''
+        SELECT inhdetachpending FROM pg_inherits
+        WHERE inhrelid = to_regclass($1::text) AND inhparent = 'votes'::regclass
+    ''',
+    'is_partition_attached': '''
+        SELECT EXISTS (
+            SELECT 1 FROM pg_inherits
+            WHERE inhrelid = to_regclass($1::text) AND inhparent = 'votes'::regclass
+        )
+    ''',
+    'table_exists': '''
+        SELECT to_regclass($1::text) IS NOT NULL
+    ''',
+    'get_cold_archive_due': '''
+        SELECT id FROM contests
+        WHERE is_archived = TRUE AND votes_cold_at IS NULL
+          AND archived_at <= NOW() - make_interval(days => $1)
+        ORDER BY id
+    ''',
+    'get_expired_restores': '''
+        SELECT id FROM contests
+        WHERE votes_restored_at <= NOW() - make_interval(hours => $1)
+    ''',
+    'add_vote_segment': '''
+        INSERT INTO vote_segments (contest_id, seq, row_count, first_vote_id, last_vote_id, data)
+        VALUES ($1, $2, $3, $4, $5, $6)
+    ''',
+    'get_vote_segments': '''
+        SELECT data FROM vote_segments WHERE contest_id = $1 ORDER BY seq
+    ''',
+    'mark_votes_cold': '''
+        UPDATE contests SET votes_cold_at = NOW() WHERE id = $1
+    ''',
+    'set_votes_restored': '''
+        UPDATE contests SET votes_restored_at = CASE WHEN $2 THEN NOW() END
+        WHERE id = $1 AND votes_cold_at IS NOT NULL
+        RETURNING id
+    ''',
+    'get_archived_contests': '''
+        SELECT
+            c.*,
+            COALESCE(c.final_total_voters, (SELECT COALESCE(SUM(s.total_votes), 0)::bigint FROM contest_stats s WHERE s.contest_id = c.id)) as total_voters,
+            COALESCE(c.final_total_votes, (SELECT COALESCE(SUM(s.total_votes), 0)::bigint FROM contest_stats s WHERE s.contest_id = c.id)) as total_votes
+        FROM contests c
+        WHERE c.is_archived = TRUE
+        ORDER BY c.end_date DESC
+    ''',
+
+    # Keyset pagination so'rovlari: kursor - sahifa chegarasidagi konkurs ID si.
+    # Ovozlar agregatsiya qilinmaydi, har bir sahifa index bo'yicha LIMIT bilan o'qiladi.
+    'contests_page_first': '''
+        SELECT id, name, is_active, is_archived, start_date, end_date
+        FROM contests
+        ORDER BY id DESC
+        LIMIT $1
+    ''',
+    'contests_page_next': '''
+        SELECT id, name, is_active, is_archived, start_date, end_date
+        FROM contests
+        WHERE id < $1
+        ORDER BY id DESC
+        LIMIT $2
+    ''',
+    'contests_page_prev': '''
+        SELECT id, name, is_active, is_archived, start_date, end_date
+        FROM contests
+        WHERE id > $1
+        ORDER BY id ASC
+        LIMIT $2
+    ''',
+    'archived_page_first': '''
+        SELECT id, name, is_active, is_archived, start_date, end_date
+        FROM contests
+        WHERE is_archived = TRUE
+        ORDER BY end_date DESC, id DESC
+        LIMIT $1
+    ''',
+    'archived_page_next': '''
+        SELECT id, name, is_active, is_archived, start_date, end_date
+        FROM contests
+        WHERE is_archived = TRUE
+          AND (end_date, id) < (SELECT end_date, id FROM contests WHERE id = $1)
+        ORDER BY end_date DESC, id DESC
+        LIMIT $2
+    ''',
+    'archived_page_prev': '''
+        SELECT id, name, is_active, is_archived, start_date, end_date
+        FROM contests
+        WHERE is_archived = TRUE
+          AND (end_date, id) > (SELECT end_date, id FROM contests WHERE id = $1)
+        ORDER BY end_date ASC, id ASC
+        LIMIT $2
+    ''',
+
+    'update_user_activity': '''
+        INSERT INTO users (user_id, username, first_name, last_name, last_action)
+        VALUES ($1, $2, $3, $4, NOW())
+        ON CONFLICT (user_id)
+        DO UPDATE SET
+            username = EXCLUDED.username,
+            first_name = EXCLUDED.first_name,
+            last_name = EXCLUDED.last_name,
+            last_action = NOW(),
+            is_blocked = FALSE
+    ''',
+
+    # Ommaviy xabarlar
+    'create_broadcast': '''
+        INSERT INTO broadcasts (admin_id, from_chat_id, message_id, progress_chat_id, progress_message_id)
+        VALUES ($1, $2, $3, $4, $5)
+        RETURNING id
+    ''',
+    'get_broadcast': '''
+        SELECT * FROM broadcasts WHERE id = $1
+    ''',
+    'get_running_broadcasts': '''
+        SELECT * FROM broadcasts WHERE status = 'running' ORDER BY id
+    ''',
+    'get_broadcast_recipients': '''
+        SELECT user_id FROM users
+        WHERE user_id > $1 AND is_blocked = FALSE
+        ORDER BY user_id
+        LIMIT $2
+    ''',
+    'count_broadcast_recipients': '''
+        SELECT COUNT(*) FROM users WHERE is_blocked = FALSE
+    ''',
+    'save_broadcast_progress': '''
+        UPDATE broadcasts
+        SET last_user_id = $2, sent = $3, failed = $4, blocked = $5
+        WHERE id = $1
+    ''',
+    'finish_broadcast': '''
+        UPDATE broadcasts
+        SET status = $2, finished_at = NOW()
+        WHERE id = $1 AND status = 'running'
+        RETURNING id
+    ''',
+    'mark_users_blocked': '''
+        UPDATE users SET is_blocked = TRUE WHERE user_id = ANY($1::bigint[])
+    ''',
+    'check_rate_limit': '''
+        SELECT 1 FROM users
+        WHERE user_id = $1
+        AND last_action > NOW() - INTERVAL '1 second' * $2
+        LIMIT 1
+    ''',
+    # Replika kechikishi (sekund): WAL to'liq qo'llangan bo'lsa 0
+    'replica_lag': '''
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()), 0)
+        END::float8
+    ''',
+    # FSM holatlari
+    'fsm_load': '''
+        SELECT state, data FROM fsm_states WHERE key = $1
+    ''',
+    'fsm_upsert': '''
+        INSERT INTO fsm_states (key, state, data, updated_at)
+        VALUES ($1, $2, $3::jsonb, NOW())
+        ON CONFLICT (key) DO UPDATE SET
+            state = EXCLUDED.state,
+            data = EXCLUDED.data,
+            updated_at = NOW()
+    ''',
+    'fsm_delete': '''
+        DELETE FROM fsm_states WHERE key = ANY($1::text[])
+    ''',
+    'fsm_purge': '''
+        DELETE FROM fsm_states WHERE updated_at < NOW() - INTERVAL '1 second' * $1
+    ''',
+    'get_total_stats': '''
+        SELECT
+            (SELECT COUNT(*) FROM contests) as total_contests,
+            (SELECT COUNT(*) FROM contests WHERE is_active = TRUE) as active_contests,
+            COALESCE(SUM(total_votes), 0)::bigint as total_votes,
+            COALESCE(SUM(total_voters), 0)::bigint as total_users
+        FROM global_stats
+    ''',
+}
+
+STATEMENTS = StatementRegistry(QUERIES)
+
 
 class Database:
     def __init__(self):
-        self.pool = None
+        self.pools: Dict[str, asyncpg.Pool] = {}
+        self.replicas: List[Dict] = []
+        self.statements = STATEMENTS
+        # Bir user ning parallel ovoz bosishlari bitta tranzaksiyaga birlashadi
+        self.vote_flight = SingleFlight()
+        self.recent_votes = TTLSet(config.VOTE_DEDUP_TTL)
+        # Natijalar ekrani uchun birlashtirilgan va qisqa muddat keshlangan o'qishlar
+        self.results = ResultsProvider(self, config.RESULTS_CACHE_TTL)
+        # Ovoz berganlar xotirada: ijobiy javob DB ga bormaydi
+        self.voters = VoterIndex(self)
+        # Faol konkurslar ro'yxati: har bir "Ovoz berish" bosilishida DB ga bormaslik uchun
+        self._active_contests: Optional[Dict] = None
+        self._active_flight = SingleFlight()
+        self._replica_cursor = 0
+        self._lag_task: Optional[asyncio.Task] = None
+        # Fon vazifalari replikalar orasida bittadan (advisory lock lease)
+        self.coordinator = Coordinator()
 
     async def connect(self):
         try:
-            self.pool = await asyncpg.create_pool(**config.DB_CONFIG)
-            await self.create_tables()
+            # Sxema pool dan oldin tekshiriladi: init hook tayyor jadvallarga prepare qiladi
+            conn = await asyncpg.connect(**connect_kwargs())
+            try:
+                await ensure_schema(conn)
+            finally:
+                await conn.close()
+
+            # Har bir yuklama turi uchun alohida pool: admin hisobotlari
+            # ovoz berish ulanishlarini band qila olmaydi
+            for name, overrides in config.DB_POOLS.items():
+                self.pools[name] = await asyncpg.create_pool(
+                    **{**config.DB_CONFIG, **overrides},
+                    connection_class=StatementConnection,
+                    init=self.statements.init_connection
+                )
+                logger.info(
+                    f"Pool '{name}' ochildi: {overrides['min_size']}-{overrides['max_size']} ulanish, "
+                    f"timeout {overrides['command_timeout']}s"
+                )
+            await self._connect_replicas()
             logger.info("Database ga muvaffaqiyatli ulandi")
         except Exception as e:
             logger.error(f"Database ulanishda xato: {e}")
             raise
 
-    async def create_tables(self):
-        async with self.pool.acquire() as conn:
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS contests (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    image_file_id VARCHAR(255),
-                    start_date TIMESTAMP NOT NULL,
-                    end_date TIMESTAMP NOT NULL,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    is_archived BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
+    async def _connect_replicas(self):
+        """Replikalarga ulanish. Ulanmagan replika o'tkazib yuboriladi"""
+        # DSN dagi host/baza qiymatlari DB_CONFIG bilan almashtirilmasligi uchun
+        base = {
+            key: value for key, value in config.DB_CONFIG.items()
+            if key not in ('host', 'port', 'database', 'user', 'password')
+        }
+        for dsn in config.DB_REPLICA_DSNS:
+            replica = {'dsn': dsn, 'pool': None, 'lag': float('inf')}
             try:
-                await conn.execute('''
-                    ALTER TABLE contests 
-                    ADD COLUMN IF NOT EXISTS channel_chat_id VARCHAR(100)
-                ''')
-                logger.info("✅ channel_chat_id ustuni qo'shildi/mavjud")
+                replica['pool'] = await asyncpg.create_pool(
+                    dsn=dsn,
+                    **{**base, **config.DB_REPLICA_POOL},
+                    connection_class=StatementConnection,
+                    init=self.statements.init_connection
+                )
             except Exception as e:
-                logger.debug(f"channel_chat_id: {e}")
+                logger.error(f"Replikaga ulanishda xato ({self._replica_host(dsn)}): {e}")
+                continue
+            self.replicas.append(replica)
+            logger.info(f"Replika ulandi: {self._replica_host(dsn)}")
 
+        if self.replicas:
+            await self._probe_replica_lag()
+            self._lag_task = asyncio.create_task(self._replica_lag_loop())
+
+    @staticmethod
+    def _replica_host(dsn: str) -> str:
+        # Parol logga tushmasligi uchun faqat host qismi
+        return dsn.rsplit('@', 1)[-1]
+
+    async def _probe_replica_lag(self):
+        for replica in self.replicas:
             try:
-                await conn.execute('''
-                    ALTER TABLE contests 
-                    ADD COLUMN IF NOT EXISTS channel_post_message_id INTEGER
-                ''')
-                logger.info("✅ channel_post_message_id ustuni qo'shildi/mavjud")
+                async with replica['pool'].acquire(timeout=config.REPLICA_LAG_CHECK_INTERVAL) as conn:
+                    replica['lag'] = await self.statements.fetchval(conn, 'replica_lag')
             except Exception as e:
-                logger.debug(f"channel_post_message_id: {e}")
-
-            # Kanal talablari jadvali
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS contest_channels (
-                    id SERIAL PRIMARY KEY,
-                    contest_id INTEGER REFERENCES contests(id) ON DELETE CASCADE,
-                    channel_id VARCHAR(100) NOT NULL,
-                    channel_name VARCHAR(255),
-                    channel_link TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS candidates (
-                    id SERIAL PRIMARY KEY,
-                    contest_id INTEGER REFERENCES contests(id) ON DELETE CASCADE,
-                    name VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    position INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS votes (
-                    id SERIAL PRIMARY KEY,
-                    contest_id INTEGER REFERENCES contests(id) ON DELETE CASCADE,
-                    candidate_id INTEGER REFERENCES candidates(id) ON DELETE CASCADE,
-                    user_id BIGINT NOT NULL,
-                    username VARCHAR(255),
-                    voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(contest_id, user_id)
-                )
-            ''')
-
-            # Foydalanuvchilar jadvali
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id BIGINT PRIMARY KEY,
-                    username VARCHAR(255),
-                    first_name VARCHAR(255),
-                    last_name VARCHAR(255),
-                    last_action TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # Javob bermayotgan replika o'qishlardan chiqariladi
+                if replica['lag'] != float('inf'):
+                    logger.warning(f"Replika lag tekshiruvida xato ({self._replica_host(replica['dsn'])}): {e}")
+                replica['lag'] = float('inf')
 
-            await conn.execute('''
-                -- Votes jadali uchun (eng muhim!)
-                CREATE INDEX IF NOT EXISTS idx_votes_contest ON votes(contest_id);
-                CREATE INDEX IF NOT EXISTS idx_votes_candidate ON votes(candidate_id);
-                CREATE INDEX IF NOT EXISTS idx_votes_user ON votes(user_id);
-                CREATE INDEX IF NOT EXISTS idx_votes_contest_user ON votes(contest_id, user_id);
-                CREATE INDEX IF NOT EXISTS idx_votes_created ON votes(voted_at);
+    async def _replica_lag_loop(self):
+        while True:
+            await asyncio.sleep(config.REPLICA_LAG_CHECK_INTERVAL)
+            await self._probe_replica_lag()
 
-                -- Contests jadali uchun
-                CREATE INDEX IF NOT EXISTS idx_contests_active ON contests(is_active, is_archived);
-                CREATE INDEX IF NOT EXISTS idx_contests_dates ON contests(start_date, end_date);
+    def _acquire(self, pool_name: str):
+        """Nomlangan pooldan ulanish olish"""
+        return self.pools[pool_name].acquire()
 
-                -- Candidates jadali uchun
-                CREATE INDEX IF NOT EXISTS idx_candidates_contest ON candidates(contest_id);
-                CREATE INDEX IF NOT EXISTS idx_candidates_position ON candidates(position);
+    def _acquire_read(self, method: str, fallback: str = 'reads'):
+        """Faqat o'qish uchun ulanish: lag chegarasidagi replika, aks holda primary.
 
-                -- Channels jadali uchun
-                CREATE INDEX IF NOT EXISTS idx_channels_contest ON contest_channels(contest_id);
+        Chegara config.REPLICA_MAX_LAG da metod nomi bo'yicha beriladi.
+        Ro'yxatda yo'q metodlar doim primaryga boradi.
+        """
+        max_lag = config.REPLICA_MAX_LAG.get(method)
+        if max_lag is not None:
+            fresh = [r for r in self.replicas if r['lag'] <= max_lag]
+            if fresh:
+                self._replica_cursor = (self._replica_cursor + 1) % len(fresh)
+                return fresh[self._replica_cursor]['pool'].acquire()
+        return self._acquire(fallback)
 
-                -- Users jadali uchun
-                CREATE INDEX IF NOT EXISTS idx_users_last_action ON users(last_action);
-            ''')
+    def get_pool_stats(self) -> List[Dict]:
+        """Har bir pool bo'yicha band/bo'sh ulanishlar"""
+        stats = [
+            {
+                'name': name,
+                'size': pool.get_size(),
+                'idle': pool.get_idle_size(),
+                'max_size': pool.get_max_size(),
+            }
+            for name, pool in self.pools.items()
+        ]
+        for replica in self.replicas:
+            pool = replica['pool']
+            stats.append({
+                'name': f"replica {self._replica_host(replica['dsn'])}",
+                'size': pool.get_size(),
+                'idle': pool.get_idle_size(),
+                'max_size': pool.get_max_size(),
+                'lag': replica['lag'],
+            })
+        return stats
+
+    def get_statement_stats(self) -> List[Dict]:
+        """So'rovlar bo'yicha bajarilish statistikasi (profiling uchun)"""
+        return self.statements.stats()
+
+    async def _is_partition_attached(self, conn, contest_id: int) -> bool:
+        return await self.statements.fetchval(
+            conn, 'is_partition_attached', vote_partition(contest_id)
+        )
+
+    async def _archive_partition(self, conn, contest_id: int, query: str, *args) -> bool:
+        """Konkursni arxivlash: natijalarni muzlatish va partitsiyani ajratish.
+
+        `query` contests qatorini yangilab id qaytaradi; qator yangilanmasa
+        (masalan, boshqa replika allaqachon yopgan) hech narsa qilinmaydi.
+        """
+        async with conn.transaction():
+            # Muzlatish va ovoz yozish shu qator orqali navbatlanadi: _add_vote qatorni
+            # FOR SHARE bilan oladi, yopilgandan keyin kelgan ovozlar rad etiladi
+            await self.statements.fetchval(conn, 'lock_contest_row', contest_id)
+            updated = await self.statements.fetchval(conn, query, contest_id, *args)
+            if updated is None:
+                return False
+            await freeze_results(conn, contest_id)
+        self._active_contests = None
+        self.results.invalidate(contest_id)
+
+        # Ajratilgan jadval audit va eksport uchun saqlanib qoladi,
+        # lekin live votes indexlari va rejalashtiruvchisiga endi kirmaydi
+        try:
+            await self._finish_detach(conn, contest_id)
+        except Exception as e:
+            logger.error(f"Konkurs {contest_id} partitsiyasini ajratishda xato: {e}")
+            try:
+                await self._finish_detach(conn, contest_id, finalize_only=True)
+            except Exception as e:
+                # Cold arxiv vazifasi keyinroq qayta urinadi
+                logger.error(f"Konkurs {contest_id} partitsiyasini FINALIZE qilishda xato: {e}")
+        return True
+
+    async def _finish_detach(self, conn, contest_id: int, finalize_only: bool = False):
+        """Arxiv partitsiyasini votes dan ajratish (tranzaksiyadan tashqarida).
+
+        DETACH ... CONCURRENTLY uzilsa yoki bekor qilinsa partitsiya "detach pending"
+        holatida qoladi va uni faqat FINALIZE tugatadi. finalize_only=False bo'lsa
+        umuman ajratilmagan partitsiya uchun CONCURRENTLY qayta bajariladi.
+        """
+        partition = vote_partition(contest_id)
+        pending = await self.statements.fetchval(conn, 'partition_detach_pending', partition)
+        if pending:
+            logger.warning(f"{partition} detach pending holatida - FINALIZE")
+            await conn.execute(f'ALTER TABLE votes DETACH PARTITION {partition} FINALIZE')
+        elif pending is not None and not finalize_only:
+            await conn.execute(f'ALTER TABLE votes DETACH PARTITION {partition} CONCURRENTLY')
 
     async def create_contest(self, name: str, description: str,
                              start_date: datetime, end_date: datetime,
                              image_file_id: str = None) -> int:
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow('''
-                INSERT INTO contests (name, description, image_file_id, start_date, end_date, is_active)
-                VALUES ($1, $2, $3, $4, $5, TRUE)
-                RETURNING id
-            ''', name, description, image_file_id, start_date, end_date)
-            logger.info(f"Yangi konkurs yaratildi: {name} (ID: {row['id']})")
-            return row['id']
+        async with self._acquire('admin') as conn:
+            async with conn.transaction():
+                contest_id = await self.statements.fetchval(
+                    conn, 'create_contest', name, description, image_file_id, start_date, end_date
+                )
+                await create_vote_partition(conn, contest_id)
+            self._active_contests = None
+            logger.info(f"Yangi konkurs yaratildi: {name} (ID: {contest_id})")
+            return contest_id
 
     async def add_channel_to_contest(self, contest_id: int, channel_id: str,
                                      channel_name: str, channel_link: str):
-        async with self.pool.acquire() as conn:
-            await conn.execute('''
-                INSERT INTO contest_channels (contest_id, channel_id, channel_name, channel_link)
-                VALUES ($1, $2, $3, $4)
-            ''', contest_id, channel_id, channel_name, channel_link)
+        async with self._acquire('admin') as conn:
+            await self.statements.execute(
+                conn, 'add_channel_to_contest', contest_id, channel_id, channel_name, channel_link
+            )
 
     async def add_candidate(self, contest_id: int, name: str, description: str = None) -> int:
         """Nomzod qo'shish"""
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow('''
-                INSERT INTO candidates (contest_id, name, description)
-                VALUES ($1, $2, $3)
-                RETURNING id
-            ''', contest_id, name, description)
-            return row['id']
-
-    async def save_contest_channel_post(self, contest_id: int, channel_chat_id: str, message_id: int):
-        async with self.pool.acquire() as conn:
-            await conn.execute('''
-                UPDATE contests 
-                SET channel_chat_id = $1, channel_post_message_id = $2
-                WHERE id = $3
-            ''', str(channel_chat_id), message_id, contest_id)
-            logger.info(f"Konkurs {contest_id} kanal post saqlandi: {channel_chat_id}:{message_id}")
-
-    async def get_contest_channel_post(self, contest_id: int) -> Optional[Dict]:
-
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow('''
-                SELECT channel_chat_id, channel_post_message_id
-                FROM contests 
-                WHERE id = $1
-            ''', contest_id)
-            if row and row['channel_chat_id'] and row['channel_post_message_id']:
-                return {
-                    'chat_id': row['channel_chat_id'],
-                    'message_id': row['channel_post_message_id']
-                }
-            return None
+        async with self._acquire('admin') as conn:
+            return await self.statements.fetchval(conn, 'add_candidate', contest_id, name, description)
+
+    async def add_contest_post(self, contest_id: int, chat_id: str, message_id: int):
+        async with self._acquire('admin') as conn:
+            await self.statements.execute(conn, 'add_contest_post', contest_id, str(chat_id), message_id)
+            logger.info(f"Konkurs {contest_id} kanal post saqlandi: {chat_id}:{message_id}")
+
+    async def get_contest_posts(self, contest_id: int) -> List[Dict]:
+        """Konkursning barcha kanal postlari (chat_id, message_id)"""
+        async with self._acquire('reads') as conn:
+            rows = await self.statements.fetch(conn, 'get_contest_posts', contest_id)
+            return [dict(row) for row in rows]
 
     async def get_active_contest(self) -> Optional[Dict]:
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow('''
-                SELECT * FROM contests 
-                WHERE is_active = TRUE AND is_archived = FALSE
-                ORDER BY created_at DESC LIMIT 1
-            ''')
+        async with self._acquire('reads') as conn:
+            row = await self.statements.fetchrow(conn, 'get_active_contest')
             return dict(row) if row else None
 
+    async def get_active_contests(self) -> List[Dict]:
+        """Faol konkurslar (yangilari birinchi), ACTIVE_CONTESTS_CACHE_TTL sekund keshlanadi.
+
+        Shu replikada konkurs yaratilsa yoki yopilsa kesh darhol tozalanadi.
+        Qaytarilgan ro'yxat umumiy - chaqiruvchi uni o'zgartirmasligi kerak.
+        """
+        cached = self._active_contests
+        if cached and time.monotonic() - cached['loaded_at'] < config.ACTIVE_CONTESTS_CACHE_TTL:
+            return cached['contests']
+        contests, _ = await self._active_flight.do('active', self._load_active_contests)
+        return contests
+
+    async def _load_active_contests(self) -> List[Dict]:
+        async with self._acquire('reads') as conn:
+            rows = await self.statements.fetch(conn, 'get_active_contests')
+        contests = [dict(row) for row in rows]
+        self._active_contests = {'contests': contests, 'loaded_at': time.monotonic()}
+        return contests
+
     async def get_all_active_contests(self) -> List[Dict]:
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch('''
-                SELECT c.*, 
-                       COUNT(DISTINCT v.user_id) as total_voters,
-                       COUNT(v.id) as total_votes
-                FROM contests c
-                LEFT JOIN votes v ON c.id = v.contest_id
-                WHERE c.is_active = TRUE AND c.is_archived = FALSE
-                GROUP BY c.id
-                ORDER BY c.created_at DESC
-            ''')
+        async with self._acquire_read('get_all_active_contests') as conn:
+            rows = await self.statements.fetch(conn, 'get_all_active_contests')
             return [dict(row) for row in rows]
 
     async def get_all_contests(self) -> List[Dict]:
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch('''
-                SELECT c.*, 
-                       COUNT(DISTINCT v.user_id) as total_voters,
-                       COUNT(v.id) as total_votes
-                FROM contests c
-                LEFT JOIN votes v ON c.id = v.contest_id
-                GROUP BY c.id
-                ORDER BY c.created_at DESC
-            ''')
+        async with self._acquire_read('get_all_contests', 'admin') as conn:
+            rows = await self.statements.fetch(conn, 'get_all_contests')
+            return [dict(row) for row in rows]
+
+    async def get_contest_windows(self) -> List[Dict]:
+        """Faol konkurslarning boshlanish/tugash vaqtlari (lifecycle scheduler uchun)"""
+        async with self._acquire('reads') as conn:
+            rows = await self.statements.fetch(conn, 'get_contest_windows')
             return [dict(row) for row in rows]
 
     async def get_contest_by_id(self, contest_id: int) -> Optional[Dict]:
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow('''
-                SELECT * FROM contests WHERE id = $1
-            ''', contest_id)
+        async with self._acquire('reads') as conn:
+            row = await self.statements.fetchrow(conn, 'get_contest_by_id', contest_id)
             return dict(row) if row else None
 
+    async def get_vote_snapshot(self, contest_id: int, user_id: int) -> Optional[Dict]:
+        """Ovoz berish oynasi uchun bitta so'rov: konkurs, holat, ovoz berganlik, kanallar, nomzodlar.
+
+        {'contest', 'state' (upcoming/open/closed), 'has_voted', 'channels', 'candidates'}.
+        has_voted tufayli primary da bajariladi; nomzodlar soni reytingga ham qo'llanadi.
+        """
+        async with self._acquire('votes') as conn:
+            row = await self.statements.fetchrow(conn, 'get_vote_snapshot', contest_id, user_id, datetime.now())
+        if row is None:
+            return None
+
+        contest = dict(row)
+        snapshot = {key: contest.pop(key) for key in ('state', 'has_voted', 'channels', 'candidates')}
+        snapshot['contest'] = contest
+        snapshot['channels'] = json.loads(snapshot['channels'])
+        snapshot['candidates'] = json.loads(snapshot['candidates'])
+        if snapshot['has_voted']:
+            self.voters.add(contest_id, user_id)
+        self.results.apply(contest_id, snapshot['candidates'])
+        return snapshot
+
     async def get_contest_channels(self, contest_id: int) -> List[Dict]:
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch('''
-                SELECT * FROM contest_channels 
-                WHERE contest_id = $1
-                ORDER BY id
-            ''', contest_id)
+        async with self._acquire('reads') as conn:
+            rows = await self.statements.fetch(conn, 'get_contest_channels', contest_id)
             return [dict(row) for row in rows]
 
     async def get_candidates(self, contest_id: int) -> List[Dict]:
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch('''
-                SELECT c.*, COALESCE(COUNT(v.id), 0) as vote_count
-                FROM candidates c
-                LEFT JOIN votes v ON c.id = v.candidate_id
-                WHERE c.contest_id = $1
-                GROUP BY c.id
-                ORDER BY c.position, c.name
-            ''', contest_id)
+        async with self._acquire('reads') as conn:
+            rows = await self.statements.fetch(conn, 'get_candidates', contest_id)
             return [dict(row) for row in rows]
 
     async def has_voted(self, contest_id: int, user_id: int) -> bool:
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow('''
-                SELECT 1 FROM votes 
-                WHERE contest_id = $1 AND user_id = $2
-                LIMIT 1
-            ''', contest_id, user_id)
+        if self.voters.contains(contest_id, user_id):
+            return True
+
+        # Ovozdan keyingi tekshiruv: replika hali ko'rmagan bo'lishi mumkin, doim primary
+        async with self._acquire('votes') as conn:
+            row = await self.statements.fetchrow(conn, 'has_voted', contest_id, user_id)
+            if row is not None:
+                self.voters.add(contest_id, user_id)
             return row is not None
 
+    async def get_voted_contests(self, contest_ids: List[int], user_id: int) -> Set[int]:
+        """Berilgan konkurslardan user ovoz berganlari - bitta so'rov bilan.
+
+        Xotiradagi to'plamda topilganlar DB ga so'ralmaydi; qolganlari uchun
+        has_voted kabi primary ga boriladi.
+        """
+        voted = {contest_id for contest_id in contest_ids if self.voters.contains(contest_id, user_id)}
+        unknown = [contest_id for contest_id in contest_ids if contest_id not in voted]
+        if not unknown:
+            return voted
+
+        async with self._acquire('votes') as conn:
+            rows = await self.statements.fetch(conn, 'get_voted_contests', unknown, user_id)
+        for row in rows:
+            self.voters.add(row['contest_id'], user_id)
+            voted.add(row['contest_id'])
+        return voted
+
+    async def get_voter_ids_chunk(self, contest_id: int, after_user_id: int, limit: int) -> List[int]:
+        """Keyset: konkursda ovoz berganlarning keyingi user_id lari (tartiblangan)"""
+        async with self._acquire_read('get_voter_ids_chunk') as conn:
+            rows = await self.statements.fetch(conn, 'get_voter_ids_chunk', contest_id, after_user_id, limit)
+            return [row['user_id'] for row in rows]
+
+    def get_voter_stats(self) -> List[Dict]:
+        return self.voters.stats()
+
     async def add_vote(self, contest_id: int, candidate_id: int,
-                       user_id: int, username: str = None) -> bool:
+                       user_id: int, username: str = None) -> Optional[bool]:
+        """Ovoz qo'shish.
+
+        True - ovoz yozildi, False - allaqachon ovoz bergan,
+        None - takroriy bosish (javobni birinchi so'rov beradi).
+        """
+        key = (contest_id, user_id)
+        if key in self.recent_votes:
+            logger.info(f"User {user_id} takroriy ovoz bosishi (recent, DB ga bormadi)",
+                        extra={'event': 'VOTE_DUPLICATE'})
+            return None
+
+        success, shared = await self.vote_flight.do(
+            key, self._add_vote, contest_id, candidate_id, user_id, username
+        )
+        if shared:
+            logger.info(f"User {user_id} takroriy ovoz bosishi (in-flight)", extra={'event': 'VOTE_DUPLICATE'})
+            return None
+        if success:
+            self.recent_votes.add(key)
+            self.voters.add(contest_id, user_id)
+        return success
+
+    async def _add_vote(self, contest_id: int, candidate_id: int,
+                        user_id: int, username: str = None) -> bool:
 
         try:
-            async with self.pool.acquire() as conn:
+            async with self._acquire('votes') as conn:
                 async with conn.transaction():
-                    existing = await conn.fetchval('''
-                        SELECT 1 FROM votes 
-                        WHERE contest_id = $1 AND user_id = $2
-                        FOR UPDATE  -- Database LOCK
-                    ''', contest_id, user_id)
+                    is_open = await self.statements.fetchval(conn, 'lock_open_contest', contest_id)
+                    if not is_open:
+                        logger.warning(f"User {user_id}: konkurs {contest_id} yopilgan, ovoz yozilmadi")
+                        return False
+
+                    existing = await self.statements.fetchval(
+                        conn, 'lock_user_vote', contest_id, user_id
+                    )
 
                     if existing:
                         logger.warning(f"User {user_id} allaqachon ovoz bergan (transaction check)")
                         return False
 
-                    await conn.execute('''
-                        INSERT INTO votes (contest_id, candidate_id, user_id, username, voted_at)
-                        VALUES ($1, $2, $3, $4, NOW())
-                    ''', contest_id, candidate_id, user_id, username)
+                    await self.statements.execute(
+                        conn, 'insert_vote', contest_id, candidate_id, user_id, username
+                    )
 
-                    logger.info(f"Ovoz qo'shildi: User {user_id} -> Candidate {candidate_id}")
+                    logger.info(f"Ovoz qo'shildi: User {user_id} -> Candidate {candidate_id}",
+                                extra={'event': 'VOTE_ADDED'})
                     return True
 
         except asyncpg.UniqueViolationError:
@@ -282,42 +775,29 @@ class Database:
             logger.error(f"Ovoz qo'shishda xato: {e}")
             return False
 
-    async def get_vote_results(self, contest_id: int) -> List[Dict]:
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch('''
-                SELECT 
-                    c.name as candidate_name,
-                    c.description,
-                    COUNT(v.id) as votes,
-                    ROUND(COUNT(v.id) * 100.0 / NULLIF(
-                        (SELECT COUNT(*) FROM votes WHERE contest_id = $1), 0
-                    ), 2) as percentage
-                FROM candidates c
-                LEFT JOIN votes v ON c.id = v.candidate_id
-                WHERE c.contest_id = $1
-                GROUP BY c.id, c.name, c.description
-                ORDER BY votes DESC, c.name
-            ''', contest_id)
+    async def get_candidate_counts(self, contest_id: int) -> List[Dict]:
+        """Nomzodlar ovozlari, admin tartibida (position, nom); reyting tartibini Leaderboard yuritadi"""
+        async with self._acquire_read('get_candidate_counts') as conn:
+            rows = await self.statements.fetch(conn, 'get_candidate_counts', contest_id)
             return [dict(row) for row in rows]
 
     async def get_detailed_report(self, contest_id: int) -> Dict:
         """Batafsil hisobot - OPTIMIZED"""
-        async with self.pool.acquire() as conn:
-            contest = await conn.fetchrow(
-                'SELECT * FROM contests WHERE id = $1', contest_id
-            )
+        async with self._acquire_read('get_detailed_report', 'admin') as conn:
+            contest = await self.statements.fetchrow(conn, 'get_contest_by_id', contest_id)
 
             if not contest:
                 return None
 
-            stats = await conn.fetchrow('''
-                SELECT 
-                    COUNT(DISTINCT user_id) as total_voters,
-                    COUNT(*) as total_votes
-                FROM votes WHERE contest_id = $1
-            ''', contest_id)
+            if contest['final_total_votes'] is not None:
+                stats = {
+                    'total_voters': contest['final_total_voters'],
+                    'total_votes': contest['final_total_votes']
+                }
+            else:
+                stats = await self.statements.fetchrow(conn, 'get_contest_vote_stats', contest_id)
 
-            candidates = await self.get_vote_results(contest_id)
+            candidates = await self.results.get_results(contest_id)
 
             return {
                 'contest': dict(contest),
@@ -325,84 +805,276 @@ class Database:
                 'candidates': candidates
             }
 
+    async def stream_votes(self, contest_id: int, chunk_size: int) -> AsyncIterator[List]:
+        """Konkurs ovozlarini server-side cursor orqali bo'laklab o'qish.
+
+        To'g'ridan-to'g'ri partitsiyadan o'qiladi - arxivlangan (DETACH qilingan)
+        konkurslar uchun ham ishlaydi. Jadval cold arxivga ko'chirilgan bo'lsa
+        segmentlar bittadan ochiladi (bo'lak = segment). Xotirada bir vaqtda
+        bitta bo'lak turadi.
+        """
+        query = f'''
+            SELECT id, contest_id, candidate_id, user_id, username, voted_at
+            FROM {vote_partition(contest_id)}
+        '''
+        async with self._acquire_read('stream_votes', 'admin') as conn:
+            async with conn.transaction(readonly=True):
+                if await self.statements.fetchval(conn, 'table_exists', vote_partition(contest_id)):
+                    cursor = await conn.cursor(query)
+                    while True:
+                        rows = await cursor.fetch(chunk_size)
+                        if not rows:
+                            break
+                        yield rows
+                    return
+
+                cursor = await conn.cursor(QUERIES['get_vote_segments'], contest_id)
+                while True:
+                    segment = await cursor.fetchrow()
+                    if segment is None:
+                        break
+                    yield await asyncio.to_thread(decode_segment, segment['data'], contest_id)
+
+    async def get_cold_archive_due(self, after_days: int) -> List[int]:
+        async with self._acquire('admin') as conn:
+            rows = await self.statements.fetch(conn, 'get_cold_archive_due', after_days)
+            return [row['id'] for row in rows]
+
+    async def get_expired_restores(self, ttl_hours: int) -> List[int]:
+        async with self._acquire('admin') as conn:
+            rows = await self.statements.fetch(conn, 'get_expired_restores', ttl_hours)
+            return [row['id'] for row in rows]
+
+    async def archive_cold_votes(self, contest_id: int) -> int:
+        """Arxiv konkurs ovozlarini siqilgan segmentlarga ko'chirib votes_c{id} ni o'chirish.
+
+        Hammasi bitta tranzaksiyada: xato bo'lsa jadval joyida qoladi.
+        Ko'chirilgan ovozlar soni qaytariladi.
+        """
+        table = vote_partition(contest_id)
+        async with self._acquire('admin') as conn:
+            # Arxivlashda ajratish uzilib qolgan bo'lsa shu yerda yakunlanadi
+            await self._finish_detach(conn, contest_id)
+            async with conn.transaction():
+                if await self._is_partition_attached(conn, contest_id):
+                    raise RuntimeError(f"{table} hali votes partitsiyasi")
+
+                total = 0
+                if await self.statements.fetchval(conn, 'table_exists', table):
+                    await conn.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+                    cursor = await conn.cursor(f'''
+                        SELECT id, candidate_id, user_id, username, voted_at
+                        FROM {table} ORDER BY id
+                    ''')
+                    seq = 0
+                    while True:
+                        rows = await cursor.fetch(config.COLD_ARCHIVE_SEGMENT_ROWS)
+                        if not rows:
+                            break
+                        data = await asyncio.to_thread(encode_segment, rows)
+                        await self.statements.execute(
+                            conn, 'add_vote_segment',
+                            contest_id, seq, len(rows), rows[0]['id'], rows[-1]['id'], data
+                        )
+                        seq += 1
+                        total += len(rows)
+                    await conn.execute(f'DROP TABLE {table}')
+
+                await self.statements.execute(conn, 'mark_votes_cold', contest_id)
+            return total
+
+    async def restore_cold_votes(self, contest_id: int) -> Optional[int]:
+        """Cold arxivdagi ovozlarni audit uchun votes_c{id} jadvaliga qayta yozish.
+
+        Jadval COLD_RESTORE_TTL_HOURS dan keyin yana o'chiriladi (segmentlar qoladi).
+        None - konkurs ovozlari cold arxivda emas.
+        """
+        table = vote_partition(contest_id)
+        async with self._acquire('admin') as conn:
+            async with conn.transaction():
+                if await self.statements.fetchval(conn, 'set_votes_restored', contest_id, True) is None:
+                    return None
+                if await self.statements.fetchval(conn, 'table_exists', table):
+                    return await conn.fetchval(f'SELECT COUNT(*) FROM {table}')
+
+                await conn.execute(f'CREATE TABLE {table} (LIKE votes INCLUDING ALL)')
+                total = 0
+                for segment in await self.statements.fetch(conn, 'get_vote_segments', contest_id):
+                    rows = await asyncio.to_thread(decode_segment, segment['data'], contest_id)
+                    await conn.copy_records_to_table(
+                        table, columns=list(rows[0]), records=[tuple(row.values()) for row in rows]
+                    )
+                    total += len(rows)
+            return total
+
+    async def drop_restored_votes(self, contest_id: int):
+        async with self._acquire('admin') as conn:
+            async with conn.transaction():
+                await self.statements.execute(conn, 'set_votes_restored', contest_id, False)
+                await conn.execute(f'DROP TABLE IF EXISTS {vote_partition(contest_id)}')
+
     async def archive_contest(self, contest_id: int):
-        async with self.pool.acquire() as conn:
-            await conn.execute('''
-                UPDATE contests 
-                SET is_active = FALSE, is_archived = TRUE
-                WHERE id = $1
-            ''', contest_id)
+        async with self._acquire('admin') as conn:
+            await self._archive_partition(conn, contest_id, 'archive_contest', False)
             logger.info(f"Konkurs {contest_id} arxivga o'tkazildi")
 
     async def stop_contest(self, contest_id: int):
-        async with self.pool.acquire() as conn:
-            await conn.execute('''
-                UPDATE contests 
-                SET is_active = FALSE, 
-                    is_archived = TRUE,
-                    end_date = NOW()
-                WHERE id = $1
-            ''', contest_id)
+        async with self._acquire('admin') as conn:
+            await self._archive_partition(conn, contest_id, 'archive_contest', True)
             logger.info(f"Konkurs {contest_id} to'xtatildi va arxivga o'tkazildi")
 
+    async def close_due_contest(self, contest_id: int, now: datetime) -> bool:
+        """Tugash vaqti kelgan konkursni yopish. True - shu chaqiruv yopdi"""
+        async with self._acquire('admin') as conn:
+            closed = await self._archive_partition(conn, contest_id, 'close_due_contest', now)
+            if closed:
+                logger.info(f"Konkurs {contest_id} muddati tugadi va yopildi")
+            return closed
+
     async def reset_contest_votes(self, contest_id: int):
-        async with self.pool.acquire() as conn:
-            result = await conn.execute(
-                'DELETE FROM votes WHERE contest_id = $1', contest_id
-            )
-            logger.info(f"Konkurs {contest_id} ovozlari tozalandi: {result}")
+        # DELETE o'rniga TRUNCATE: WAL va bloat hosil qilmaydi
+        async with self._acquire('admin') as conn:
+            async with conn.transaction():
+                await conn.execute(f'LOCK TABLE {vote_partition(contest_id)} IN ACCESS EXCLUSIVE MODE')
+                await reset_vote_counters(conn, contest_id)
+                await conn.execute(f'TRUNCATE {vote_partition(contest_id)}')
+                # Boshqa replikalar lifecycle reload da ko'rib, VoterSet ni tashlaydi
+                await self.statements.execute(conn, 'bump_votes_epoch', contest_id)
+            self.results.invalidate(contest_id)
+            self.voters.drop(contest_id)
+            logger.info(f"Konkurs {contest_id} ovozlari tozalandi")
 
     async def get_archived_contests(self) -> List[Dict]:
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch('''
-                SELECT 
-                    c.*,
-                    COUNT(DISTINCT v.user_id) as total_voters,
-                    COUNT(v.id) as total_votes
-                FROM contests c
-                LEFT JOIN votes v ON c.id = v.contest_id
-                WHERE c.is_archived = TRUE
-                GROUP BY c.id
-                ORDER BY c.end_date DESC
-            ''')
+        async with self._acquire_read('get_archived_contests', 'admin') as conn:
+            rows = await self.statements.fetch(conn, 'get_archived_contests')
             return [dict(row) for row in rows]
 
+    async def get_contests_page(self, cursor: int = None, direction: str = 'next',
+                                limit: int = config.CONTESTS_PAGE_SIZE) -> Dict:
+        """Barcha konkurslar - keyset sahifa"""
+        async with self._acquire('admin') as conn:
+            return await self._fetch_contests_page(conn, 'contests_page', cursor, direction, limit)
+
+    async def get_archived_contests_page(self, cursor: int = None, direction: str = 'next',
+                                         limit: int = config.CONTESTS_PAGE_SIZE) -> Dict:
+        """Arxivlangan konkurslar - keyset sahifa"""
+        async with self._acquire('admin') as conn:
+            return await self._fetch_contests_page(conn, 'archived_page', cursor, direction, limit)
+
+    async def _fetch_contests_page(self, conn, query_prefix: str, cursor: Optional[int],
+                                   direction: str, limit: int) -> Dict:
+        # limit + 1 qator o'qiladi: ortiqcha qator keyingi sahifa borligini bildiradi
+        if cursor is None:
+            rows = await self.statements.fetch(conn, f'{query_prefix}_first', limit + 1)
+            has_prev, has_next = False, len(rows) > limit
+            rows = rows[:limit]
+        elif direction == 'prev':
+            rows = await self.statements.fetch(conn, f'{query_prefix}_prev', cursor, limit + 1)
+            has_prev, has_next = len(rows) > limit, True
+            rows = list(reversed(rows[:limit]))
+        else:
+            rows = await self.statements.fetch(conn, f'{query_prefix}_next', cursor, limit + 1)
+            has_prev, has_next = True, len(rows) > limit
+            rows = rows[:limit]
+
+        return {
+            'contests': [dict(row) for row in rows],
+            'has_prev': has_prev,
+            'has_next': has_next
+        }
+
     async def update_user_activity(self, user_id: int, username: str = None,
                                    first_name: str = None, last_name: str = None):
-        async with self.pool.acquire() as conn:
-            await conn.execute('''
-                INSERT INTO users (user_id, username, first_name, last_name, last_action)
-                VALUES ($1, $2, $3, $4, NOW())
-                ON CONFLICT (user_id) 
-                DO UPDATE SET 
-                    username = EXCLUDED.username,
-                    first_name = EXCLUDED.first_name,
-                    last_name = EXCLUDED.last_name,
-                    last_action = NOW()
-            ''', user_id, username, first_name, last_name)
+        async with self._acquire('votes') as conn:
+            await self.statements.execute(
+                conn, 'update_user_activity', user_id, username, first_name, last_name
+            )
+
+    async def create_broadcast(self, admin_id: int, from_chat_id: int, message_id: int,
+                               progress_chat_id: int, progress_message_id: int) -> int:
+        async with self._acquire('admin') as conn:
+            return await self.statements.fetchval(
+                conn, 'create_broadcast', admin_id, from_chat_id, message_id,
+                progress_chat_id, progress_message_id
+            )
+
+    async def get_broadcast(self, broadcast_id: int) -> Optional[Dict]:
+        async with self._acquire('admin') as conn:
+            row = await self.statements.fetchrow(conn, 'get_broadcast', broadcast_id)
+            return dict(row) if row else None
+
+    async def get_running_broadcasts(self) -> List[Dict]:
+        async with self._acquire('admin') as conn:
+            rows = await self.statements.fetch(conn, 'get_running_broadcasts')
+            return [dict(row) for row in rows]
+
+    async def get_broadcast_recipients(self, after_user_id: int, limit: int) -> List[int]:
+        """Keyset: user_id bo'yicha keyingi qabul qiluvchilar"""
+        async with self._acquire('admin') as conn:
+            rows = await self.statements.fetch(conn, 'get_broadcast_recipients', after_user_id, limit)
+            return [row['user_id'] for row in rows]
+
+    async def count_broadcast_recipients(self) -> int:
+        async with self._acquire('admin') as conn:
+            return await self.statements.fetchval(conn, 'count_broadcast_recipients')
+
+    async def save_broadcast_progress(self, broadcast_id: int, last_user_id: int,
+                                      sent: int, failed: int, blocked: int):
+        async with self._acquire('admin') as conn:
+            await self.statements.execute(
+                conn, 'save_broadcast_progress', broadcast_id, last_user_id, sent, failed, blocked
+            )
+
+    async def finish_broadcast(self, broadcast_id: int, status: str = 'done') -> bool:
+        """Faqat ishlayotgan yuborishni yakunlaydi (done/cancelled)"""
+        async with self._acquire('admin') as conn:
+            finished = await self.statements.fetchval(conn, 'finish_broadcast', broadcast_id, status)
+            return finished is not None
+
+    async def mark_users_blocked(self, user_ids: List[int]):
+        if not user_ids:
+            return
+        async with self._acquire('admin') as conn:
+            await self.statements.execute(conn, 'mark_users_blocked', user_ids)
+
+    async def fsm_load(self, key: str) -> Optional[Dict]:
+        async with self._acquire('votes') as conn:
+            row = await self.statements.fetchrow(conn, 'fsm_load', key)
+            return dict(row) if row else None
+
+    async def fsm_save_batch(self, upserts: List[tuple], deletes: List[str]):
+        """FSM o'zgarishlarini bitta tranzaksiyada yozish"""
+        async with self._acquire('votes') as conn:
+            async with conn.transaction():
+                if upserts:
+                    await self.statements.executemany(conn, 'fsm_upsert', upserts)
+                if deletes:
+                    await self.statements.execute(conn, 'fsm_delete', deletes)
+
+    async def fsm_purge(self, ttl_seconds: int):
+        async with self._acquire('admin') as conn:
+            await self.statements.execute(conn, 'fsm_purge', ttl_seconds)
 
     async def check_rate_limit(self, user_id: int, seconds: int = 5) -> bool:
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow('''
-                SELECT 1 FROM users 
-                WHERE user_id = $1 
-                AND last_action > NOW() - INTERVAL '1 second' * $2
-                LIMIT 1
-            ''', user_id, seconds)
+        async with self._acquire('votes') as conn:
+            row = await self.statements.fetchrow(conn, 'check_rate_limit', user_id, seconds)
             return row is None
 
     async def get_total_stats(self) -> Dict:
-        async with self.pool.acquire() as conn:
-            stats = await conn.fetchrow('''
-                SELECT 
-                    (SELECT COUNT(*) FROM contests) as total_contests,
-                    (SELECT COUNT(*) FROM contests WHERE is_active = TRUE) as active_contests,
-                    (SELECT COUNT(*) FROM votes) as total_votes,
-                    (SELECT COUNT(DISTINCT user_id) FROM votes) as total_users
-            ''')
+        async with self._acquire_read('get_total_stats', 'admin') as conn:
+            stats = await self.statements.fetchrow(conn, 'get_total_stats')
             return dict(stats) if stats else {}
 
     async def close(self):
-        if self.pool:
-            await self.pool.close()
-            logger.info("Database ulanishi yopildi")
\ No newline at end of file
+        await self.coordinator.close()
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+        for replica in self.replicas:
+            await replica['pool'].close()
+        self.replicas.clear()
+        for pool in self.pools.values():
+            await pool.close()
+        if self.pools:
+            self.pools.clear()
+            logger.info("Database ulanishi yopildi")
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class _Record:
+    __slots__ = ('state', 'data', 'touched', 'loaded_at')
+
+    def __init__(self, state: Optional[str] = None, data: Optional[Dict[str, Any]] = None):
+        self.state = state
+        self.data = data
+        self.touched = time.monotonic()
+        self.loaded_at = self.touched
+
+    def is_empty(self) -> bool:
+        return self.state is None and not self.data
+
+    def size(self) -> int:
+        size = sys.getsizeof(self)
+        if self.state is not None:
+            size += sys.getsizeof(self.state)
+        if self.data:
+            size += sys.getsizeof(self.data) + sum(
+                sys.getsizeof(k) + sys.getsizeof(v) for k, v in self.data.items()
+            )
+        return size
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__dt__': value.isoformat()}
+    raise TypeError(f"JSON ga o'tkazib bo'lmaydi: {type(value).__name__}")
+
+
+def _decode(obj: Dict):
+    if '__dt__' in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj['__dt__'])
+    return obj
+
+
+def _storage_key(key: StorageKey) -> str:
+    return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{getattr(key, 'thread_id', None) or ''}:{key.destiny}"
+
+
+class BoundedStorage(BaseStorage):
+    """Cheklangan, TTL bilan tozalanadigan FSM storage.
+
+    Har bir user uchun bitta ixcham yozuv saqlanadi; bo'sh yozuvlar (memory rejimida) darhol o'chadi,
+    FSM_TTL dan ko'p ishlatilmaganlari fon jarayonida tozalanadi, FSM_MAX_RECORDS
+    oshsa eng eskilari chiqariladi.
+
+    `db` berilsa (FSM_STORAGE=postgres) holat fsm_states jadvaliga partiyalab
+    yoziladi: restartdan keyin tiklanadi va replikalar o'rtasida bo'linadi.
+    Xotiradagi nusxa FSM_SHARED_CACHE_TTL sekunddan keyin DB dan qayta o'qiladi;
+    holati yo'q userlar ham shu muddat bo'sh yozuv sifatida eslab qolinadi.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self.records: "OrderedDict[str, _Record]" = OrderedDict()
+        # Saqlanishi kerak bo'lgan yozuvlar: None - DB dan o'chirish
+        self._dirty: Dict[str, Optional[_Record]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.evicted = 0
+
+    # ---------- BaseStorage ----------
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get(_storage_key(key), create=True)
+        record.state = state.state if isinstance(state, State) else state
+        self._changed(_storage_key(key), record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._get(_storage_key(key))
+        return record.state if record else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._get(_storage_key(key), create=True)
+        record.data = dict(data) if data else None
+        self._changed(_storage_key(key), record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._get(_storage_key(key))
+        return dict(record.data) if record and record.data else {}
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    # ---------- Ichki ----------
+
+    def _ensure_task(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._background())
+
+    async def _get(self, skey: str, create: bool = False) -> Optional[_Record]:
+        self._ensure_task()
+        record = self.records.get(skey)
+
+        if self.db is not None and skey not in self._dirty:
+            stale = record is not None and time.monotonic() - record.loaded_at > config.FSM_SHARED_CACHE_TTL
+            if record is None or stale:
+                row = await self.db.fsm_load(skey)
+                # Holat yo'q bo'lsa ham bo'sh yozuv (tombstone) saqlanadi: aiogram har
+                # update da get_state chaqiradi, TTL ichida DB ga qayta bormaslik uchun
+                record = _Record(row['state'], json.loads(row['data'], object_hook=_decode)
+                                 if row['data'] else None) if row else _Record()
+                self.records[skey] = record
+
+        if record is None:
+            if not create:
+                return None
+            record = _Record()
+            self.records[skey] = record
+
+        record.touched = time.monotonic()
+        self.records.move_to_end(skey)
+        return record
+
+    def _changed(self, skey: str, record: _Record):
+        if record.is_empty():
+            if self.db is None:
+                self.records.pop(skey, None)
+            else:
+                # Tombstone bo'lib qoladi
+                record.loaded_at = time.monotonic()
+        if self.db is not None:
+            # Xotiradan chiqarilsa ham DB ga yozilishi uchun yozuvning o'zi saqlanadi
+            self._dirty[skey] = None if record.is_empty() else record
+        self._evict_overflow()
+
+    def _evict_overflow(self):
+        while len(self.records) > config.FSM_MAX_RECORDS:
+            self.records.popitem(last=False)
+            self.evicted += 1
+
+    def _sweep(self):
+        deadline = time.monotonic() - config.FSM_TTL
+        while self.records:
+            skey, record = next(iter(self.records.items()))
+            if record.touched > deadline:
+                break
+            self.records.popitem(last=False)
+            self.evicted += 1
+
+    async def flush(self):
+        """Yig'ilgan o'zgarishlarni bitta partiyada DB ga yozish"""
+        if self.db is None or not self._dirty:
+            return
+        async with self._flush_lock:
+            dirty, self._dirty = self._dirty, {}
+            upserts, deletes = [], []
+            for skey, record in dirty.items():
+                if record is None or record.is_empty():
+                    deletes.append(skey)
+                else:
+                    data = json.dumps(record.data, default=_encode) if record.data else None
+                    upserts.append((skey, record.state, data))
+            try:
+                await self.db.fsm_save_batch(upserts, deletes)
+            except Exception as e:
+                # Keyingi flush da qayta urinish (shu orada kelgan yangi holatlar ustun)
+                self._dirty = {**dirty, **self._dirty}
+                logger.error(f"FSM holatlarini saqlashda xato: {e}")
+
+    async def _background(self):
+        last_sweep = time.monotonic()
+        while True:
+            await asyncio.sleep(config.FSM_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+                if time.monotonic() - last_sweep >= config.FSM_SWEEP_INTERVAL:
+                    last_sweep = time.monotonic()
+                    self._sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"FSM storage fon jarayonida xato: {e}")
+
+    async def purge(self):
+        """Singleton vazifa: DB dagi eskirgan holatlarni o'chirish (faqat lider replikada)"""
+        while True:
+            await asyncio.sleep(config.FSM_SWEEP_INTERVAL)
+            await self.db.fsm_purge(config.FSM_TTL)
+
+    def stats(self) -> Dict:
+        """Yozuvlar soni va taxminiy xotira"""
+        size = sum(record.size() for record in self.records.values())
+        return {
+            'records': len(self.records),
+            'mb': round(size / 1024 / 1024, 2),
+            'evicted': self.evicted,
+            'dirty': len(self._dirty),
+            'persistent': self.db is not None,
+        }
@@ -1,6 +1,6 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, FSInputFile
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -8,20 +8,30 @@ from datetime import datetime
 import logging
 import os
 
+import callbacks
+import config
+from callbacks import CallbackTable
 from database import Database
+from outbound import OutboundScheduler
+from broadcast import BroadcastRunner, broadcast_stop_keyboard
+from lifecycle import ContestScheduler
+from channel_posts import publish_contest
+from parquet_export import export_votes_parquet
+from log_pipeline import get_log_stats
+from fsm_storage import BoundedStorage
 from keyboards import (
     admin_menu_keyboard, main_menu_keyboard, export_keyboard,
     archive_keyboard, yes_no_keyboard, back_keyboard,
-    vote_keyboard
+    vote_keyboard, export_contests_keyboard
 )
 from utils import (
-    is_admin, format_results_text, parse_datetime,
+    is_admin, parse_datetime,
     validate_channel_link, create_excel_report,
     create_csv_report, create_chart, log_user_action
 )
-import config
 
 router = Router()
+callback_table = CallbackTable(router)
 logger = logging.getLogger(__name__)
 
 
@@ -42,6 +52,8 @@ class AdminStates(StatesGroup):
 
     confirm_contest = State()
 
+    waiting_broadcast_message = State()
+
 
 def admin_only(func):
     """Admin huquqlarini tekshirish"""
@@ -63,7 +75,7 @@ def admin_only(func):
 
 def back_inline_keyboard() -> InlineKeyboardBuilder:
     kb = InlineKeyboardBuilder()
-    kb.button(text="⬅️ Orqaga", callback_data="cancel_contest_creation")
+    kb.button(text="⬅️ Orqaga", callback_data=callbacks.CANCEL_CONTEST_CREATION.pack())
     return kb
 
 
@@ -130,7 +142,7 @@ Konkurs nomini kiriting:
     await state.set_state(AdminStates.waiting_contest_name)
 
 
-@router.callback_query(F.data == "cancel_contest_creation")
+@callback_table.register(callbacks.CANCEL_CONTEST_CREATION)
 @admin_only
 async def cancel_contest_creation(callback: CallbackQuery, state: FSMContext):
     await callback.answer("Bekor qilindi")
@@ -522,8 +534,8 @@ async def show_contest_preview(message: Message, state: FSMContext, db: Database
     text += "\n❓ <b>Kanalga post qilishni tasdiqlaysizmi?</b>"
 
     kb = InlineKeyboardBuilder()
-    kb.button(text="✅ Ha, kanalga post qiling", callback_data="confirm_post_to_channel")
-    kb.button(text="❌ Yo'q, bekor qiling", callback_data="cancel_contest_posting")
+    kb.button(text="✅ Ha, kanalga post qiling", callback_data=callbacks.CONFIRM_POST.pack())
+    kb.button(text="❌ Yo'q, bekor qiling", callback_data=callbacks.CANCEL_POST.pack())
     kb.adjust(1)
 
     if data.get('contest_image'):
@@ -538,9 +550,10 @@ async def show_contest_preview(message: Message, state: FSMContext, db: Database
     await state.set_state(AdminStates.confirm_contest)
 
 
-@router.callback_query(F.data == "confirm_post_to_channel")
+@callback_table.register(callbacks.CONFIRM_POST)
 @admin_only
-async def confirm_post_to_channel(callback: CallbackQuery, state: FSMContext, db: Database):
+async def confirm_post_to_channel(callback: CallbackQuery, state: FSMContext, db: Database,
+                                  lifecycle: ContestScheduler):
 
     await callback.answer("Konkurs yaratilmoqda...", show_alert=True)
 
@@ -554,6 +567,11 @@ async def confirm_post_to_channel(callback: CallbackQuery, state: FSMContext, db
             end_date=data['end_date'],
             image_file_id=data.get('contest_image')
         )
+        lifecycle.schedule({
+            'id': contest_id,
+            'start_date': data['start_date'],
+            'end_date': data['end_date']
+        })
         for channel in data.get('channels', []):
             await db.add_channel_to_contest(
                 contest_id,
@@ -618,7 +636,7 @@ async def confirm_post_to_channel(callback: CallbackQuery, state: FSMContext, db
         await state.clear()
 
 
-@router.callback_query(F.data == "cancel_contest_posting")
+@callback_table.register(callbacks.CANCEL_POST)
 @admin_only
 async def cancel_contest_posting(callback: CallbackQuery, state: FSMContext):
 
@@ -642,36 +660,17 @@ async def post_contest_to_channel(bot, db: Database, contest_id: int, data: dict
 
         keyboard = vote_keyboard(candidates, contest_id, bot_username)
 
-        sent_message = None
-        if data.get('contest_image'):
-            sent_message = await bot.send_photo(
-                chat_id=config.CHANNEL_ID,
-                photo=data['contest_image'],
-                caption=post_text,
-                reply_markup=keyboard
-            )
-        else:
-            sent_message = await bot.send_message(
-                chat_id=config.CHANNEL_ID,
-                text=post_text,
-                reply_markup=keyboard
-            )
-
-        if sent_message:
-            await db.save_contest_channel_post(
-                contest_id=contest_id,
-                channel_chat_id=str(config.CHANNEL_ID),
-                message_id=sent_message.message_id
-            )
-            logger.info(f"✅ Konkurs {contest_id} kanalga yuborildi va saqlandi: "
-                        f"{config.CHANNEL_ID}:{sent_message.message_id}")
+        posted = await publish_contest(
+            bot, db, contest_id, post_text, keyboard, image_file_id=data.get('contest_image')
+        )
+        if not posted:
+            raise RuntimeError("Konkurs hech bir kanalga yuborilmadi")
 
     except Exception as e:
         logger.error(f"Kanalga post qilishda xato: {e}", exc_info=True)
         raise
 
 
-
 @router.message(F.text == "⏸ Konkursni to'xtatish")
 @admin_only
 async def stop_contest_menu(message: Message, db: Database):
@@ -695,7 +694,7 @@ Qaysi konkursni to'xtatmoqchisiz?
         button_text = f"🗳 {contest['name'][:40]}..." if len(contest['name']) > 40 else f"🗳 {contest['name']}"
         kb.button(
             text=button_text,
-            callback_data=f"stop_contest:{contest['id']}"
+            callback_data=callbacks.STOP_CONTEST.pack(contest['id'])
         )
 
     kb.adjust(1)
@@ -703,13 +702,12 @@ Qaysi konkursni to'xtatmoqchisiz?
     await message.answer(text, reply_markup=kb.as_markup())
 
 
-@router.callback_query(F.data.startswith("stop_contest:"))
+@callback_table.register(callbacks.STOP_CONTEST)
 @admin_only
-async def stop_contest_confirm(callback: CallbackQuery, db: Database):
+async def stop_contest_confirm(callback: CallbackQuery, db: Database, contest_id: int):
     """Tanlangan konkursni to'xtatishni tasdiqlash"""
     await callback.answer()
 
-    contest_id = int(callback.data.split(":")[1])
     contest = await db.get_contest_by_id(contest_id)
 
     if not contest:
@@ -746,16 +744,18 @@ Davom etasizmi?
 
     await callback.message.edit_text(
         text,
-        reply_markup=yes_no_keyboard(f"stop_contest_exec:{contest_id}")
+        reply_markup=yes_no_keyboard(
+            callbacks.STOP_CONTEST_YES.pack(contest_id),
+            callbacks.STOP_CONTEST_NO.pack(contest_id)
+        )
     )
 
 
-@router.callback_query(F.data.startswith("yes:stop_contest_exec:"))
+@callback_table.register(callbacks.STOP_CONTEST_YES)
 @admin_only
-async def stop_contest_execute(callback: CallbackQuery, db: Database):
+async def stop_contest_execute(callback: CallbackQuery, db: Database, lifecycle: ContestScheduler, contest_id: int):
     await callback.answer()
 
-    contest_id = int(callback.data.split(":")[2])
     contest = await db.get_contest_by_id(contest_id)
 
     if not contest:
@@ -764,10 +764,12 @@ async def stop_contest_execute(callback: CallbackQuery, db: Database):
 
     try:
         await db.stop_contest(contest['id'])
+        lifecycle.mark_closed(contest['id'])
         report = await db.get_detailed_report(contest['id'])
+        board = await db.results.get_leaderboard(contest['id'])
 
         winners_text = ""
-        for i, candidate in enumerate(report['candidates'][:3], 1):
+        for i, candidate in enumerate(board.top(3), 1):
             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
             percentage = candidate.get('percentage') or 0
             winners_text += f"{medal} <b>{candidate['candidate_name']}</b> - {candidate['votes']} ovoz ({percentage:.1f}%)\n"
@@ -799,7 +801,7 @@ async def stop_contest_execute(callback: CallbackQuery, db: Database):
         await callback.message.edit_text("❌ Xatolik yuz berdi!")
 
 
-@router.callback_query(F.data.startswith("no:stop_contest_exec:"))
+@callback_table.register(callbacks.STOP_CONTEST_NO)
 async def stop_contest_cancel(callback: CallbackQuery):
     """To'xtatishni bekor qilish"""
     await callback.answer("Bekor qilindi")
@@ -816,8 +818,7 @@ async def admin_results(message: Message, db: Database):
         await message.answer("❌ Faol konkurs yo'q")
         return
 
-    results = await db.get_vote_results(contest['id'])
-    text = format_results_text(results, contest['name'])
+    text = await db.results.get_results_text(contest['id'], contest['name'])
 
     await message.answer(text)
 
@@ -861,50 +862,46 @@ async def detailed_report(message: Message, db: Database):
 @router.message(F.text == "📥 Eksport")
 @admin_only
 async def export_menu(message: Message, db: Database):
-    contests = await db.get_all_contests()
+    page = await db.get_contests_page()
 
-    if not contests:
+    if not page['contests']:
         await message.answer("❌ Hech qanday konkurs yo'q")
         return
 
-    text = f"""
+    text = """
 📥 <b>Ma'lumotlarni eksport qilish</b>
 
 Qaysi konkursni eksport qilmoqchisiz?
-
-<b>Jami konkurslar:</b> {len(contests)}
 """
 
-    kb = InlineKeyboardBuilder()
+    await message.answer(
+        text,
+        reply_markup=export_contests_keyboard(page['contests'], page['has_prev'], page['has_next'])
+    )
 
-    for contest in contests:
-        if contest['is_active']:
-            status = "🟢"
-        elif contest.get('is_archived'):
-            status = "📁"
-        else:
-            status = "⚪️"
 
-        name = contest['name'][:40] + "..." if len(contest['name']) > 40 else contest['name']
-        button_text = f"{status} {name}"
+@callback_table.register(callbacks.EXPORT_PAGE)
+@admin_only
+async def export_menu_page(callback: CallbackQuery, db: Database, forward: int, cursor: int):
+    """Eksport ro'yxati - boshqa sahifa"""
+    await callback.answer()
 
-        kb.button(
-            text=button_text,
-            callback_data=f"export_select:{contest['id']}"
-        )
+    page = await db.get_contests_page(cursor, 'next' if forward else 'prev')
 
-    kb.adjust(1)
+    if not page['contests']:
+        return
 
-    await message.answer(text, reply_markup=kb.as_markup())
+    await callback.message.edit_reply_markup(
+        reply_markup=export_contests_keyboard(page['contests'], page['has_prev'], page['has_next'])
+    )
 
 
-@router.callback_query(F.data.startswith("export_select:"))
+@callback_table.register(callbacks.EXPORT_SELECT)
 @admin_only
-async def export_select_format(callback: CallbackQuery, db: Database):
+async def export_select_format(callback: CallbackQuery, db: Database, contest_id: int):
     """Format tanlash"""
     await callback.answer()
 
-    contest_id = int(callback.data.split(":")[1])
     contest = await db.get_contest_by_id(contest_id)
 
     if not contest:
@@ -926,13 +923,12 @@ Qaysi formatda yuklab olmoqchisiz?
     )
 
 
-@router.callback_query(F.data.startswith("export:excel:"))
+@callback_table.register(callbacks.EXPORT_EXCEL)
 @admin_only
-async def export_excel(callback: CallbackQuery, db: Database):
+async def export_excel(callback: CallbackQuery, db: Database, contest_id: int):
     """Excel eksport"""
     await callback.answer("Excel tayyorlanmoqda...")
 
-    contest_id = int(callback.data.split(":")[2])
     report = await db.get_detailed_report(contest_id)
 
     try:
@@ -955,12 +951,11 @@ async def export_excel(callback: CallbackQuery, db: Database):
         await callback.message.answer("❌ Xatolik yuz berdi!")
 
 
-@router.callback_query(F.data.startswith("export:csv:"))
+@callback_table.register(callbacks.EXPORT_CSV)
 @admin_only
-async def export_csv(callback: CallbackQuery, db: Database):
+async def export_csv(callback: CallbackQuery, db: Database, contest_id: int):
     await callback.answer("CSV tayyorlanmoqda...")
 
-    contest_id = int(callback.data.split(":")[2])
     report = await db.get_detailed_report(contest_id)
 
     try:
@@ -983,12 +978,11 @@ async def export_csv(callback: CallbackQuery, db: Database):
         await callback.message.answer("❌ Xatolik yuz berdi!")
 
 
-@router.callback_query(F.data.startswith("export:chart:"))
+@callback_table.register(callbacks.EXPORT_CHART)
 @admin_only
-async def export_chart(callback: CallbackQuery, db: Database):
+async def export_chart(callback: CallbackQuery, db: Database, contest_id: int):
     await callback.answer("Grafik yaratilmoqda...")
 
-    contest_id = int(callback.data.split(":")[2])
     report = await db.get_detailed_report(contest_id)
 
     try:
@@ -1010,6 +1004,35 @@ async def export_chart(callback: CallbackQuery, db: Database):
         await callback.message.answer("❌ Xatolik yuz berdi!")
 
 
+@callback_table.register(callbacks.EXPORT_PARQUET)
+@admin_only
+async def export_parquet(callback: CallbackQuery, db: Database, contest_id: int):
+    """Barcha ovozlar - tahlil uchun Parquet (zstd)"""
+    await callback.answer("Parquet tayyorlanmoqda...")
+
+    contest = await db.get_contest_by_id(contest_id)
+    if not contest:
+        await callback.message.answer("❌ Konkurs topilmadi!")
+        return
+
+    filename = f"ovozlar_{contest_id}_{datetime.now().strftime('%Y%m%d_%H%M')}.parquet"
+    try:
+        total = await export_votes_parquet(db, contest_id, filename)
+
+        await callback.message.answer_document(
+            FSInputFile(filename),
+            caption=f"🧮 <b>{contest['name']}</b>\n\n{total} ta ovoz Parquet formatda"
+        )
+
+        log_user_action(callback.from_user.id, callback.from_user.username, "EXPORT_PARQUET")
+    except Exception as e:
+        logger.error(f"Parquet eksport xato: {e}", exc_info=True)
+        await callback.message.answer("❌ Xatolik yuz berdi!")
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
 @router.message(F.text == "🗑 Ovozlarni tozalash")
 @admin_only
 async def reset_votes_confirm(message: Message):
@@ -1021,10 +1044,12 @@ Bu amalni bekor qilib bo'lmaydi.
 
 Davom etasizmi?
 """
-    await message.answer(text, reply_markup=yes_no_keyboard("reset_votes"))
+    await message.answer(text, reply_markup=yes_no_keyboard(
+        callbacks.RESET_VOTES_YES.pack(), callbacks.RESET_VOTES_NO.pack()
+    ))
 
 
-@router.callback_query(F.data == "yes:reset_votes")
+@callback_table.register(callbacks.RESET_VOTES_YES)
 @admin_only
 async def reset_votes_execute(callback: CallbackQuery, db: Database):
     """Ovozlarni tozalash"""
@@ -1051,34 +1076,124 @@ async def reset_votes_execute(callback: CallbackQuery, db: Database):
         await callback.message.edit_text("❌ Xatolik yuz berdi!")
 
 
-@router.callback_query(F.data == "no:reset_votes")
+@callback_table.register(callbacks.RESET_VOTES_NO)
 async def reset_votes_cancel(callback: CallbackQuery):
     """Bekor qilish"""
     await callback.answer("Bekor qilindi")
     await callback.message.delete()
 
 
+@router.message(F.text == "📣 Xabar yuborish")
+@admin_only
+async def broadcast_start(message: Message, state: FSMContext):
+    await state.set_state(AdminStates.waiting_broadcast_message)
+    await message.answer(
+        "📣 <b>Barcha foydalanuvchilarga xabar</b>\n\n"
+        "Yubormoqchi bo'lgan xabarni jo'nating (matn, rasm, video...).\n"
+        "Bekor qilish: /cancel"
+    )
+
+
+@router.message(AdminStates.waiting_broadcast_message, F.text == "/cancel")
+@admin_only
+async def broadcast_cancel_input(message: Message, state: FSMContext):
+    await state.clear()
+    await message.answer("❌ Bekor qilindi")
+
+
+@router.message(AdminStates.waiting_broadcast_message)
+@admin_only
+async def broadcast_preview(message: Message, state: FSMContext, db: Database):
+    await state.update_data(broadcast_message_id=message.message_id)
+
+    total = await db.count_broadcast_recipients()
+    await message.answer(
+        f"☝️ Shu xabar <b>{total}</b> ta foydalanuvchiga yuboriladi.\n\nDavom etasizmi?",
+        reply_markup=yes_no_keyboard(callbacks.BROADCAST_YES.pack(), callbacks.BROADCAST_NO.pack())
+    )
+
+
+@callback_table.register(callbacks.BROADCAST_YES)
+@admin_only
+async def broadcast_execute(callback: CallbackQuery, state: FSMContext, db: Database,
+                            broadcasts: BroadcastRunner):
+    await callback.answer()
+
+    data = await state.get_data()
+    await state.clear()
+    message_id = data.get('broadcast_message_id')
+    if not message_id:
+        await callback.message.edit_text("❌ Xabar topilmadi, qaytadan boshlang")
+        return
+
+    progress = await callback.message.edit_text("📣 <b>Xabar yuborilmoqda...</b>")
+    broadcast_id = await db.create_broadcast(
+        callback.from_user.id, callback.message.chat.id, message_id,
+        progress.chat.id, progress.message_id
+    )
+    await progress.edit_reply_markup(reply_markup=broadcast_stop_keyboard(broadcast_id))
+    broadcasts.submit(broadcast_id)
+
+    log_user_action(callback.from_user.id, callback.from_user.username, f"BROADCAST_START: {broadcast_id}")
+
+
+@callback_table.register(callbacks.BROADCAST_NO)
+async def broadcast_cancel(callback: CallbackQuery, state: FSMContext):
+    await callback.answer("Bekor qilindi")
+    await state.clear()
+    await callback.message.delete()
+
+
+@callback_table.register(callbacks.BROADCAST_STOP)
+@admin_only
+async def broadcast_stop(callback: CallbackQuery, broadcasts: BroadcastRunner, broadcast_id: int):
+
+    if await broadcasts.cancel(broadcast_id):
+        await callback.answer("⏹ To'xtatildi", show_alert=True)
+        await callback.message.edit_reply_markup(reply_markup=None)
+        log_user_action(callback.from_user.id, callback.from_user.username, f"BROADCAST_STOP: {broadcast_id}")
+    else:
+        await callback.answer("Yuborish allaqachon tugagan")
+
+
 @router.message(F.text == "📚 Arxiv")
 @admin_only
 async def view_archive(message: Message, db: Database):
-    contests = await db.get_archived_contests()
+    page = await db.get_archived_contests_page()
 
     text = "📚 <b>Arxivlangan konkurslar</b>\n\n"
 
-    if contests:
-        text += f"Jami: {len(contests)} ta konkurs\n\n"
-        await message.answer(text, reply_markup=archive_keyboard(contests))
+    if page['contests']:
+        await message.answer(
+            text,
+            reply_markup=archive_keyboard(page['contests'], page['has_prev'], page['has_next'])
+        )
     else:
         text += "📭 Arxiv bo'sh"
         await message.answer(text)
 
 
-@router.callback_query(F.data.startswith("archive:"))
+@callback_table.register(callbacks.ARCHIVE_PAGE)
+@admin_only
+async def view_archive_page(callback: CallbackQuery, db: Database, forward: int, cursor: int):
+    """Arxiv - boshqa sahifa"""
+    await callback.answer()
+
+    page = await db.get_archived_contests_page(cursor, 'next' if forward else 'prev')
+
+    if not page['contests']:
+        return
+
+    await callback.message.edit_reply_markup(
+        reply_markup=archive_keyboard(page['contests'], page['has_prev'], page['has_next'])
+    )
+
+
+@callback_table.register(callbacks.ARCHIVE)
 @admin_only
-async def view_archived_contest(callback: CallbackQuery, db: Database):
+async def view_archived_contest(callback: CallbackQuery, db: Database, contest_id: int):
     await callback.answer()
 
-    contest_id = int(callback.data.split(":")[1])
     report = await db.get_detailed_report(contest_id)
 
     text = f"""
@@ -1128,4 +1243,97 @@ async def quick_stats(message: Message, db: Database):
         text += f"\n🏆 Lider: <b>{top_candidate['candidate_name']}</b>\n"
         text += f"       ({top_candidate['votes']} ovoz)"
 
-    await message.answer(text)
\ No newline at end of file
+    await message.answer(text)
+
+
+@router.message(Command("dbstats"))
+@admin_only
+async def db_statement_stats(message: Message, db: Database, fsm_storage: BoundedStorage):
+    stats = db.get_statement_stats()[:15]
+
+    if not stats:
+        await message.answer("📭 Hali so'rovlar bajarilmagan")
+        return
+
+    text = "🗄 <b>So'rovlar statistikasi</b>\n\n"
+    for s in stats:
+        text += f"<code>{s['name']}</code>: {s['calls']} marta, o'rtacha {s['avg_ms']} ms\n"
+
+    voter_stats = db.get_voter_stats()
+    if voter_stats:
+        text += "\n🧠 <b>Ovoz beruvchilar (xotirada)</b>\n"
+        for s in voter_stats:
+            text += (f"Konkurs {s['contest_id']}: {s['voters']} ta, {s['mb']} MB"
+                     f" ({s['mb_per_million']} MB / 1M)\n")
+
+    fsm = fsm_storage.stats()
+    text += (f"\n💾 <b>FSM</b>: {fsm['records']} ta yozuv, {fsm['mb']} MB, "
+             f"chiqarilgan {fsm['evicted']}, saqlanmagan {fsm['dirty']}\n")
+
+    jobs = db.coordinator.stats()
+    if jobs:
+        text += "\n👑 <b>Singleton vazifalar</b>\n"
+        for name, leader in jobs.items():
+            text += f"<code>{name}</code>: {'shu replikada' if leader else 'boshqa replikada'}\n"
+
+    await message.answer(text)
+
+
+@router.message(Command("queue"))
+@admin_only
+async def outbound_queue_stats(message: Message, outbound: OutboundScheduler):
+    stats = outbound.get_stats()
+
+    text = "📤 <b>Chiquvchi xabarlar navbati</b>\n\n"
+    for name, queue in stats['queues'].items():
+        text += (f"<b>{name}</b>: navbatda {queue['depth']}, yuborildi {queue['sent']}, "
+                 f"kutish o'rtacha {queue['avg_wait_ms']} ms, maks {queue['max_wait_ms']} ms\n")
+    text += f"\n⏳ 429 (retry_after): {stats['retry_after']}\n"
+    text += f"💬 Kuzatilayotgan chatlar: {stats['chats']}"
+
+    await message.answer(text)
+
+
+@router.message(Command("logstats"))
+@admin_only
+async def log_pipeline_stats(message: Message):
+    stats = get_log_stats()
+
+    if not stats:
+        await message.answer("❌ Log navbati ishlamayapti")
+        return
+
+    await message.answer(
+        f"📝 <b>Log navbati</b>\n\n"
+        f"📥 Navbatda: {stats['queued']} / {stats['capacity']}\n"
+        f"🗑 Tashlangan: {stats['dropped']}\n"
+        f"🎲 Sampling bilan o'tkazilgan: {stats['sampled_out']}"
+    )
+
+
+@router.message(Command("restorevotes"))
+@admin_only
+async def restore_cold_votes(message: Message, db: Database, command: CommandObject):
+    """Cold arxivdagi ovozlarni audit uchun votes_c{id} jadvaliga tiklash: /restorevotes <konkurs_id>"""
+    if not command.args or not command.args.strip().isdigit():
+        await message.answer("ℹ️ Foydalanish: <code>/restorevotes konkurs_id</code>")
+        return
+
+    contest_id = int(command.args.strip())
+    await message.answer("⏳ Ovozlar tiklanmoqda...")
+    try:
+        total = await db.restore_cold_votes(contest_id)
+    except Exception as e:
+        logger.error(f"Cold arxivdan tiklashda xato (Contest {contest_id}): {e}", exc_info=True)
+        await message.answer(f"❌ Xatolik: {str(e)}")
+        return
+
+    if total is None:
+        await message.answer("❌ Bu konkurs ovozlari cold arxivda emas")
+        return
+
+    await message.answer(
+        f"✅ Konkurs {contest_id}: {total} ta ovoz <code>votes_c{contest_id}</code> jadvaliga tiklandi\n"
+        f"🕐 Jadval {config.COLD_RESTORE_TTL_HOURS} soatdan keyin yana o'chiriladi"
+    )
+    log_user_action(message.from_user.id, message.from_user.username, f"RESTORE_VOTES: {contest_id}")
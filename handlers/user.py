@@ -4,29 +4,68 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from datetime import datetime
+from typing import Dict
+import asyncio
 import logging
 
+import callbacks
+import config
+from callbacks import CallbackTable
 from database import Database
-from keyboards import main_menu_keyboard, confirm_vote_keyboard, vote_keyboard
-from utils import is_admin, format_results_text, log_user_action, format_vote_count
+from outbound import Priority, outbound_priority
+from lifecycle import ContestScheduler, UPCOMING, CLOSED
+from channel_posts import edit_contest_posts
+from candidate_pages import candidate_page_keyboard, search_results_keyboard
+from keyboards import main_menu_keyboard, confirm_vote_keyboard, vote_keyboard, contest_picker_keyboard
+from utils import is_admin, log_user_action
 
 router = Router()
+callback_table = CallbackTable(router)
 logger = logging.getLogger(__name__)
 class VotingStates(StatesGroup):
     waiting_for_subscription = State()
     selecting_candidate = State()
     confirming_vote = State()
+    searching_candidate = State()
+
+# Konkurs bo'yicha fonda ishlayotgan kanal post yangilanishlari.
+# Qiymat True - yangilash davomida yangi ovoz keldi, yana bir marta yangilash kerak
+_channel_post_updates: Dict[int, bool] = {}
+_channel_post_tasks: Dict[int, asyncio.Task] = {}
+
 
 async def update_channel_post(bot, db: Database, contest_id: int):
+    """Kanal postini fonda yangilash.
+
+    Ovoz tasdig'i kanal tahririni kutmaydi. Bir konkurs uchun bir vaqtda bitta
+    yangilash ishlaydi, oraliqda kelgan so'rovlar bitta oxirgi yangilashga birlashadi.
+    """
+    if contest_id in _channel_post_updates:
+        _channel_post_updates[contest_id] = True
+        return
+
+    _channel_post_updates[contest_id] = False
+    _channel_post_tasks[contest_id] = asyncio.create_task(
+        _run_channel_post_updates(bot, db, contest_id)
+    )
+
 
+async def _run_channel_post_updates(bot, db: Database, contest_id: int):
     try:
-        post_info = await db.get_contest_channel_post(contest_id)
+        with outbound_priority(Priority.LOW):
+            while True:
+                await _edit_channel_post(bot, db, contest_id)
+                if not _channel_post_updates[contest_id]:
+                    break
+                _channel_post_updates[contest_id] = False
+    finally:
+        del _channel_post_updates[contest_id]
+        del _channel_post_tasks[contest_id]
 
-        if not post_info:
-            logger.warning(f"Konkurs {contest_id} uchun kanal post topilmadi")
-            return
 
+async def _edit_channel_post(bot, db: Database, contest_id: int):
+
+    try:
         candidates = await db.get_candidates(contest_id)
 
         bot_info = await bot.get_me()
@@ -34,14 +73,9 @@ async def update_channel_post(bot, db: Database, contest_id: int):
 
         new_keyboard = vote_keyboard(candidates, contest_id, bot_username)
 
-        await bot.edit_message_reply_markup(
-            chat_id=post_info['chat_id'],
-            message_id=post_info['message_id'],
-            reply_markup=new_keyboard
-        )
-
-        logger.info(f"✅ Kanal post yangilandi: Contest {contest_id}, "
-                    f"Chat {post_info['chat_id']}, Msg {post_info['message_id']}")
+        updated = await edit_contest_posts(bot, db, contest_id, new_keyboard)
+        logger.info(f"✅ Kanal postlari yangilandi: Contest {contest_id}, {updated} ta post",
+                    extra={'event': 'CHANNEL_POST_EDIT'})
 
     except Exception as e:
         # Xatolik bo'lsa ham ovoz saqlanadi - post yangilanmaydi
@@ -61,29 +95,38 @@ async def cmd_start(message: Message, db: Database, state: FSMContext):
             parts = args[1].split("_")
             contest_id = int(parts[1])
             candidate_id = int(parts[2])
-            logger.info(f"Deep link: User {user.id}, Contest {contest_id}, Candidate {candidate_id}")
+            logger.info(f"Deep link: User {user.id}, Contest {contest_id}, Candidate {candidate_id}",
+                        extra={'event': 'DEEP_LINK'})
 
-            contest = await db.get_contest_by_id(contest_id)
-            if not contest or not contest['is_active']:
+            snapshot = await db.get_vote_snapshot(contest_id, user.id)
+            if not snapshot or not snapshot['contest']['is_active']:
                 await message.answer("❌ Bu konkurs tugagan yoki faol emas!",
                                      reply_markup=main_menu_keyboard(is_user_admin))
                 return
 
-            now = datetime.now()
-            if now < contest['start_date']:
+            contest = snapshot['contest']
+            if snapshot['state'] == UPCOMING:
                 await message.answer(
                     f"⏰ Konkurs hali boshlanmagan!\n📅 Boshlanish: {contest['start_date'].strftime('%d.%m.%Y %H:%M')}",
                     reply_markup=main_menu_keyboard(is_user_admin))
                 return
-            if now > contest['end_date']:
+            if snapshot['state'] == CLOSED:
                 await message.answer("⌛️ Konkurs tugagan!", reply_markup=main_menu_keyboard(is_user_admin))
                 return
-            if await db.has_voted(contest_id, user.id):
+            if snapshot['has_voted']:
                 await message.answer("✅ Siz allaqachon ovoz bergansiz!",
                                      reply_markup=main_menu_keyboard(is_user_admin))
                 return
 
-            await show_contest_post_deep_link(message, db, state, contest_id, candidate_id)
+            await show_contest_post_deep_link(message, db, state, contest, candidate_id)
+            return
+        except Exception as e:
+            logger.error(f"Deep link xato: {e}")
+
+    if len(args) > 1 and args[1].startswith("contest_"):
+        # Kanal postidagi "Barchasini ko'rish" - to'liq nomzodlar ro'yxati
+        try:
+            await start_contest_voting(message, user, db, state, int(args[1].split("_")[1]))
             return
         except Exception as e:
             logger.error(f"Deep link xato: {e}")
@@ -108,10 +151,10 @@ async def cmd_start(message: Message, db: Database, state: FSMContext):
 
 
 async def show_contest_post_deep_link(message: Message, db: Database, state: FSMContext,
-                                      contest_id: int, candidate_id: int):
+                                      contest: Dict, candidate_id: int):
     """Deep link orqali ovoz berish"""
-    contest = await db.get_contest_by_id(contest_id)
-    candidates = await db.get_candidates(contest_id)
+    contest_id = contest['id']
+    board = await db.results.get_leaderboard(contest_id)
 
     post_text = f"🗳 <b>{contest['name']}</b>"
 
@@ -121,55 +164,72 @@ async def show_contest_post_deep_link(message: Message, db: Database, state: FSM
         await message.answer(post_text)
 
     text = "👇 O'zingizga yoqqan nomzodni tanlang va ovoz bering:"
-    kb = InlineKeyboardBuilder()
-    for candidate in candidates:
-        vote_count = candidate.get('vote_count', 0)
-        formatted_count = format_vote_count(vote_count)
-        kb.button(
-            text=f" {candidate['name']} - {formatted_count}",
-            callback_data=f"vote_deep_{contest_id}_{candidate['id']}"
-        )
-    kb.adjust(1)
-    await message.answer(text, reply_markup=kb.as_markup())
+    keyboard, _ = candidate_page_keyboard(board, contest_id, 0, deep=True)
+    await message.answer(text, reply_markup=keyboard)
     await state.update_data(contest_id=contest_id, from_deep_link=True)
 
 
-async def show_contest_post_for_voting(message: Message, db: Database, contest_id: int, state: FSMContext):
-    contest = await db.get_contest_by_id(contest_id)
-    candidates = await db.get_candidates(contest_id)
+async def show_contest_post_for_voting(message: Message, db: Database, contest: Dict, state: FSMContext):
+    contest_id = contest['id']
+    board = await db.results.get_leaderboard(contest_id)
 
-    if not candidates:
+    if not len(board):
         await message.answer("❌ Nomzodlar qo'shilmagan.")
         return
 
     post_text = f"🗳 <b>{contest['name']}</b>"
-
-    kb = InlineKeyboardBuilder()
-    for candidate in candidates:
-        vote_count = candidate.get('vote_count', 0)
-        formatted_count = format_vote_count(vote_count)
-        kb.button(
-            text=f"{candidate['name']} - {formatted_count}",
-            callback_data=f"vote_{candidate['id']}"
-        )
-    kb.adjust(1)
+    keyboard, _ = candidate_page_keyboard(board, contest_id, 0, deep=False)
 
     if contest.get('image_file_id'):
-        await message.answer_photo(photo=contest['image_file_id'], caption=post_text, reply_markup=kb.as_markup())
+        await message.answer_photo(photo=contest['image_file_id'], caption=post_text, reply_markup=keyboard)
     else:
-        await message.answer(post_text, reply_markup=kb.as_markup())
+        await message.answer(post_text, reply_markup=keyboard)
 
     await state.update_data(contest_id=contest_id)
     await state.set_state(VotingStates.selecting_candidate)
     log_user_action(message.from_user.id, message.from_user.username, "VIEW_CANDIDATES")
 
-@router.callback_query(F.data.startswith("vote_deep_"))
-async def vote_from_deep_link(callback: CallbackQuery, db: Database, state: FSMContext):
+@callback_table.register(callbacks.CANDIDATE_PAGE)
+async def candidate_page(callback: CallbackQuery, db: Database, state: FSMContext,
+                         contest_id: int, page: int, deep: int):
+    """Nomzodlar ro'yxatining boshqa sahifasi"""
+    await callback.answer()
+
+    board = await db.results.get_leaderboard(contest_id)
+    keyboard, _ = candidate_page_keyboard(board, contest_id, page, deep=bool(deep))
+    try:
+        await callback.message.edit_reply_markup(reply_markup=keyboard)
+    except Exception:
+        # Sahifa o'zgarmagan (ikki marta bosilgan) - e'tiborsiz
+        pass
+
+    if await state.get_state() == VotingStates.searching_candidate.state:
+        await _finish_search(state)
+
+
+@callback_table.register(callbacks.CANDIDATE_SEARCH)
+async def candidate_search_start(callback: CallbackQuery, state: FSMContext, contest_id: int, deep: int):
+    """Nomzodni ism bo'yicha qidirish"""
+    await callback.answer()
+
+    previous = await state.get_state()
+    if previous != VotingStates.searching_candidate.state:
+        await state.update_data(search_previous_state=previous)
+    await state.update_data(search_contest_id=contest_id, search_deep=bool(deep))
+    await state.set_state(VotingStates.searching_candidate)
+    await callback.message.answer("🔍 Nomzod ismini (yoki uning bir qismini) yozing:")
+
+
+async def _finish_search(state: FSMContext):
+    data = await state.get_data()
+    await state.set_state(data.get('search_previous_state'))
+
+
+@callback_table.register(callbacks.VOTE_DEEP)
+async def vote_from_deep_link(callback: CallbackQuery, db: Database, state: FSMContext, lifecycle: ContestScheduler,
+                              contest_id: int, candidate_id: int):
 
     await callback.answer()
-    parts = callback.data.split("_")
-    contest_id = int(parts[2])
-    candidate_id = int(parts[3])
     user = callback.from_user
 
     channels = await db.get_contest_channels(contest_id)
@@ -188,7 +248,7 @@ async def vote_from_deep_link(callback: CallbackQuery, db: Database, state: FSMC
         kb = InlineKeyboardBuilder()
         for i, channel in enumerate(not_subscribed, 1):
             kb.button(text=f"📢 {i}. {channel['channel_name']}", url=channel['channel_link'])
-        kb.button(text="✅ Obunani tekshirish", callback_data=f"check_sub_deep_{contest_id}_{candidate_id}")
+        kb.button(text="✅ Obunani tekshirish", callback_data=callbacks.CHECK_SUB_DEEP.pack(contest_id, candidate_id))
         kb.adjust(1)
         await callback.message.answer(text, reply_markup=kb.as_markup())
         await state.update_data(contest_id=contest_id, candidate_id=candidate_id)
@@ -200,7 +260,14 @@ async def vote_from_deep_link(callback: CallbackQuery, db: Database, state: FSMC
         await callback.message.answer("❌ Nomzod topilmadi!")
         return
 
+    if not await lifecycle.is_accepting(contest_id):
+        await callback.message.answer("⌛️ Konkurs tugagan!")
+        return
+
     success = await db.add_vote(contest_id, candidate_id, user.id, user.username)
+    if success is None:
+        # Takroriy bosish - javobni birinchi so'rov beradi
+        return
 
     if success:
         await update_channel_post(callback.bot, db, contest_id)
@@ -211,16 +278,16 @@ async def vote_from_deep_link(callback: CallbackQuery, db: Database, state: FSMC
     else:
         await callback.message.answer("❌ Siz allaqachon ovoz bergansiz!")
 
+    # Deep link ma'lumotlari (contest_id, from_deep_link) endi kerak emas
+    await state.clear()
+
 
-@router.callback_query(F.data.startswith("check_sub_deep_"))
-async def check_subscription_deep(callback: CallbackQuery, db: Database, state: FSMContext):
+@callback_table.register(callbacks.CHECK_SUB_DEEP)
+async def check_subscription_deep(callback: CallbackQuery, db: Database, state: FSMContext,
+                                  lifecycle: ContestScheduler, contest_id: int, candidate_id: int):
     """Obunani tekshirish (deep link)"""
     await callback.answer("Tekshirilmoqda...")
 
-    parts = callback.data.split("_")
-    contest_id = int(parts[3])
-    candidate_id = int(parts[4])
-
     channels = await db.get_contest_channels(contest_id)
     not_subscribed = []
 
@@ -238,7 +305,7 @@ async def check_subscription_deep(callback: CallbackQuery, db: Database, state:
         kb = InlineKeyboardBuilder()
         for i, channel in enumerate(not_subscribed, 1):
             kb.button(text=f"📢 {i}. {channel['channel_name']}", url=channel['channel_link'])
-        kb.button(text="🔄 Qayta tekshirish", callback_data=f"check_sub_deep_{contest_id}_{candidate_id}")
+        kb.button(text="🔄 Qayta tekshirish", callback_data=callbacks.CHECK_SUB_DEEP.pack(contest_id, candidate_id))
         kb.adjust(1)
         try:
             await callback.message.edit_text(text, reply_markup=kb.as_markup())
@@ -254,7 +321,13 @@ async def check_subscription_deep(callback: CallbackQuery, db: Database, state:
             await callback.message.answer("❌ Nomzod topilmadi!")
             return
 
+        if not await lifecycle.is_accepting(contest_id):
+            await callback.message.edit_text("⌛️ Konkurs tugagan!")
+            return
+
         success = await db.add_vote(contest_id, candidate_id, callback.from_user.id, callback.from_user.username)
+        if success is None:
+            return
 
         if success:
             await update_channel_post(callback.bot, db, contest_id)
@@ -265,12 +338,13 @@ async def check_subscription_deep(callback: CallbackQuery, db: Database, state:
         else:
             await callback.message.edit_text("❌ Siz allaqachon ovoz bergansiz!")
 
+        await state.clear()
+
 
-@router.callback_query(F.data.startswith("vote_"))
-async def select_candidate(callback: CallbackQuery, db: Database, state: FSMContext):
+@callback_table.register(callbacks.VOTE)
+async def select_candidate(callback: CallbackQuery, db: Database, state: FSMContext, candidate_id: int):
     """Nomzodni tanlash (bot ichidan)"""
     await callback.answer()
-    candidate_id = int(callback.data.split("_")[1])
     data = await state.get_data()
     contest_id = data.get('contest_id')
     candidates = await db.get_candidates(contest_id)
@@ -282,31 +356,45 @@ async def select_candidate(callback: CallbackQuery, db: Database, state: FSMCont
     text = f"❓ <b>Tasdiqlang</b>\n\nSiz <b>{candidate['name']}</b> ga ovoz berasiz?\n\nOvozingizni tasdiqlaysizmi?"
 
     if callback.message.photo:
-        await callback.message.answer(text, reply_markup=confirm_vote_keyboard(candidate_id))
+        await callback.message.answer(text, reply_markup=confirm_vote_keyboard(contest_id, candidate_id))
     else:
-        await callback.message.edit_text(text, reply_markup=confirm_vote_keyboard(candidate_id))
+        await callback.message.edit_text(text, reply_markup=confirm_vote_keyboard(contest_id, candidate_id))
 
     await state.update_data(candidate_id=candidate_id)
     await state.set_state(VotingStates.confirming_vote)
 
 
-@router.callback_query(F.data.startswith("confirm_vote_"))
-async def confirm_vote(callback: CallbackQuery, db: Database, state: FSMContext):
+@callback_table.register(callbacks.CONFIRM_VOTE)
+@callback_table.register(callbacks.CONFIRM_VOTE_LEGACY)
+async def confirm_vote(callback: CallbackQuery, db: Database, state: FSMContext, lifecycle: ContestScheduler,
+                       candidate_id: int, contest_id: int = None):
 
     await callback.answer()
-    candidate_id = int(callback.data.split("_")[2])
-    data = await state.get_data()
-    contest_id = data.get('contest_id')
+    if contest_id is None:
+        # Eski tugma: konkurs faqat FSM da
+        data = await state.get_data()
+        contest_id = data.get('contest_id')
     user = callback.from_user
 
+    candidates = await db.get_candidates(contest_id) if contest_id else []
+    candidate = next((c for c in candidates if c['id'] == candidate_id), None)
+    if not candidate:
+        await callback.message.edit_text("❌ Nomzod topilmadi! Qaytadan boshlang.")
+        await state.clear()
+        return
+
+    if not await lifecycle.is_accepting(contest_id):
+        await callback.message.edit_text("⌛️ Konkurs tugagan!")
+        return
+
     # Ovoz qo'shish
     success = await db.add_vote(contest_id, candidate_id, user.id, user.username)
+    if success is None:
+        return
 
     if success:
         await update_channel_post(callback.bot, db, contest_id)
 
-        candidates = await db.get_candidates(contest_id)
-        candidate = next((c for c in candidates if c['id'] == candidate_id), None)
         text = f"✅ <b>Ovozingiz qabul qilindi!</b>\nSiz <b>{candidate['name']}</b> ga ovoz berdingiz.\n\nRahmat! 🎉"
         await callback.message.edit_text(text)
         log_user_action(user.id, user.username, f"VOTED: {candidate['name']}")
@@ -316,7 +404,13 @@ async def confirm_vote(callback: CallbackQuery, db: Database, state: FSMContext)
     await state.clear()
 
 
-@router.callback_query(F.data == "cancel_vote")
+@callback_table.register(callbacks.IGNORE)
+async def ignore_callback(callback: CallbackQuery):
+    """Ma'lumot uchun tugmalar (yakuniy natijalar, bo'sh ro'yxat)"""
+    await callback.answer()
+
+
+@callback_table.register(callbacks.CANCEL_VOTE)
 async def cancel_vote(callback: CallbackQuery, state: FSMContext):
     """Bekor qilish"""
     await callback.answer("Bekor qilindi")
@@ -324,10 +418,9 @@ async def cancel_vote(callback: CallbackQuery, state: FSMContext):
     await state.clear()
 
 @router.message(F.text == "🗳 Ovoz berish")
-async def vote_button(message: Message, db: Database, state: FSMContext):
-    """Bot ichidan ovoz berish tugmasi"""
+async def vote_button(message: Message, db: Database, state: FSMContext, lifecycle: ContestScheduler):
+    """Bot ichidan ovoz berish tugmasi: bitta konkurs bo'lsa darhol, bir nechta bo'lsa tanlash"""
     user = message.from_user
-    user_is_admin = is_admin(user.id)
 
     if not await db.check_rate_limit(user.id):
         await message.answer("⏳ Iltimos, biroz kuting...")
@@ -335,27 +428,62 @@ async def vote_button(message: Message, db: Database, state: FSMContext):
 
     await db.update_user_activity(user.id, user.username)
 
-    contest = await db.get_active_contest()
-    if not contest:
-        await message.answer("❌ Hozirda faol konkurs yo'q.", reply_markup=main_menu_keyboard(user_is_admin))
+    contests = await db.get_active_contests()
+    if not contests:
+        await message.answer("❌ Hozirda faol konkurs yo'q.", reply_markup=main_menu_keyboard(is_admin(user.id)))
         return
 
-    now = datetime.now()
-    if now < contest['start_date']:
+    if len(contests) > 1:
+        states = {contest['id']: lifecycle.state(contest) for contest in contests}
+        contests = [contest for contest in contests if states[contest['id']] != CLOSED]
+    if len(contests) > 1:
+        # Barcha konkurslar holati bitta so'rov bilan
+        voted = await db.get_voted_contests([contest['id'] for contest in contests], user.id)
+        upcoming = {contest_id for contest_id, contest_state in states.items() if contest_state == UPCOMING}
+        await message.answer(
+            "🗳 <b>Faol konkurslar</b>\n\nQaysi konkursda ovoz berasiz?",
+            reply_markup=contest_picker_keyboard(contests, voted, upcoming)
+        )
+        return
+    if not contests:
+        await message.answer("⌛️ Konkurs tugagan!")
+        return
+
+    await start_contest_voting(message, user, db, state, contests[0]['id'])
+
+
+@callback_table.register(callbacks.PICK_CONTEST)
+async def pick_contest(callback: CallbackQuery, db: Database, state: FSMContext, contest_id: int):
+    """Ro'yxatdan konkurs tanlash"""
+    await callback.answer()
+    await start_contest_voting(callback.message, callback.from_user, db, state, contest_id)
+
+
+async def start_contest_voting(message: Message, user, db: Database, state: FSMContext, contest_id: int):
+    """Tanlangan konkurs: holat, ovoz berganlik va obunani tekshirib nomzodlarni ko'rsatish.
+
+    Hammasi bitta snapshot so'rovidan olinadi (nomzodlar soni reytingga ham qo'llanadi).
+    """
+    snapshot = await db.get_vote_snapshot(contest_id, user.id)
+    if not snapshot:
+        await message.answer("❌ Konkurs topilmadi!")
+        return
+
+    contest = snapshot['contest']
+    if snapshot['state'] == UPCOMING:
         await message.answer(
             f"⏰ Konkurs hali boshlanmagan!\n📅 Boshlanish: {contest['start_date'].strftime('%d.%m.%Y %H:%M')}")
         return
-    if now > contest['end_date']:
+    if snapshot['state'] == CLOSED:
         await message.answer("⌛️ Konkurs tugagan!")
         return
-    if await db.has_voted(contest['id'], user.id):
+    if snapshot['has_voted']:
         await message.answer("✅ Siz allaqachon ovoz bergansiz!\n📊 Natijalarni ko'ring.",
-                             reply_markup=main_menu_keyboard(user_is_admin))
+                             reply_markup=main_menu_keyboard(is_admin(user.id)))
         return
 
-    channels = await db.get_contest_channels(contest['id'])
     not_subscribed = []
-    for channel in channels or []:
+    for channel in snapshot['channels']:
         try:
             member = await message.bot.get_chat_member(channel['channel_id'], user.id)
             if member.status in ['left', 'kicked']:
@@ -368,17 +496,17 @@ async def vote_button(message: Message, db: Database, state: FSMContext):
         kb = InlineKeyboardBuilder()
         for i, channel in enumerate(not_subscribed, 1):
             kb.button(text=f"📢 {i}. {channel['channel_name']}", url=channel['channel_link'])
-        kb.button(text="✅ Obunani tekshirish", callback_data="check_subscription_vote")
+        kb.button(text="✅ Obunani tekshirish", callback_data=callbacks.CHECK_SUB_VOTE.pack())
         kb.adjust(1)
         await message.answer(text, reply_markup=kb.as_markup())
         await state.update_data(contest_id=contest['id'])
         await state.set_state(VotingStates.waiting_for_subscription)
         return
 
-    await show_contest_post_for_voting(message, db, contest['id'], state)
+    await show_contest_post_for_voting(message, db, contest, state)
 
 
-@router.callback_query(F.data == "check_subscription_vote")
+@callback_table.register(callbacks.CHECK_SUB_VOTE)
 async def check_subscription_vote(callback: CallbackQuery, db: Database, state: FSMContext):
     """Obunani tekshirish (bot ichidan)"""
     await callback.answer("Tekshirilmoqda...")
@@ -405,7 +533,7 @@ async def check_subscription_vote(callback: CallbackQuery, db: Database, state:
         kb = InlineKeyboardBuilder()
         for i, channel in enumerate(not_subscribed, 1):
             kb.button(text=f"📢 {i}. {channel['channel_name']}", url=channel['channel_link'])
-        kb.button(text="🔄 Qayta tekshirish", callback_data="check_subscription_vote")
+        kb.button(text="🔄 Qayta tekshirish", callback_data=callbacks.CHECK_SUB_VOTE.pack())
         kb.adjust(1)
         try:
             await callback.message.edit_text(text, reply_markup=kb.as_markup())
@@ -414,7 +542,8 @@ async def check_subscription_vote(callback: CallbackQuery, db: Database, state:
     else:
         await callback.answer("✅ Obuna tasdiqlandi!", show_alert=True)
         await callback.message.delete()
-        await show_contest_post_for_voting(callback.message, db, contest_id, state)
+        contest = await db.get_contest_by_id(contest_id)
+        await show_contest_post_for_voting(callback.message, db, contest, state)
 
 @router.message(F.text == "📊 Natijalar")
 async def show_results(message: Message, db: Database):
@@ -424,8 +553,7 @@ async def show_results(message: Message, db: Database):
         await message.answer("❌ Faol konkurs yo'q")
         return
 
-    results = await db.get_vote_results(contest['id'])
-    text = format_results_text(results, contest['name'])
+    text = await db.results.get_results_text(contest['id'], contest['name'])
     await message.answer(text)
     log_user_action(message.from_user.id, message.from_user.username, "VIEW_RESULTS")
 
@@ -438,9 +566,10 @@ async def show_info(message: Message, db: Database):
         text += f"🗳 <b>Joriy konkurs:</b> {contest['name']}\n"
         text += f"📅 Boshlanish: {contest['start_date'].strftime('%d.%m.%Y %H:%M')}\n"
         text += f"⏰ Tugash: {contest['end_date'].strftime('%d.%m.%Y %H:%M')}\n\n"
-        stats = await db.get_detailed_report(contest['id'])
-        text += f"👥 Ishtirokchilar: {stats['stats']['total_voters']}\n"
-        text += f"🗳 Jami ovozlar: {stats['stats']['total_votes']}\n\n"
+        # Keshlangan reyting (reads pool): har bir user bitta ovoz beradi - ishtirokchilar = ovozlar
+        board = await db.results.get_leaderboard(contest['id'])
+        text += f"👥 Ishtirokchilar: {board.total}\n"
+        text += f"🗳 Jami ovozlar: {board.total}\n\n"
     else:
         text += "❌ Hozirda faol konkurs yo'q\n\n"
 
@@ -450,4 +579,25 @@ async def show_info(message: Message, db: Database):
     text += "• Natijalar real vaqtda yangilanadi\n"
     text += "• Ovozlar soni kanalda ham ko'rinadi\n"
 
-    await message.answer(text)
\ No newline at end of file
+    await message.answer(text)
+
+
+@router.message(VotingStates.searching_candidate, F.text)
+async def candidate_search(message: Message, db: Database, state: FSMContext):
+    """Qidiruv natijalari - topilgan nomzodlar tugmalari"""
+    data = await state.get_data()
+    contest_id = data.get('search_contest_id')
+    await _finish_search(state)
+    if not contest_id:
+        return
+
+    board = await db.results.get_leaderboard(contest_id)
+    keyboard, found = search_results_keyboard(board, contest_id, message.text.strip(), data.get('search_deep', False))
+
+    if not found:
+        text = "❌ Bunday nomzod topilmadi."
+    elif found > config.CANDIDATES_PAGE_SIZE:
+        text = f"🔍 {found} ta nomzod topildi, birinchi {config.CANDIDATES_PAGE_SIZE} tasi:"
+    else:
+        text = f"🔍 {found} ta nomzod topildi:"
+    await message.answer(text, reply_markup=keyboard)
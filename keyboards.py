@@ -5,7 +5,11 @@ from aiogram.types import (
     KeyboardButton
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import List, Dict
+from typing import List, Dict, Set
+
+import callbacks
+import config
+from callbacks import Action
 
 
 def main_menu_keyboard(is_admin: bool = False) -> ReplyKeyboardMarkup:
@@ -29,7 +33,7 @@ def admin_menu_keyboard() -> ReplyKeyboardMarkup:
         [KeyboardButton(text="➕ Yangi konkurs"), KeyboardButton(text="📊 Natijalar")],
         [KeyboardButton(text="📋 Batafsil hisobot"), KeyboardButton(text="📥 Eksport")],
         [KeyboardButton(text="⏸ Konkursni to'xtatish"), KeyboardButton(text="📚 Arxiv")],
-        [KeyboardButton(text="🗑 Ovozlarni tozalash")],
+        [KeyboardButton(text="🗑 Ovozlarni tozalash"), KeyboardButton(text="📣 Xabar yuborish")],
         [KeyboardButton(text="⬅️ Orqaga")]
     ]
 
@@ -73,7 +77,7 @@ def channels_keyboard(channels: List[Dict]) -> InlineKeyboardMarkup:
     keyboard.append([
         InlineKeyboardButton(
             text="✅ Obunani tekshirish",
-            callback_data="check_subscription"
+            callback_data=callbacks.CHECK_SUB.pack()
         )
     ])
 
@@ -82,9 +86,16 @@ def channels_keyboard(channels: List[Dict]) -> InlineKeyboardMarkup:
 
 def vote_keyboard(candidates: List[Dict], contest_id: int,
                   bot_username: str = "uznmc_bot") -> InlineKeyboardMarkup:
+    """Kanal posti tugmalari. Nomzodlar ko'p bo'lsa faqat yetakchilar va "Barchasini ko'rish" havolasi"""
 
     kb = InlineKeyboardBuilder()
 
+    hidden = len(candidates) - config.CHANNEL_POST_TOP_N
+    if hidden > 0:
+        # Tahrir so'rovi kichik qolishi uchun faqat yetakchilar
+        candidates = sorted(candidates, key=lambda c: c.get('vote_count', 0), reverse=True)
+        candidates = candidates[:config.CHANNEL_POST_TOP_N]
+
     for candidate in candidates:
         vote_count = candidate.get('vote_count', 0)
 
@@ -99,6 +110,44 @@ def vote_keyboard(candidates: List[Dict], contest_id: int,
             url=deep_link
         )
 
+    if hidden > 0:
+        kb.button(
+            text=f"📋 Barchasini ko'rish (+{hidden})",
+            url=f"https://t.me/{bot_username}?start=contest_{contest_id}"
+        )
+
+    kb.adjust(1)
+    return kb.as_markup()
+
+
+def contest_picker_keyboard(contests: List[Dict], voted: Set[int], upcoming: Set[int]) -> InlineKeyboardMarkup:
+    """Bir nechta faol konkurs: holati bilan tanlash ro'yxati"""
+    kb = InlineKeyboardBuilder()
+
+    for contest in contests:
+        if contest['id'] in voted:
+            status = "✅"
+        elif contest['id'] in upcoming:
+            status = "⏰"
+        else:
+            status = "🗳"
+        name = contest['name'][:40] + "..." if len(contest['name']) > 40 else contest['name']
+        kb.button(text=f"{status} {name}", callback_data=callbacks.PICK_CONTEST.pack(contest['id']))
+
+    kb.adjust(1)
+    return kb.as_markup()
+
+
+def final_results_keyboard(candidates: List[Dict]) -> InlineKeyboardMarkup:
+    """Tugagan konkurs posti uchun: ovoz berish havolalarisiz yakuniy natijalar"""
+    kb = InlineKeyboardBuilder()
+
+    ranked = sorted(candidates, key=lambda c: c.get('vote_count', 0), reverse=True)
+    for i, candidate in enumerate(ranked[:config.CHANNEL_POST_TOP_N], 1):
+        medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "▫️"
+        formatted_count = format_vote_count(candidate.get('vote_count', 0))
+        kb.button(text=f"{medal} {candidate['name']} - {formatted_count}", callback_data=callbacks.IGNORE.pack())
+
     kb.adjust(1)
     return kb.as_markup()
 
@@ -116,7 +165,7 @@ def candidates_keyboard(candidates: List[Dict], show_results: bool = False) -> I
         keyboard.append([
             InlineKeyboardButton(
                 text=text,
-                callback_data=f"vote_{candidate['id']}" if not show_results else f"view_{candidate['id']}"
+                callback_data=(callbacks.VIEW_CANDIDATE if show_results else callbacks.VOTE).pack(candidate['id'])
             )
         ])
 
@@ -124,42 +173,93 @@ def candidates_keyboard(candidates: List[Dict], show_results: bool = False) -> I
         keyboard.append([
             InlineKeyboardButton(
                 text="🔄 Yangilash",
-                callback_data="refresh_results"
+                callback_data=callbacks.REFRESH_RESULTS.pack()
             )
         ])
 
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def confirm_vote_keyboard(candidate_id: int) -> InlineKeyboardMarkup:
-    """Ovozni tasdiqlash klaviaturasi"""
+def confirm_vote_keyboard(contest_id: int, candidate_id: int) -> InlineKeyboardMarkup:
+    """Ovozni tasdiqlash klaviaturasi (konkurs tugmaning o'zida - FSM holati o'chsa ham ishlaydi)"""
     keyboard = [
         [
-            InlineKeyboardButton(text="✅ Ha, tasdiqlash", callback_data=f"confirm_vote_{candidate_id}"),
-            InlineKeyboardButton(text="❌ Bekor qilish", callback_data="cancel_vote")
+            InlineKeyboardButton(text="✅ Ha, tasdiqlash",
+                                 callback_data=callbacks.CONFIRM_VOTE.pack(contest_id, candidate_id)),
+            InlineKeyboardButton(text="❌ Bekor qilish", callback_data=callbacks.CANCEL_VOTE.pack())
         ]
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def archive_keyboard(contests: List[Dict]) -> InlineKeyboardMarkup:
+def page_nav_row(action: Action, contests: List[Dict],
+                 has_prev: bool, has_next: bool) -> List[InlineKeyboardButton]:
+    """Sahifalash tugmalari (kursor - chegaradagi konkurs ID si)"""
+    row = []
+    if contests and has_prev:
+        row.append(InlineKeyboardButton(
+            text="⬅️ Oldingi",
+            callback_data=action.pack(False, contests[0]['id'])
+        ))
+    if contests and has_next:
+        row.append(InlineKeyboardButton(
+            text="Keyingi ➡️",
+            callback_data=action.pack(True, contests[-1]['id'])
+        ))
+    return row
+
+
+def archive_keyboard(contests: List[Dict], has_prev: bool = False,
+                     has_next: bool = False) -> InlineKeyboardMarkup:
     """Arxiv klaviaturasi"""
     keyboard = []
 
     if not contests:
         keyboard.append([
-            InlineKeyboardButton(text="📭 Arxiv bo'sh", callback_data="ignore")
+            InlineKeyboardButton(text="📭 Arxiv bo'sh", callback_data=callbacks.IGNORE.pack())
         ])
     else:
         for contest in contests:
-            text = f"📁 {contest['name']} ({contest['total_voters']} ovoz)"
+            text = f"📁 {contest['name']} ({contest['end_date'].strftime('%d.%m.%Y')})"
             keyboard.append([
                 InlineKeyboardButton(
                     text=text,
-                    callback_data=f"archive:{contest['id']}"
+                    callback_data=callbacks.ARCHIVE.pack(contest['id'])
                 )
             ])
 
+    nav_row = page_nav_row(callbacks.ARCHIVE_PAGE, contests, has_prev, has_next)
+    if nav_row:
+        keyboard.append(nav_row)
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def export_contests_keyboard(contests: List[Dict], has_prev: bool = False,
+                             has_next: bool = False) -> InlineKeyboardMarkup:
+    """Eksport uchun konkurslar klaviaturasi"""
+    keyboard = []
+
+    for contest in contests:
+        if contest['is_active']:
+            status = "🟢"
+        elif contest.get('is_archived'):
+            status = "📁"
+        else:
+            status = "⚪️"
+
+        name = contest['name'][:40] + "..." if len(contest['name']) > 40 else contest['name']
+        keyboard.append([
+            InlineKeyboardButton(
+                text=f"{status} {name}",
+                callback_data=callbacks.EXPORT_SELECT.pack(contest['id'])
+            )
+        ])
+
+    nav_row = page_nav_row(callbacks.EXPORT_PAGE, contests, has_prev, has_next)
+    if nav_row:
+        keyboard.append(nav_row)
+
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
@@ -167,22 +267,23 @@ def export_keyboard(contest_id: int) -> InlineKeyboardMarkup:
     """Eksport turini tanlash klaviaturasi"""
     keyboard = [
         [
-            InlineKeyboardButton(text="📊 Excel", callback_data=f"export:excel:{contest_id}"),
-            InlineKeyboardButton(text="📄 CSV", callback_data=f"export:csv:{contest_id}")
+            InlineKeyboardButton(text="📊 Excel", callback_data=callbacks.EXPORT_EXCEL.pack(contest_id)),
+            InlineKeyboardButton(text="📄 CSV", callback_data=callbacks.EXPORT_CSV.pack(contest_id))
         ],
         [
-            InlineKeyboardButton(text="📈 Grafik", callback_data=f"export:chart:{contest_id}")
+            InlineKeyboardButton(text="📈 Grafik", callback_data=callbacks.EXPORT_CHART.pack(contest_id)),
+            InlineKeyboardButton(text="🧮 Parquet", callback_data=callbacks.EXPORT_PARQUET.pack(contest_id))
         ]
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def yes_no_keyboard(action: str) -> InlineKeyboardMarkup:
-    """Ha/Yo'q klaviaturasi"""
+def yes_no_keyboard(yes_data: str, no_data: str) -> InlineKeyboardMarkup:
+    """Ha/Yo'q klaviaturasi (tugmalar uchun tayyor callback ma'lumotlari)"""
     keyboard = [
         [
-            InlineKeyboardButton(text="✅ Ha", callback_data=f"yes:{action}"),
-            InlineKeyboardButton(text="❌ Yo'q", callback_data=f"no:{action}")
+            InlineKeyboardButton(text="✅ Ha", callback_data=yes_data),
+            InlineKeyboardButton(text="❌ Yo'q", callback_data=no_data)
         ]
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
@@ -191,6 +292,6 @@ def yes_no_keyboard(action: str) -> InlineKeyboardMarkup:
 def back_keyboard() -> InlineKeyboardMarkup:
     """Orqaga qaytish tugmasi"""
     keyboard = [
-        [InlineKeyboardButton(text="⬅️ Orqaga", callback_data="back_to_menu")]
+        [InlineKeyboardButton(text="⬅️ Orqaga", callback_data=callbacks.BACK_TO_MENU.pack())]
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
\ No newline at end of file
@@ -0,0 +1,162 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+
+
+def _percentage(votes: int, total: int) -> Optional[float]:
+    return round(votes * 100.0 / total, 2) if total else None
+
+
+class Leaderboard:
+    """Bitta konkurs nomzodlarining xotiradagi reytingi.
+
+    Nomzod ovozi o'zgarsa u faqat qo'shnilari bilan almashib o'z o'rniga suriladi -
+    butun ro'yxat qayta saralanmaydi. Tartib: ovozlar (kamayish), keyin nom.
+    Top-N matni ko'rsatiladigan qiymatlar (o'rin, ovoz, foiz) o'zgargandagina
+    qayta yasaladi. `listing` - admin belgilagan tartib (position, nom), nomzodlar
+    sahifalari shundan kesiladi.
+    """
+
+    def __init__(self):
+        self.order: List[int] = []
+        self.listing: List[int] = []
+        self.pos: Dict[int, int] = {}
+        self.votes: Dict[int, int] = {}
+        self.info: Dict[int, Dict] = {}
+        self.total = 0
+        self.version = 0
+        self._ranking: Tuple[int, List[Dict]] = (-1, [])
+        self._top_text: Tuple[Optional[tuple], str] = (None, '')
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def apply(self, rows: Iterable[Dict]):
+        """DB dan olingan joriy sonlarni qo'llash (id, name, description, votes), position tartibida"""
+        listing = []
+        for row in rows:
+            candidate_id = row['id']
+            listing.append(candidate_id)
+            info = {'name': row['name'], 'description': row['description']}
+            if candidate_id not in self.votes:
+                self._insert(candidate_id, info, row['votes'])
+            elif self.info[candidate_id] != info:
+                # Nom o'zgargan - tartibdagi o'rni ham o'zgarishi mumkin
+                votes = self.votes[candidate_id]
+                self._remove(candidate_id)
+                self._insert(candidate_id, info, votes)
+            self.set_votes(candidate_id, row['votes'])
+
+        seen = set(listing)
+        for candidate_id in [c for c in self.votes if c not in seen]:
+            self._remove(candidate_id)
+        if listing != self.listing:
+            # Sahifalar keshi version bo'yicha - tartib o'zgarsa ham yangilanadi
+            self.listing = listing
+            self.version += 1
+
+    def set_votes(self, candidate_id: int, votes: int):
+        old = self.votes[candidate_id]
+        if votes == old:
+            return
+        self.votes[candidate_id] = votes
+        self.total += votes - old
+        self.version += 1
+
+        i = self.pos[candidate_id]
+        if votes > old:
+            while i > 0 and self._key(candidate_id) < self._key(self.order[i - 1]):
+                self._swap(i, i - 1)
+                i -= 1
+        else:
+            while i < len(self.order) - 1 and self._key(candidate_id) > self._key(self.order[i + 1]):
+                self._swap(i, i + 1)
+                i += 1
+
+    def rank(self, candidate_id: int) -> Optional[int]:
+        """Nomzod o'rni (1 dan), noma'lum nomzod uchun None"""
+        i = self.pos.get(candidate_id)
+        return i + 1 if i is not None else None
+
+    def top(self, n: Optional[int] = None) -> List[Dict]:
+        """Birinchi n ta nomzod (n=None - hammasi): candidate_name, votes, percentage"""
+        version, ranking = self._ranking
+        if version != self.version:
+            ranking = [self._entry(candidate_id) for candidate_id in self.order]
+            self._ranking = (self.version, ranking)
+        return ranking if n is None else ranking[:n]
+
+    def top_text(self) -> str:
+        """Top-N qismi matni (LEADERBOARD_TOP_N)"""
+        shown = self.order[:config.LEADERBOARD_TOP_N]
+        key = tuple(
+            (candidate_id, self.votes[candidate_id], _percentage(self.votes[candidate_id], self.total))
+            for candidate_id in shown
+        )
+        cached_key, text = self._top_text
+        if key == cached_key:
+            return text
+
+        text = ''
+        for i, (candidate_id, votes, percentage) in enumerate(key, 1):
+            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+            percentage = percentage or 0
+            bar = "█" * int(percentage / 5) + "░" * (20 - int(percentage / 5))
+            text += f"{medal} <b>{self.info[candidate_id]['name']}</b>\n"
+            text += f"   {bar} {percentage:.2f}% ({votes} ovoz)\n\n"
+        self._top_text = (key, text)
+        return text
+
+    def render(self, contest_name: str) -> str:
+        """Natijalar ekrani: jami ovozlar, top-N va qolganlar soni"""
+        text = f"📊 <b>{contest_name}</b>\n\n"
+        if not self.order:
+            return text + "❌ Hozircha ovozlar yo'q\n"
+
+        text += f"📈 Jami ovozlar: <b>{self.total}</b>\n\n"
+        text += self.top_text()
+        hidden = len(self.order) - config.LEADERBOARD_TOP_N
+        if hidden > 0:
+            text += f"... va yana {hidden} ta nomzod\n"
+        return text
+
+    def _entry(self, candidate_id: int) -> Dict:
+        votes = self.votes[candidate_id]
+        return {
+            'candidate_id': candidate_id,
+            'candidate_name': self.info[candidate_id]['name'],
+            'description': self.info[candidate_id]['description'],
+            'votes': votes,
+            'percentage': _percentage(votes, self.total),
+        }
+
+    def _key(self, candidate_id: int) -> tuple:
+        return -self.votes[candidate_id], self.info[candidate_id]['name'], candidate_id
+
+    def _swap(self, i: int, j: int):
+        order = self.order
+        order[i], order[j] = order[j], order[i]
+        self.pos[order[i]] = i
+        self.pos[order[j]] = j
+
+    def _insert(self, candidate_id: int, info: Dict, votes: int):
+        # Oxiriga 0 ovoz bilan qo'shib, set_votes orqali o'z o'rniga suriladi
+        self.info[candidate_id] = info
+        self.votes[candidate_id] = 0
+        self.pos[candidate_id] = len(self.order)
+        self.order.append(candidate_id)
+        self.version += 1
+        i = len(self.order) - 1
+        while i > 0 and self._key(candidate_id) < self._key(self.order[i - 1]):
+            self._swap(i, i - 1)
+            i -= 1
+        self.set_votes(candidate_id, votes)
+
+    def _remove(self, candidate_id: int):
+        i = self.pos.pop(candidate_id)
+        self.order.pop(i)
+        for j in range(i, len(self.order)):
+            self.pos[self.order[j]] = j
+        self.total -= self.votes.pop(candidate_id)
+        del self.info[candidate_id]
+        self.version += 1
@@ -0,0 +1,224 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiogram import Bot
+
+import config
+from database import Database
+from keyboards import final_results_keyboard
+from outbound import Priority, outbound_priority
+from channel_posts import edit_contest_posts
+
+logger = logging.getLogger(__name__)
+
+UPCOMING = 'upcoming'
+OPEN = 'open'
+CLOSED = 'closed'
+
+# Coordinator dagi singleton vazifa nomi (bot.py)
+TIMERS_JOB = 'contest_lifecycle'
+
+
+class ContestScheduler:
+    """Konkurslarning boshlanish va tugash vaqtlarini kuzatuvchi fon jarayoni.
+
+    Holat (`state()`) har bir replikada konkurs vaqtlari va joriy vaqtdan
+    hisoblanadi. Taymerlar esa singleton vazifa (`run_timers`) - faqat lider
+    replikada ishlaydi: tugash vaqtida konkurs yopiladi, natijalar muzlatiladi,
+    kanal posti oxirgi marta yangilanadi va adminlarga xabar boriladi.
+    Lider almashganda yangi lider o'tib ketgan vaqtlarni ham darhol bajaradi.
+    Handlerlar har so'rovda sanani solishtirish o'rniga `state()` dan foydalanadi.
+    """
+
+    def __init__(self, bot: Bot, db: Database):
+        self.bot = bot
+        self.db = db
+        self.closed: Set[int] = set()
+        self._windows: Dict[int, Tuple[datetime, datetime]] = {}
+        # contests.votes_epoch: ovozlar tozalanganini boshqa replikalar shu orqali biladi
+        self.votes_epochs: Dict[int, int] = {}
+        self._heap: List[Tuple[datetime, int]] = []
+        self._started: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.reload()
+        self._task = asyncio.create_task(self._reload_loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def reload(self):
+        """Faol konkurslarni DB dan qayta o'qish (boshqa replikadagi o'zgarishlar uchun)"""
+        contests = await self.db.get_contest_windows()
+        active_ids = {contest['id'] for contest in contests}
+        for contest in contests:
+            self.schedule(contest)
+        for contest_id in list(self._windows):
+            if contest_id not in active_ids:
+                self.mark_closed(contest_id)
+
+    def schedule(self, contest: Dict):
+        """Konkurs vaqtlarini taymerlarga qo'shish yoki yangilash"""
+        contest_id = contest['id']
+        if 'votes_epoch' in contest:
+            self.votes_epochs[contest_id] = contest['votes_epoch']
+        window = (contest['start_date'], contest['end_date'])
+        if self._windows.get(contest_id) == window:
+            return
+
+        self._windows[contest_id] = window
+        self.closed.discard(contest_id)
+        if not self.db.coordinator.is_leader(TIMERS_JOB):
+            # Heap ni faqat taymer egasi bo'shatadi; lease olinganda _windows dan quriladi
+            return
+        for moment in window:
+            heapq.heappush(self._heap, (moment, contest_id))
+        self._wakeup.set()
+
+    def mark_closed(self, contest_id: int):
+        self._windows.pop(contest_id, None)
+        self.votes_epochs.pop(contest_id, None)
+        self.closed.add(contest_id)
+
+    def state(self, contest: Dict) -> str:
+        """Konkurs holati: upcoming / open / closed (keshdan)"""
+        if not contest['is_active'] or contest.get('is_archived'):
+            return CLOSED
+        if contest['id'] not in self._windows and contest['id'] not in self.closed:
+            # Boshqa replikada yaratilgan konkurs - keyingi reload ni kutmasdan
+            self.schedule(contest)
+        return self._state(contest['id'])
+
+    async def is_accepting(self, contest_id: int) -> bool:
+        if contest_id not in self._windows and contest_id not in self.closed:
+            # Noma'lum konkurs (restartdan oldin arxivlangan yoki boshqa replikada
+            # yaratilgan) - keyingi reload ni kutmasdan DB dan o'qiladi
+            contest = await self.db.get_contest_by_id(contest_id)
+            if contest is None:
+                return False
+            if self.state(contest) == CLOSED:
+                self.mark_closed(contest_id)
+                return False
+        return self._state(contest_id) == OPEN
+
+    def open_contests(self) -> Set[int]:
+        """Hozir ovoz qabul qilayotgan konkurslar"""
+        now = datetime.now()
+        return {contest_id for contest_id, window in self._windows.items()
+                if self._state_at(window, now) == OPEN}
+
+    def _state(self, contest_id: int) -> str:
+        window = self._windows.get(contest_id)
+        if window is None:
+            return CLOSED
+        return self._state_at(window, datetime.now())
+
+    @staticmethod
+    def _state_at(window: Tuple[datetime, datetime], now: datetime) -> str:
+        start_date, end_date = window
+        if now < start_date:
+            return UPCOMING
+        if now >= end_date:
+            return CLOSED
+        return OPEN
+
+    async def _reload_loop(self):
+        while True:
+            await asyncio.sleep(config.LIFECYCLE_RELOAD_INTERVAL)
+            try:
+                await self.reload()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Konkurs vaqtlarini qayta o'qishda xato: {e}", exc_info=True)
+
+    async def run_timers(self):
+        """Singleton vazifa: boshlanish/tugash taymerlari (faqat lider replikada)"""
+        # Oldingi liderlikdan qolgan heap eskirgan bo'lishi mumkin
+        self._heap = [(moment, contest_id)
+                      for contest_id, window in self._windows.items() for moment in window]
+        heapq.heapify(self._heap)
+        self._started = {contest_id for contest_id, window in self._windows.items()
+                         if self._state_at(window, datetime.now()) != UPCOMING}
+
+        try:
+            await self._timer_loop()
+        finally:
+            # Lease yo'qotildi - heap endi o'smasligi kerak
+            self._heap = []
+
+    async def _timer_loop(self):
+        while True:
+            try:
+                await self._fire_due()
+
+                delay = config.LIFECYCLE_RELOAD_INTERVAL
+                if self._heap:
+                    delay = min(delay, max((self._heap[0][0] - datetime.now()).total_seconds(), 0))
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Lifecycle scheduler xato: {e}", exc_info=True)
+                await asyncio.sleep(5)
+
+    async def _fire_due(self):
+        now = datetime.now()
+        while self._heap and self._heap[0][0] <= now:
+            _, contest_id = heapq.heappop(self._heap)
+            window = self._windows.get(contest_id)
+            if window is None:
+                continue
+
+            state = self._state_at(window, now)
+            if state == OPEN and contest_id not in self._started:
+                self._started.add(contest_id)
+                logger.info(f"Konkurs {contest_id} boshlandi")
+            elif state == CLOSED:
+                await self._close(contest_id, now)
+
+    async def _close(self, contest_id: int, now: datetime):
+        self.mark_closed(contest_id)
+        if not await self.db.close_due_contest(contest_id, now):
+            # Boshqa replika yoki admin allaqachon yopgan
+            return
+
+        contest = await self.db.get_contest_by_id(contest_id)
+        candidates = await self.db.get_candidates(contest_id)
+        board = await self.db.results.get_leaderboard(contest_id)
+
+        with outbound_priority(Priority.LOW):
+            await self._finalize_channel_post(contest_id, candidates)
+            await self._notify_admins(contest, board.top(3))
+
+    async def _finalize_channel_post(self, contest_id: int, candidates: List[Dict]):
+        try:
+            await edit_contest_posts(self.bot, self.db, contest_id, final_results_keyboard(candidates))
+        except Exception as e:
+            logger.error(f"Yakuniy kanal postini yangilashda xato (Contest {contest_id}): {e}")
+
+    async def _notify_admins(self, contest: Dict, winners: List[Dict]):
+        text = f"⌛️ <b>Konkurs muddati tugadi!</b>\n\n🗳 {contest['name']}\n"
+        text += f"📊 Jami ovozlar: {contest['final_total_votes'] or 0}\n\n"
+        for i, candidate in enumerate(winners, 1):
+            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
+            text += f"{medal} <b>{candidate['candidate_name']}</b> - {candidate['votes']} ovoz\n"
+        text += "\n📁 Konkurs arxivga o'tkazildi."
+
+        for admin_id in config.ADMIN_IDS:
+            try:
+                await self.bot.send_message(admin_id, text)
+            except Exception as e:
+                logger.error(f"Adminga xabar yuborishda xato: {e}")
@@ -0,0 +1,90 @@
+import inspect
+import logging
+from typing import Any, Dict, Hashable, Tuple
+
+from concurrency import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Bitta update davomida natijasi qayta ishlatiladigan o'qishlar
+MEMOIZED = frozenset({
+    'get_active_contest',
+    'get_active_contests',
+    'get_all_active_contests',
+    'get_contest_by_id',
+    'get_contest_channels',
+    'get_contest_posts',
+    'get_candidates',
+    'get_vote_snapshot',
+    'has_voted',
+})
+
+
+class RequestLoader:
+    """Bitta update uchun Database o'ramasi (db_middleware da yaratiladi).
+
+    MEMOIZED dagi o'qishlar update davomida bir marta bajariladi: takroriy
+    chaqiruv keshdan, parallel bir xil chaqiruvlar esa bitta so'rovdan javob
+    oladi. Boshqa har qanday DB chaqiruvi (ovoz, yozuvlar) keshni tozalaydi.
+    Update tugagach (`close`) o'rama oddiy Database kabi ishlaydi - fonda
+    qolgan vazifalar eskirgan natija olmaydi. Qaytarilgan natijalar umumiy,
+    chaqiruvchi ularni o'zgartirmasligi kerak.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.calls = 0
+        self.hits = 0
+        self._memo: Dict[Tuple[str, Hashable], Any] = {}
+        self._flight = SingleFlight()
+        # Har bir yozuvda oshadi: yozuvdan oldin boshlangan o'qish natijasi saqlanmaydi
+        self._generation = 0
+        self._closed = False
+
+    def close(self, event_name: str):
+        self._closed = True
+        self._memo.clear()
+        logger.info(f"{event_name}: {self.calls} ta DB chaqiruvi, {self.hits} ta keshdan",
+                    extra={'event': 'DB_CALLS'})
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.db, name)
+        if not inspect.iscoroutinefunction(attr):
+            # results, voters, coordinator, stream_votes va h.k.
+            return attr
+
+        if name in MEMOIZED:
+            async def load(*args):
+                return await self._load(name, attr, args)
+        else:
+            async def load(*args, **kwargs):
+                self._generation += 1
+                self._memo.clear()
+                self.calls += 1
+                return await attr(*args, **kwargs)
+
+        # Keyingi murojaatlar __getattr__ ga tushmaydi
+        self.__dict__[name] = load
+        return load
+
+    async def _load(self, name: str, method, args: tuple):
+        if self._closed:
+            self.calls += 1
+            return await method(*args)
+
+        key = (name, args)
+        if key in self._memo:
+            self.hits += 1
+            return self._memo[key]
+
+        generation = self._generation
+        result, shared = await self._flight.do((generation, *key), self._fetch, method, args)
+        if shared:
+            self.hits += 1
+        elif generation == self._generation:
+            self._memo[key] = result
+        return result
+
+    async def _fetch(self, method, args: tuple):
+        self.calls += 1
+        return await method(*args)
@@ -0,0 +1,128 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+import config
+
+# LogRecord ning standart atributlari - qolganlari extra maydonlar sifatida JSON ga yoziladi
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Bir qator - bitta JSON yozuv"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Ko'p takrorlanadigan INFO yozuvlarning faqat bir qismini qoldirish.
+
+    Ulush faqat `event` (extra) bo'yicha olinadi - event siz yozuvlar va
+    WARNING va undan yuqori yozuvlar doim o'tadi.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self.rates.get(getattr(record, 'event', None))
+        if rate is None or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Navbat to'lsa kutmaydi - yozuv tashlanadi va sanaladi"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Matn shu yerda tayyorlanadi, traceback alohida maydonda qoladi
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_pipeline: Dict = {}
+
+
+def setup_logging_pipeline():
+    """Handler larni fon oqimiga ko'chirish: event loop faqat navbatga qo'yadi"""
+    log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+
+    file_handler = RotatingFileHandler(
+        config.LOG_FILE,
+        maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    sampler = SamplingFilter(config.LOG_SAMPLE_RATES)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(sampler)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    # Jarayon tugaganda navbatdagi yozuvlar diskka yozib bo'linadi
+    atexit.register(listener.stop)
+
+    _pipeline.update(queue=log_queue, handler=queue_handler, sampler=sampler, listener=listener)
+
+
+def get_log_stats() -> Optional[Dict]:
+    """Navbat hajmi, tashlangan va sampling orqali o'tkazib yuborilgan yozuvlar"""
+    if not _pipeline:
+        return None
+    return {
+        'queued': _pipeline['queue'].qsize(),
+        'capacity': config.LOG_QUEUE_SIZE,
+        'dropped': _pipeline['handler'].dropped,
+        'sampled_out': _pipeline['sampler'].sampled_out,
+    }
@@ -0,0 +1,662 @@
+import asyncio
+import asyncpg
+import logging
+from typing import Callable, List
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Barcha replikalar uchun bitta advisory lock kaliti
+MIGRATION_LOCK_KEY = 7_302_028
+# Katta ma'lumot ko'chirishlarida bitta so'rovdagi qatorlar
+MIGRATION_BATCH_SIZE = 100_000
+# Lock band bo'lsa qayta urinish oralig'i (sekund)
+MIGRATION_LOCK_POLL_INTERVAL = 1
+
+
+def vote_partition(contest_id: int) -> str:
+    """Konkurs ovozlari saqlanadigan partitsiya nomi"""
+    return f"votes_c{int(contest_id)}"
+
+
+async def create_vote_partition(conn, contest_id: int):
+    await conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {vote_partition(contest_id)}
+        PARTITION OF votes FOR VALUES IN ({int(contest_id)})
+    ''')
+
+
+async def freeze_results(conn, contest_id: int):
+    """Yakuniy natijalarni contests/candidates jadvallariga muzlatish"""
+    await conn.execute('''
+        UPDATE candidates c
+        SET final_votes = (
+            SELECT COUNT(*) FROM votes v
+            WHERE v.contest_id = $1 AND v.candidate_id = c.id
+        )
+        WHERE c.contest_id = $1
+    ''', contest_id)
+    await conn.execute('''
+        UPDATE contests
+        SET final_total_votes = s.total_votes, final_total_voters = s.total_voters
+        FROM (
+            SELECT COUNT(*) AS total_votes, COUNT(DISTINCT user_id) AS total_voters
+            FROM votes WHERE contest_id = $1
+        ) s
+        WHERE id = $1
+    ''', contest_id)
+
+
+STATS_SLOTS = 16  # Hisoblagich qatorlari: parallel ovozlar bitta qatorga navbat turmasligi uchun
+
+
+async def reset_vote_counters(conn, contest_id: int):
+    """TRUNCATE triggerlarni chaqirmaydi - hisoblagichlarni qo'lda kamaytirish.
+
+    Tranzaksiya ichida, partitsiya TRUNCATE qilinishidan oldin chaqiriladi.
+    Jadvallar votes_count_trigger bilan bir xil tartibda qulflanadi
+    (contest_stats -> candidate_stats -> voter_marks -> global_stats), aks holda
+    boshqa konkurslarga ovoz berish bilan deadlock bo'lishi mumkin.
+    """
+    partition = vote_partition(contest_id)
+    # Faqat o'qish - hisoblagich jadvallari hali qulflanmaydi
+    removed_votes = await conn.fetch(f'''
+        SELECT (user_id % {STATS_SLOTS})::smallint AS slot, COUNT(*) AS n
+        FROM {partition} GROUP BY 1
+    ''')
+
+    await conn.execute('''
+        DELETE FROM contest_stats WHERE contest_id = $1
+    ''', contest_id)
+    await conn.execute('''
+        DELETE FROM candidate_stats
+        WHERE candidate_id IN (SELECT id FROM candidates WHERE contest_id = $1)
+    ''', contest_id)
+
+    await conn.execute(f'''
+        UPDATE voter_marks m
+        SET votes = m.votes - 1
+        FROM {partition} v
+        WHERE m.user_id = v.user_id
+    ''')
+    removed_voters = await conn.fetch(f'''
+        WITH gone AS (
+            DELETE FROM voter_marks m
+            USING {partition} v
+            WHERE m.user_id = v.user_id AND m.votes <= 0
+            RETURNING m.user_id
+        )
+        SELECT (user_id % {STATS_SLOTS})::smallint AS slot, COUNT(*) AS n
+        FROM gone GROUP BY 1
+    ''')
+
+    votes = {row['slot']: row['n'] for row in removed_votes}
+    voters = {row['slot']: row['n'] for row in removed_voters}
+    slots = sorted(votes.keys() | voters.keys())
+    await conn.execute('''
+        UPDATE global_stats g
+        SET total_votes = g.total_votes - d.votes,
+            total_voters = g.total_voters - d.voters
+        FROM unnest($1::smallint[], $2::bigint[], $3::bigint[]) AS d(slot, votes, voters)
+        WHERE g.slot = d.slot
+    ''', slots, [votes.get(slot, 0) for slot in slots], [voters.get(slot, 0) for slot in slots])
+
+
+class Migration:
+    """Bitta migratsiya qadami.
+
+    transactional=False qadamlar (CREATE INDEX CONCURRENTLY) tranzaksiyasiz
+    bajariladi, shuning uchun ular bitta idempotent buyruqdan iborat bo'lishi kerak.
+    """
+
+    def __init__(self, version: int, name: str, sql: str = None,
+                 func: Callable = None, transactional: bool = True):
+        self.version = version
+        self.name = name
+        self.sql = sql
+        self.func = func
+        self.transactional = transactional
+
+    async def apply(self, conn):
+        if self.func:
+            await self.func(conn)
+        else:
+            await conn.execute(self.sql)
+
+
+class ConcurrentIndex(Migration):
+    """CREATE INDEX CONCURRENTLY qadami (yarim qolgan INVALID index qayta quriladi)"""
+
+    def __init__(self, version: int, index_name: str, definition: str):
+        super().__init__(version, f"index_{index_name}", transactional=False)
+        self.index_name = index_name
+        self.definition = definition
+
+    async def apply(self, conn):
+        is_valid = await conn.fetchval('''
+            SELECT i.indisvalid FROM pg_index i
+            WHERE i.indexrelid = to_regclass($1::text)
+        ''', self.index_name)
+        if is_valid is False:
+            logger.warning(f"INVALID index qayta quriladi: {self.index_name}")
+            await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {self.index_name}')
+
+        await conn.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.index_name} {self.definition}'
+        )
+
+
+async def _vote_counters(conn):
+    """Ovoz hisoblagichlari: global, konkurs va nomzod bo'yicha + birinchi ovoz belgisi.
+
+    Triggerda yangilanadi, shuning uchun statistika votes jadvalini skanerlamaydi.
+    Mavjud ovozlar (ajratilgan arxiv partitsiyalari bilan) hisoblab to'ldiriladi.
+    """
+    await conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS global_stats (
+            slot SMALLINT PRIMARY KEY,
+            total_votes BIGINT NOT NULL DEFAULT 0,
+            total_voters BIGINT NOT NULL DEFAULT 0
+        );
+        INSERT INTO global_stats (slot)
+        SELECT generate_series(0, {STATS_SLOTS - 1})
+        ON CONFLICT DO NOTHING;
+
+        CREATE TABLE IF NOT EXISTS contest_stats (
+            contest_id INTEGER NOT NULL REFERENCES contests(id) ON DELETE CASCADE,
+            slot SMALLINT NOT NULL,
+            total_votes BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (contest_id, slot)
+        );
+
+        CREATE TABLE IF NOT EXISTS candidate_stats (
+            candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+            slot SMALLINT NOT NULL,
+            votes BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (candidate_id, slot)
+        );
+
+        -- Userning barcha konkurslardagi ovozlari soni: 0 dan 1 ga o'tish = yangi ovoz beruvchi
+        CREATE TABLE IF NOT EXISTS voter_marks (
+            user_id BIGINT PRIMARY KEY,
+            votes INTEGER NOT NULL DEFAULT 0,
+            first_voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+
+    # Har bir konkurs partitsiyasi (ajratilgan arxivlar ham) alohida hisoblanadi:
+    # bitta so'rov butun votes jadvalini emas, faqat bitta konkursni o'qiydi
+    contests = await conn.fetch('SELECT id FROM contests ORDER BY id')
+    for contest in contests:
+        table = vote_partition(contest['id'])
+        if not await conn.fetchval('SELECT to_regclass($1::text) IS NOT NULL', table):
+            continue
+        await conn.execute(f'''
+            INSERT INTO contest_stats (contest_id, slot, total_votes)
+            SELECT contest_id, user_id % {STATS_SLOTS}, COUNT(*)
+            FROM {table} GROUP BY 1, 2
+            ON CONFLICT (contest_id, slot) DO UPDATE
+            SET total_votes = contest_stats.total_votes + EXCLUDED.total_votes;
+
+            INSERT INTO candidate_stats (candidate_id, slot, votes)
+            SELECT v.candidate_id, v.user_id % {STATS_SLOTS}, COUNT(*)
+            FROM {table} v JOIN candidates c ON c.id = v.candidate_id
+            GROUP BY 1, 2
+            ON CONFLICT (candidate_id, slot) DO UPDATE
+            SET votes = candidate_stats.votes + EXCLUDED.votes;
+
+            INSERT INTO voter_marks (user_id, votes)
+            SELECT user_id, COUNT(*) FROM {table} GROUP BY 1
+            ON CONFLICT (user_id) DO UPDATE
+            SET votes = voter_marks.votes + EXCLUDED.votes;
+        ''')
+
+    await conn.execute(f'''
+        UPDATE global_stats g
+        SET total_votes = d.total_votes, total_voters = d.total_voters
+        FROM (
+            SELECT user_id % {STATS_SLOTS} AS slot, SUM(votes) AS total_votes, COUNT(*) AS total_voters
+            FROM voter_marks GROUP BY 1
+        ) d
+        WHERE g.slot = d.slot;
+    ''')
+
+    await conn.execute(f'''
+        CREATE OR REPLACE FUNCTION votes_count_trigger() RETURNS trigger AS $$
+        DECLARE
+            s SMALLINT;
+            first_vote BOOLEAN;
+            remaining INTEGER;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                s := NEW.user_id % {STATS_SLOTS};
+
+                INSERT INTO contest_stats (contest_id, slot, total_votes) VALUES (NEW.contest_id, s, 1)
+                ON CONFLICT (contest_id, slot) DO UPDATE SET total_votes = contest_stats.total_votes + 1;
+
+                IF NEW.candidate_id IS NOT NULL THEN
+                    INSERT INTO candidate_stats (candidate_id, slot, votes) VALUES (NEW.candidate_id, s, 1)
+                    ON CONFLICT (candidate_id, slot) DO UPDATE SET votes = candidate_stats.votes + 1;
+                END IF;
+
+                INSERT INTO voter_marks (user_id, votes) VALUES (NEW.user_id, 1)
+                ON CONFLICT (user_id) DO UPDATE SET votes = voter_marks.votes + 1
+                RETURNING (xmax = 0) INTO first_vote;
+
+                UPDATE global_stats
+                SET total_votes = total_votes + 1,
+                    total_voters = total_voters + first_vote::int
+                WHERE slot = s;
+                RETURN NEW;
+            END IF;
+
+            s := OLD.user_id % {STATS_SLOTS};
+
+            UPDATE contest_stats SET total_votes = total_votes - 1
+            WHERE contest_id = OLD.contest_id AND slot = s;
+
+            IF OLD.candidate_id IS NOT NULL THEN
+                UPDATE candidate_stats SET votes = votes - 1
+                WHERE candidate_id = OLD.candidate_id AND slot = s;
+            END IF;
+
+            UPDATE voter_marks SET votes = votes - 1
+            WHERE user_id = OLD.user_id
+            RETURNING votes INTO remaining;
+
+            IF remaining IS NOT NULL AND remaining <= 0 THEN
+                DELETE FROM voter_marks WHERE user_id = OLD.user_id;
+            END IF;
+
+            UPDATE global_stats
+            SET total_votes = total_votes - 1,
+                total_voters = total_voters - (remaining IS NOT NULL AND remaining <= 0)::int
+            WHERE slot = s;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS trigger_votes_count ON votes;
+        CREATE TRIGGER trigger_votes_count
+        AFTER INSERT OR DELETE ON votes
+        FOR EACH ROW EXECUTE FUNCTION votes_count_trigger();
+    ''')
+
+
+async def _partition_votes(conn):
+    """votes jadvalini konkurs bo'yicha LIST partitsiyalash.
+
+    Eski (oddiy) votes jadvali bo'lsa - ma'lumotlar partitsiyalarga ko'chiriladi,
+    arxivlangan konkurslar muzlatilib ajratiladi.
+    """
+    relkind = await conn.fetchval('''
+        SELECT c.relkind FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relname = 'votes' AND n.nspname = current_schema()
+    ''')
+
+    if relkind == 'r':
+        logger.info("Votes jadvali partitsiyalarga ko'chirilmoqda...")
+        await conn.execute('''
+            ALTER TABLE votes RENAME TO votes_legacy;
+            DROP INDEX IF EXISTS idx_votes_contest, idx_votes_candidate, idx_votes_user,
+                idx_votes_contest_user, idx_votes_created, idx_votes_contest_candidate,
+                idx_votes_contest_user_unique, idx_votes_candidate_count;
+        ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS votes (
+            id BIGSERIAL,
+            contest_id INTEGER NOT NULL REFERENCES contests(id) ON DELETE CASCADE,
+            candidate_id INTEGER REFERENCES candidates(id) ON DELETE CASCADE,
+            user_id BIGINT NOT NULL,
+            username VARCHAR(255),
+            voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (contest_id, id),
+            UNIQUE (contest_id, user_id)
+        ) PARTITION BY LIST (contest_id);
+
+        -- (contest_id, user_id) UNIQUE constraint orqali indexlangan,
+        -- indexlar har bir partitsiyada alohida quriladi
+        CREATE INDEX IF NOT EXISTS idx_votes_candidate ON votes(candidate_id);
+    ''')
+
+    contests = await conn.fetch('SELECT id, is_archived FROM contests ORDER BY id')
+    for contest in contests:
+        await create_vote_partition(conn, contest['id'])
+
+    if relkind != 'r':
+        return
+
+    # id bo'yicha keyset bo'laklari: har bir INSERT cheklangan hajmda
+    last_id = 0
+    while True:
+        batch = await conn.fetchrow('''
+            WITH batch AS (
+                SELECT id, contest_id, candidate_id, user_id, username, voted_at
+                FROM votes_legacy
+                WHERE id > $1
+                ORDER BY id
+                LIMIT $2
+            ), moved AS (
+                INSERT INTO votes (id, contest_id, candidate_id, user_id, username, voted_at)
+                SELECT * FROM batch WHERE contest_id IS NOT NULL
+            )
+            SELECT MAX(id) AS last_id, COUNT(*) AS n FROM batch
+        ''', last_id, MIGRATION_BATCH_SIZE)
+        if not batch['n']:
+            break
+        last_id = batch['last_id']
+        logger.info(f"votes_legacy: id {last_id} gacha ko'chirildi")
+
+    await conn.execute('''
+        SELECT setval(pg_get_serial_sequence('votes', 'id'),
+                      (SELECT COALESCE(MAX(id), 0) + 1 FROM votes), false);
+
+        DROP TABLE votes_legacy CASCADE;
+    ''')
+
+    for contest in contests:
+        if contest['is_archived']:
+            await freeze_results(conn, contest['id'])
+            await conn.execute(
+                f'ALTER TABLE votes DETACH PARTITION {vote_partition(contest["id"])}'
+            )
+
+    logger.info(f"✅ Votes jadvali {len(contests)} ta partitsiyaga ko'chirildi")
+
+
+# ============================================
+# MIGRATSIYALAR (faqat oxiriga qo'shiladi!)
+# ============================================
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial_schema", '''
+        CREATE TABLE IF NOT EXISTS contests (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            image_file_id VARCHAR(255),
+            start_date TIMESTAMP NOT NULL,
+            end_date TIMESTAMP NOT NULL,
+            is_active BOOLEAN DEFAULT TRUE,
+            is_archived BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        ALTER TABLE contests
+        ADD COLUMN IF NOT EXISTS channel_chat_id VARCHAR(100),
+        ADD COLUMN IF NOT EXISTS channel_post_message_id INTEGER;
+
+        -- Kanal talablari jadvali
+        CREATE TABLE IF NOT EXISTS contest_channels (
+            id SERIAL PRIMARY KEY,
+            contest_id INTEGER REFERENCES contests(id) ON DELETE CASCADE,
+            channel_id VARCHAR(100) NOT NULL,
+            channel_name VARCHAR(255),
+            channel_link TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS candidates (
+            id SERIAL PRIMARY KEY,
+            contest_id INTEGER REFERENCES contests(id) ON DELETE CASCADE,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            position INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Foydalanuvchilar jadvali
+        CREATE TABLE IF NOT EXISTS users (
+            user_id BIGINT PRIMARY KEY,
+            username VARCHAR(255),
+            first_name VARCHAR(255),
+            last_name VARCHAR(255),
+            last_action TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    '''),
+
+    # Arxivlangan konkursning muzlatilgan yakuniy natijalari
+    Migration(2, "frozen_results", '''
+        ALTER TABLE contests
+        ADD COLUMN IF NOT EXISTS final_total_votes INTEGER,
+        ADD COLUMN IF NOT EXISTS final_total_voters INTEGER;
+
+        ALTER TABLE candidates ADD COLUMN IF NOT EXISTS final_votes INTEGER;
+    '''),
+
+    # migration.sql dagi har INSERT da REFRESH qiladigan trigger olib tashlanadi
+    Migration(3, "drop_vote_counts_cache", '''
+        DO $$
+        BEGIN
+            IF to_regclass('votes') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS trigger_refresh_vote_counts ON votes;
+            END IF;
+        END $$;
+        DROP FUNCTION IF EXISTS refresh_vote_counts();
+        DROP MATERIALIZED VIEW IF EXISTS vote_counts_cache;
+    '''),
+
+    Migration(4, "partition_votes", func=_partition_votes),
+
+    # VARCHAR(255) → TEXT (konkurs va nomzod nomlari uchun)
+    Migration(5, "text_names", '''
+        ALTER TABLE contests ALTER COLUMN name TYPE TEXT;
+        ALTER TABLE candidates ALTER COLUMN name TYPE TEXT;
+        ALTER TABLE candidates ALTER COLUMN description TYPE TEXT;
+    '''),
+
+    Migration(6, "vote_statistics_target", '''
+        ALTER TABLE votes ALTER COLUMN candidate_id SET STATISTICS 1000;
+        ALTER TABLE votes ALTER COLUMN user_id SET STATISTICS 1000;
+    '''),
+
+    # Contests jadali uchun
+    ConcurrentIndex(7, "idx_contests_active",
+                    "ON contests(is_active, is_archived)"),
+    ConcurrentIndex(8, "idx_contests_dates",
+                    "ON contests(start_date, end_date)"),
+    ConcurrentIndex(9, "idx_contests_archived_end",
+                    "ON contests(end_date, id) WHERE is_archived = TRUE"),
+
+    # Candidates jadali uchun
+    ConcurrentIndex(10, "idx_candidates_contest_position",
+                    "ON candidates(contest_id, position)"),
+
+    # Channels jadali uchun
+    ConcurrentIndex(11, "idx_channels_contest",
+                    "ON contest_channels(contest_id)"),
+
+    # Users jadali uchun
+    ConcurrentIndex(12, "idx_users_last_action",
+                    "ON users(last_action)"),
+
+    # Ommaviy xabar yuborish: bloklagan userlar va davom ettirish nuqtasi
+    Migration(13, "broadcasts", '''
+        ALTER TABLE users ADD COLUMN IF NOT EXISTS is_blocked BOOLEAN NOT NULL DEFAULT FALSE;
+
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id SERIAL PRIMARY KEY,
+            admin_id BIGINT NOT NULL,
+            from_chat_id BIGINT NOT NULL,
+            message_id BIGINT NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'running',
+            last_user_id BIGINT NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            blocked INTEGER NOT NULL DEFAULT 0,
+            progress_chat_id BIGINT,
+            progress_message_id BIGINT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        );
+    '''),
+
+    # Bir konkurs bir nechta kanalga post qilinadi. contests.channel_* ustunlari
+    # endi yozilmaydi, mavjud postlar shu jadvalga ko'chiriladi
+    Migration(14, "contest_posts", '''
+        CREATE TABLE IF NOT EXISTS contest_posts (
+            id SERIAL PRIMARY KEY,
+            contest_id INTEGER NOT NULL REFERENCES contests(id) ON DELETE CASCADE,
+            chat_id VARCHAR(255) NOT NULL,
+            message_id BIGINT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (contest_id, chat_id)
+        );
+
+        INSERT INTO contest_posts (contest_id, chat_id, message_id)
+        SELECT id, channel_chat_id, channel_post_message_id
+        FROM contests
+        WHERE channel_chat_id IS NOT NULL AND channel_post_message_id IS NOT NULL
+        ON CONFLICT (contest_id, chat_id) DO NOTHING;
+    '''),
+
+    Migration(15, "vote_counters", func=_vote_counters),
+
+    # FSM holatlari (FSM_STORAGE=postgres rejimida)
+    Migration(16, "fsm_states", '''
+        CREATE TABLE IF NOT EXISTS fsm_states (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data JSONB,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_fsm_states_updated ON fsm_states(updated_at);
+    '''),
+
+    # Eski arxiv ovozlari siqilgan segmentlarda (cold_archive.py)
+    Migration(17, "cold_vote_archive", '''
+        ALTER TABLE contests ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP;
+        ALTER TABLE contests ADD COLUMN IF NOT EXISTS votes_cold_at TIMESTAMP;
+        ALTER TABLE contests ADD COLUMN IF NOT EXISTS votes_restored_at TIMESTAMP;
+        UPDATE contests SET archived_at = LEAST(end_date, NOW())
+        WHERE is_archived = TRUE AND archived_at IS NULL;
+
+        CREATE TABLE IF NOT EXISTS vote_segments (
+            contest_id INTEGER NOT NULL REFERENCES contests(id) ON DELETE CASCADE,
+            seq INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            first_vote_id BIGINT NOT NULL,
+            last_vote_id BIGINT NOT NULL,
+            data BYTEA NOT NULL,
+            PRIMARY KEY (contest_id, seq)
+        );
+        -- Ma'lumot allaqachon siqilgan: TOAST qayta siqmaydi
+        ALTER TABLE vote_segments ALTER COLUMN data SET STORAGE EXTERNAL;
+    '''),
+
+    # Ovozlar tozalanganda oshadi: replikalar xotiradagi VoterSet ni tashlaydi
+    Migration(18, "contest_votes_epoch", '''
+        ALTER TABLE contests ADD COLUMN IF NOT EXISTS votes_epoch INTEGER NOT NULL DEFAULT 0;
+    '''),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(conn) -> int:
+    try:
+        return await conn.fetchval('SELECT COALESCE(MAX(version), 0) FROM schema_migrations')
+    except asyncpg.UndefinedTableError:
+        return 0
+
+
+async def run_migrations(conn) -> int:
+    """Bajarilmagan migratsiyalarni tartib bilan bajarish.
+
+    Advisory lock ostida ishlaydi: bir vaqtda faqat bitta replika migratsiya qiladi,
+    qolganlari kutadi va keyin hammasi bajarilganini ko'radi. Lock so'rov ichida
+    kutilmaydi (pg_advisory_lock): ochiq snapshot CREATE INDEX CONCURRENTLY ni
+    to'xtatib deadlock ga olib keladi. Shuning uchun pg_try_advisory_lock bilan
+    so'rovlar orasida uxlab kutiladi.
+    """
+    waiting = False
+    while not await conn.fetchval('SELECT pg_try_advisory_lock($1)', MIGRATION_LOCK_KEY):
+        if not waiting:
+            waiting = True
+            logger.info("Boshqa replika migratsiya qilmoqda, kutilmoqda...")
+        await asyncio.sleep(MIGRATION_LOCK_POLL_INTERVAL)
+    try:
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Lock olingandan keyin o'qiladi: kutish davomida boshqa replika bajargan bo'lishi mumkin
+        applied = {
+            row['version']
+            for row in await conn.fetch('SELECT version FROM schema_migrations')
+        }
+
+        count = 0
+        for migration in MIGRATIONS:
+            if migration.version in applied:
+                continue
+
+            logger.info(f"Migratsiya {migration.version}: {migration.name}...")
+            if migration.transactional:
+                async with conn.transaction():
+                    await migration.apply(conn)
+                    await _mark_applied(conn, migration)
+            else:
+                await migration.apply(conn)
+                await _mark_applied(conn, migration)
+            count += 1
+
+        return count
+    finally:
+        await conn.execute('SELECT pg_advisory_unlock($1)', MIGRATION_LOCK_KEY)
+
+
+async def _mark_applied(conn, migration: Migration):
+    await conn.execute('''
+        INSERT INTO schema_migrations (version, name) VALUES ($1, $2)
+        ON CONFLICT (version) DO NOTHING
+    ''', migration.version, migration.name)
+
+
+def connect_kwargs(db_config: dict = None) -> dict:
+    """Pool sozlamalarisiz bitta ulanish parametrlari.
+
+    command_timeout o'chiriladi: migratsiyalar (ko'chirish, CONCURRENTLY index)
+    katta bazada 60 sekunddan uzoq davom etishi mumkin.
+    """
+    kwargs = dict(db_config or config.DB_CONFIG)
+    for key in ('min_size', 'max_size', 'max_queries', 'max_inactive_connection_lifetime'):
+        kwargs.pop(key, None)
+    kwargs['command_timeout'] = None
+    return kwargs
+
+
+async def ensure_schema(conn):
+    """Ishga tushishda sxema versiyasini tekshirish (odatda bitta so'rov)"""
+    version = await get_schema_version(conn)
+    if version >= LATEST_VERSION:
+        return
+
+    if not config.AUTO_MIGRATE:
+        raise RuntimeError(
+            f"Database sxemasi eskirgan (v{version}, kerak v{LATEST_VERSION}). "
+            f"`python migrations.py` ni bajaring."
+        )
+
+    count = await run_migrations(conn)
+    logger.info(f"✅ {count} ta migratsiya bajarildi (v{LATEST_VERSION})")
+
+
+async def main():
+    conn = await asyncpg.connect(**connect_kwargs())
+    try:
+        count = await run_migrations(conn)
+        print(f"✅ {count} ta migratsiya bajarildi. Sxema versiyasi: v{await get_schema_version(conn)}")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    HIGH = 0  # Foydalanuvchiga javoblar, ovoz tasdiqlari
+    LOW = 1   # Kanal postini yangilash, admin bildirishnomalari
+    BULK = 2  # Ommaviy xabarlar
+
+
+_priority: ContextVar[Optional[Priority]] = ContextVar('outbound_priority', default=None)
+
+
+@contextmanager
+def outbound_priority(priority: Priority):
+    """Blok ichidagi barcha Bot API chaqiruvlari uchun ustuvorlik"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        """Keyingi token gacha qolgan vaqt (0 - hozir yuborish mumkin)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        return now >= self.blocked_until and self.wait_time(now) == 0 and self.tokens >= self.capacity
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Bot API so'rovlari navbati.
+
+    Xabar yuborish va tahrirlash so'rovlari ustuvorlik bo'yicha navbatga qo'yiladi va
+    global hamda har bir chat uchun token bucket orqali chiqariladi. 429 javobidagi
+    retry_after ga amal qilinadi. Qolgan so'rovlar (answerCallbackQuery, getChatMember)
+    navbatsiz o'tadi.
+    """
+
+    LIMITED_PREFIXES = ('send', 'edit', 'copy', 'forward')
+    SCAN_LIMIT = 50  # Bitta navbatda tayyor chat qidirish chuqurligi
+
+    def __init__(self):
+        self.queues: Dict[Priority, Deque[Tuple[Any, asyncio.Future, float]]] = {
+            priority: deque() for priority in Priority
+        }
+        self.global_bucket = TokenBucket(config.OUTBOUND_GLOBAL_RATE, config.OUTBOUND_GLOBAL_RATE)
+        self.chat_buckets: Dict[Any, TokenBucket] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.sent: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.wait_total: Dict[Priority, float] = {priority: 0.0 for priority in Priority}
+        self.wait_max: Dict[Priority, float] = {priority: 0.0 for priority in Priority}
+        self.retry_after_count = 0
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot, method):
+        api_method = getattr(method, '__api_method__', '')
+        if not api_method.startswith(self.LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, 'chat_id', None)
+        priority = self._priority_for(chat_id)
+
+        for attempt in range(config.OUTBOUND_MAX_RETRIES + 1):
+            await self._wait_turn(priority, chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.retry_after_count += 1
+                logger.warning(f"429: {api_method} chat {chat_id}, {e.retry_after}s kutiladi")
+                bucket = self._chat_bucket(chat_id) if chat_id is not None else self.global_bucket
+                bucket.block(e.retry_after)
+                if attempt == config.OUTBOUND_MAX_RETRIES:
+                    raise
+
+    @staticmethod
+    def _is_group(chat_id) -> bool:
+        return isinstance(chat_id, str) or (isinstance(chat_id, int) and chat_id < 0)
+
+    def _priority_for(self, chat_id) -> Priority:
+        priority = _priority.get()
+        if priority is not None:
+            return priority
+        # Kanal va guruhlarga yozish odatda fon ishi
+        return Priority.LOW if self._is_group(chat_id) else Priority.HIGH
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if self._is_group(chat_id):
+                bucket = TokenBucket(config.OUTBOUND_GROUP_CHAT_RATE, config.OUTBOUND_GROUP_CHAT_BURST)
+            else:
+                bucket = TokenBucket(config.OUTBOUND_PRIVATE_CHAT_RATE, config.OUTBOUND_PRIVATE_CHAT_BURST)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _wait_turn(self, priority: Priority, chat_id):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._dispatch())
+
+        future = asyncio.get_running_loop().create_future()
+        queued_at = time.monotonic()
+        self.queues[priority].append((chat_id, future, queued_at))
+        self._wakeup.set()
+        await future
+
+        waited = time.monotonic() - queued_at
+        self.sent[priority] += 1
+        self.wait_total[priority] += waited
+        self.wait_max[priority] = max(self.wait_max[priority], waited)
+
+    def _next_ready(self, now: float) -> Tuple[Optional[Tuple], float]:
+        """Eng yuqori ustuvorlikdagi, chati bo'sh so'rov yoki keyingi tayyor bo'lish vaqti"""
+        min_delay = 1.0
+        for priority in Priority:
+            queue = self.queues[priority]
+            for index in range(min(len(queue), self.SCAN_LIMIT)):
+                chat_id, future, queued_at = queue[index]
+                if future.done():
+                    continue
+                delay = self._chat_bucket(chat_id).wait_time(now) if chat_id is not None else 0.0
+                if delay == 0:
+                    del queue[index]
+                    return (chat_id, future, queued_at), 0.0
+                min_delay = min(min_delay, delay)
+            # Bekor qilingan so'rovlarni navbat boshidan tozalash
+            while queue and queue[0][1].done():
+                queue.popleft()
+        return None, min_delay
+
+    async def _sleep(self, delay: float):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            if not any(self.queues.values()):
+                self._cleanup_buckets()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            delay = self.global_bucket.wait_time(now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            item, delay = self._next_ready(now)
+            if item is None:
+                await self._sleep(delay)
+                continue
+
+            chat_id, future, _ = item
+            self.global_bucket.consume()
+            if chat_id is not None:
+                self._chat_bucket(chat_id).consume()
+            future.set_result(None)
+
+    def _cleanup_buckets(self):
+        if len(self.chat_buckets) < 10_000:
+            return
+        now = time.monotonic()
+        for chat_id in [c for c, b in self.chat_buckets.items() if b.is_idle(now)]:
+            del self.chat_buckets[chat_id]
+
+    def get_stats(self) -> Dict:
+        """Navbat chuqurligi va kutish vaqtlari"""
+        return {
+            'queues': {
+                priority.name: {
+                    'depth': len(self.queues[priority]),
+                    'sent': self.sent[priority],
+                    'avg_wait_ms': round(self.wait_total[priority] * 1000 / self.sent[priority], 1)
+                    if self.sent[priority] else 0.0,
+                    'max_wait_ms': round(self.wait_max[priority] * 1000, 1),
+                }
+                for priority in Priority
+            },
+            'retry_after': self.retry_after_count,
+            'chats': len(self.chat_buckets),
+        }
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
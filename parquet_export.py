@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Dict, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+VOTES_SCHEMA = pa.schema([
+    ('vote_id', pa.int64()),
+    ('contest_id', pa.int64()),
+    ('candidate_id', pa.int64()),
+    ('candidate_name', pa.dictionary(pa.int32(), pa.string())),
+    ('user_id', pa.int64()),
+    ('username', pa.string()),
+    ('voted_at', pa.timestamp('us')),
+])
+
+
+def _chunk_table(rows: List, names: pa.Array, name_index: Dict[int, int]) -> pa.Table:
+    # Nomzod nomlari har bir bo'lakda bir xil lug'atga ishora qiladi
+    indices = pa.array([name_index.get(row['candidate_id']) for row in rows], type=pa.int32())
+    return pa.Table.from_arrays([
+        pa.array([row['id'] for row in rows], type=pa.int64()),
+        pa.array([row['contest_id'] for row in rows], type=pa.int64()),
+        pa.array([row['candidate_id'] for row in rows], type=pa.int64()),
+        pa.DictionaryArray.from_arrays(indices, names),
+        pa.array([row['user_id'] for row in rows], type=pa.int64()),
+        pa.array([row['username'] for row in rows], type=pa.string()),
+        pa.array([row['voted_at'] for row in rows], type=pa.timestamp('us')),
+    ], schema=VOTES_SCHEMA)
+
+
+def _write_chunk(writer: pq.ParquetWriter, rows: List, names: pa.Array, name_index: Dict[int, int]):
+    writer.write_table(_chunk_table(rows, names, name_index))
+
+
+async def export_votes_parquet(db: Database, contest_id: int, path: str) -> int:
+    """Konkurs ovozlarini siqilgan Parquet faylga yozish.
+
+    Ovozlar cursor dan PARQUET_CHUNK_SIZE bo'laklarida o'qiladi va har bir bo'lak
+    alohida row group bo'lib yoziladi - xotira hajmi ovozlar soniga bog'liq emas.
+    Jadvalni qurish va siqish fon oqimida bajariladi. Yozilgan qatorlar soni qaytariladi.
+    """
+    candidates = await db.get_candidates(contest_id)
+    names = pa.array([c['name'] for c in candidates], type=pa.string())
+    name_index = {c['id']: i for i, c in enumerate(candidates)}
+
+    writer = pq.ParquetWriter(path, VOTES_SCHEMA, compression=config.PARQUET_COMPRESSION)
+    total = 0
+    try:
+        async for rows in db.stream_votes(contest_id, config.PARQUET_CHUNK_SIZE):
+            await asyncio.to_thread(_write_chunk, writer, rows, names, name_index)
+            total += len(rows)
+    finally:
+        await asyncio.to_thread(writer.close)
+
+    logger.info(f"Konkurs {contest_id} ovozlari Parquet ga yozildi: {total} ta")
+    return total
@@ -0,0 +1,57 @@
+import logging
+import time
+from typing import Dict, List
+
+from concurrency import SingleFlight
+from leaderboard import Leaderboard
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsProvider:
+    """Natijalar so'rovlarini birlashtiruvchi qatlam.
+
+    Bir konkurs uchun parallel so'rovlar bitta DB so'rovini kutadi, natija esa
+    `ttl` sekund davomida qayta ishlatiladi. Har bir konkurs uchun Leaderboard
+    saqlanadi: yangi sonlar unga qo'llanadi, qayta saralanmaydi.
+    Qaytarilgan ro'yxat umumiy - chaqiruvchi uni o'zgartirmasligi kerak.
+    """
+
+    def __init__(self, db, ttl: float):
+        self.db = db
+        self.ttl = ttl
+        self._flight = SingleFlight()
+        self._boards: Dict[int, Leaderboard] = {}
+        self._loaded_at: Dict[int, float] = {}
+
+    async def get_leaderboard(self, contest_id: int) -> Leaderboard:
+        loaded_at = self._loaded_at.get(contest_id)
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+            return self._boards[contest_id]
+        board, _ = await self._flight.do(contest_id, self._load, contest_id)
+        return board
+
+    async def get_results(self, contest_id: int) -> List[Dict]:
+        board = await self.get_leaderboard(contest_id)
+        return board.top()
+
+    async def get_results_text(self, contest_id: int, contest_name: str) -> str:
+        board = await self.get_leaderboard(contest_id)
+        return board.render(contest_name)
+
+    def apply(self, contest_id: int, rows: List[Dict]) -> Leaderboard:
+        """Boshqa so'rovda olingan yangi sonlarni qo'llash (id, name, description, votes)"""
+        board = self._boards.get(contest_id)
+        if board is None:
+            board = self._boards[contest_id] = Leaderboard()
+        board.apply(rows)
+        self._loaded_at[contest_id] = time.monotonic()
+        return board
+
+    def invalidate(self, contest_id: int):
+        # Reyting saqlanadi - keyingi so'rovda faqat o'zgargan sonlar qo'llanadi
+        self._loaded_at.pop(contest_id, None)
+
+    async def _load(self, contest_id: int) -> Leaderboard:
+        rows = await self.db.get_candidate_counts(contest_id)
+        return self.apply(contest_id, rows)
@@ -0,0 +1,97 @@
+import asyncpg
+import logging
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Any
+
+logger = logging.getLogger(__name__)
+
+
+class StatementConnection(asyncpg.Connection):
+    """Tayyorlangan so'rovlarni o'zida saqlaydigan ulanish"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: Dict[str, Any] = {}
+
+
+class StatementRegistry:
+    """Nomlangan so'rovlar reestri.
+
+    So'rovlar bir marta e'lon qilinadi, pool ning `init` hook i orqali har bir
+    yangi ulanishda tayyorlanadi (prepare) va nomi bo'yicha chaqiriladi.
+    """
+
+    def __init__(self, queries: Dict[str, str] = None):
+        self.queries: Dict[str, str] = dict(queries or {})
+        self.calls: Counter = Counter()
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    def register(self, name: str, sql: str):
+        if name in self.queries:
+            raise ValueError(f"So'rov allaqachon ro'yxatdan o'tgan: {name}")
+        self.queries[name] = sql
+
+    async def init_connection(self, conn: StatementConnection):
+        """Pool init hook: barcha so'rovlarni yangi ulanishda tayyorlash"""
+        for name, sql in self.queries.items():
+            conn.prepared[name] = await conn.prepare(sql)
+
+    async def _statement(self, conn, name: str, refresh: bool = False):
+        prepared = conn.prepared
+        if refresh or name not in prepared:
+            prepared[name] = await conn.prepare(self.queries[name])
+        return prepared[name]
+
+    async def _run(self, conn, name: str, method: str, args: tuple) -> Any:
+        self.calls[name] += 1
+        started = time.perf_counter()
+        try:
+            statement = await self._statement(conn, name)
+            try:
+                return await getattr(statement, method)(*args)
+            except (asyncpg.InvalidCachedStatementError, asyncpg.FeatureNotSupportedError):
+                # Sxema o'zgargan (masalan, yangi ustun) - qayta tayyorlab bir marta urinish
+                if conn.is_in_transaction():
+                    raise
+                logger.warning(f"So'rov qayta tayyorlanmoqda: {name}")
+                statement = await self._statement(conn, name, refresh=True)
+                return await getattr(statement, method)(*args)
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+
+    async def fetch(self, conn, name: str, *args) -> List[asyncpg.Record]:
+        return await self._run(conn, name, 'fetch', args)
+
+    async def fetchrow(self, conn, name: str, *args) -> asyncpg.Record:
+        return await self._run(conn, name, 'fetchrow', args)
+
+    async def fetchval(self, conn, name: str, *args) -> Any:
+        return await self._run(conn, name, 'fetchval', args)
+
+    async def executemany(self, conn, name: str, args: List[tuple]):
+        await self._run(conn, name, 'executemany', (args,))
+
+    async def execute(self, conn, name: str, *args):
+        # PreparedStatement da execute yo'q - natijasiz so'rov fetch orqali bajariladi
+        await self._run(conn, name, 'fetch', args)
+
+    def stats(self) -> List[Dict]:
+        """Har bir so'rov bo'yicha chaqiruvlar soni va umumiy vaqt"""
+        return sorted(
+            (
+                {
+                    'name': name,
+                    'calls': calls,
+                    'total_ms': round(self.seconds[name] * 1000, 1),
+                    'avg_ms': round(self.seconds[name] * 1000 / calls, 2),
+                }
+                for name, calls in self.calls.items()
+            ),
+            key=lambda s: s['calls'],
+            reverse=True
+        )
+
+    def reset_stats(self):
+        self.calls.clear()
+        self.seconds.clear()
@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import List, Dict
 import io
 import config
+from log_pipeline import setup_logging_pipeline
 
 matplotlib.use('Agg')
 plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -14,15 +15,8 @@ logger = logging.getLogger(__name__)
 
 
 def setup_logging():
-    """Logging sozlash"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(config.LOG_FILE, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+    """Logging sozlash: JSON qatorlar, navbat orqali fon oqimida yoziladi"""
+    setup_logging_pipeline()
 
 
 def is_admin(user_id: int) -> bool:
@@ -53,29 +47,6 @@ def format_vote_count(count: int) -> str:
             return formatted.replace('.0M', 'M')
 
 
-def format_results_text(results: List[Dict], contest_name: str = "") -> str:
-    text = f"📊 <b>{contest_name}</b>\n\n"
-
-    if not results:
-        text += "❌ Hozircha ovozlar yo'q\n"
-        return text
-
-    total_votes = sum(r['votes'] for r in results)
-    text += f"📈 Jami ovozlar: <b>{total_votes}</b>\n\n"
-
-    for i, result in enumerate(results, 1):
-        medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-        name = result['candidate_name']
-        votes = result['votes']
-        percentage = result['percentage'] or 0
-
-        bar = "█" * int(percentage / 5) + "░" * (20 - int(percentage / 5))
-
-        text += f"{medal} <b>{name}</b>\n"
-        text += f"   {bar} {percentage}% ({votes} ovoz)\n\n"
-
-    return text
-
 async def create_excel_report(report_data: Dict) -> io.BytesIO:
     output = io.BytesIO()
 
@@ -202,4 +173,12 @@ def validate_channel_link(link: str) -> bool:
 
 
 def log_user_action(user_id: int, username: str, action: str):
-    logger.info(f"User: {user_id} (@{username}) - Action: {action}")
\ No newline at end of file
+    logger.info(
+        f"User: {user_id} (@{username}) - Action: {action}",
+        extra={
+            'event': action.split(':')[0],
+            'user_id': user_id,
+            'username': username,
+            'action': action,
+        }
+    )
\ No newline at end of file
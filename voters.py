@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import chain
+from typing import Dict, List
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class VoterSet:
+    """Bitta konkursda ovoz berganlarning ixcham to'plami.
+
+    Asosiy qism - tartiblangan int64 massiv (har bir user uchun 8 bayt), yangi
+    ovozlar qo'shilgan vaqti bilan kichik lug'atga yoziladi va vaqti-vaqti bilan
+    massivga qo'shiladi.
+    """
+
+    MERGE_THRESHOLD = 4096
+
+    def __init__(self):
+        self.ids = array('q')
+        self.recent: Dict[int, float] = {}
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.epoch = None
+
+    def __contains__(self, user_id: int) -> bool:
+        if user_id in self.recent:
+            return True
+        index = bisect_left(self.ids, user_id)
+        return index < len(self.ids) and self.ids[index] == user_id
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.recent)
+
+    def add(self, user_id: int):
+        if user_id in self:
+            return
+        self.recent[user_id] = time.monotonic()
+        if len(self.recent) >= self.MERGE_THRESHOLD:
+            self._merge()
+
+    def _merge(self):
+        # add() dublikat qo'shmaydi, massiv deyarli tartiblangan - Timsort tez ishlaydi
+        self.ids = array('q', sorted(chain(self.ids, self.recent)))
+        self.recent = {}
+
+    def memory_bytes(self) -> int:
+        return self.ids.buffer_info()[1] * self.ids.itemsize + sys.getsizeof(self.recent)
+
+
+class VoterIndex:
+    """Har bir replikadagi konkurslar bo'yicha VoterSet lar.
+
+    Faqat ijobiy javobga ishoniladi: user to'plamda bo'lsa "allaqachon ovoz bergan"
+    DB siz qaytariladi, aks holda DB tekshiriladi (boshqa replikadagi ovozlar uchun).
+    To'plam birinchi so'rovda fonda keyset bo'laklari bilan yuklanadi.
+
+    `lifecycle` (ContestScheduler) berilsa to'plam faqat ovoz qabul qilayotgan
+    konkurslar uchun yuritiladi va chegara ochiq konkurslar sonidan kichik bo'lmaydi.
+    Konkursning votes_epoch i o'zgarsa (boshqa replikada ovozlar tozalangan)
+    to'plam yoshidan qat'i nazar tashlanadi.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.lifecycle = None
+        self.sets: "OrderedDict[int, VoterSet]" = OrderedDict()
+        self._loading: Dict[int, asyncio.Task] = {}
+
+    def contains(self, contest_id: int, user_id: int) -> bool:
+        if self.lifecycle is not None and contest_id not in self.lifecycle.open_contests():
+            # Yopilgan yoki noma'lum konkurs: to'plam yuklanmaydi, tekshiruv DB da
+            self.drop(contest_id)
+            return False
+
+        epoch = self._epoch(contest_id)
+        voter_set = self.sets.get(contest_id)
+        if voter_set is not None and voter_set.epoch != epoch:
+            self.drop(contest_id)
+            voter_set = None
+        if voter_set is None:
+            voter_set = self._create(contest_id)
+            voter_set.epoch = epoch
+        self.sets.move_to_end(contest_id)
+
+        stale = time.monotonic() - voter_set.loaded_at > config.VOTER_SET_MAX_AGE
+        if (not voter_set.loaded or stale) and contest_id not in self._loading:
+            self._loading[contest_id] = asyncio.create_task(self._load(contest_id))
+        return user_id in voter_set
+
+    def add(self, contest_id: int, user_id: int):
+        voter_set = self.sets.get(contest_id)
+        if voter_set is not None:
+            voter_set.add(user_id)
+
+    def _epoch(self, contest_id: int):
+        return self.lifecycle.votes_epochs.get(contest_id) if self.lifecycle is not None else None
+
+    def drop(self, contest_id: int):
+        self.sets.pop(contest_id, None)
+        task = self._loading.pop(contest_id, None)
+        if task:
+            task.cancel()
+
+    def _create(self, contest_id: int) -> VoterSet:
+        voter_set = VoterSet()
+        self.sets[contest_id] = voter_set
+
+        limit = config.VOTER_SET_MAX_CONTESTS
+        if self.lifecycle is not None:
+            open_ids = self.lifecycle.open_contests()
+            for closed in [c for c in self.sets if c not in open_ids]:
+                self.drop(closed)
+            # Ochiq konkurslar bir-birini chiqarib, qayta yuklanmasligi uchun
+            limit = max(limit, len(open_ids))
+        while len(self.sets) > limit:
+            evicted, _ = self.sets.popitem(last=False)
+            self.drop(evicted)
+        return voter_set
+
+    async def _load(self, contest_id: int):
+        started = time.monotonic()
+        try:
+            fresh = VoterSet()
+            # Yuklashdan oldin olinadi: shu orada reset bo'lsa keyingi contains() qayta yuklaydi
+            fresh.epoch = self._epoch(contest_id)
+            after_user_id = 0
+            while True:
+                chunk = await self.db.get_voter_ids_chunk(contest_id, after_user_id, config.VOTER_SET_CHUNK_SIZE)
+                if not chunk:
+                    break
+                # Keyset tartibi user_id bo'yicha - massiv tayyor tartiblangan
+                fresh.ids.extend(chunk)
+                after_user_id = chunk[-1]
+                await asyncio.sleep(0)
+
+            current = self.sets.get(contest_id)
+            if current is None or current.epoch != fresh.epoch:
+                # Yuklash davomida drop/evict yoki reset bo'lgan
+                return
+            # Yuklash boshlangandan keyin shu replikada berilgan ovozlar. Oldingilari
+            # DB snapshot ida bo'lishi kerak: yo'q bo'lsa ovozlar reset qilingan
+            fresh.recent = {
+                user_id: added_at for user_id, added_at in current.recent.items()
+                if added_at >= started and user_id not in fresh
+            }
+            fresh.loaded = True
+            fresh.loaded_at = time.monotonic()
+            self.sets[contest_id] = fresh
+            logger.info(f"Konkurs {contest_id} ovoz beruvchilari yuklandi: {len(fresh)} ta, "
+                        f"{fresh.memory_bytes() / 1024 / 1024:.1f} MB, "
+                        f"{time.monotonic() - started:.1f}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Konkurs {contest_id} ovoz beruvchilarini yuklashda xato: {e}")
+        finally:
+            if self._loading.get(contest_id) is asyncio.current_task():
+                del self._loading[contest_id]
+
+    def stats(self) -> List[Dict]:
+        """Xotira hisobi: konkurs bo'yicha hajm va million ovoz beruvchiga MB"""
+        result = []
+        for contest_id, voter_set in self.sets.items():
+            count = len(voter_set)
+            size = voter_set.memory_bytes()
+            result.append({
+                'contest_id': contest_id,
+                'voters': count,
+                'loaded': voter_set.loaded,
+                'mb': round(size / 1024 / 1024, 2),
+                'mb_per_million': round(size / count * 1_000_000 / 1024 / 1024, 2) if count else None,
+            })
+        return result